@@ -1,58 +1,381 @@
-from flask import Flask, request, render_template
-from web.basic_requests import check_weather_by_location_key, get_location_key_by_name, get_location_key_by_coordinates
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 
-# Создаем экземпляр Flask-приложения
-app = Flask(__name__)
+from flask import (Blueprint, Flask, Response, current_app, jsonify, make_response, redirect, request, render_template,
+                   url_for)
+from web.basic_requests import (FORECAST_DAYS, check_weather_by_location_key, forecast_day, get_location_key_by_name,
+                                get_location_key_by_coordinates, prewarm_jobs)
+from web.config import load_environment
+from web.http_client import run_async
+from web.metrics import REGISTRY, stage
+from web.prewarm import start_prewarmer
+from web.rate_limiter import require_api_keys
+from web.response_cache import (RenderedPage, canonical_query, file_fingerprint, forecast_freshness, get_page_cache,
+                                 weather_etag)
+from web.route import check_route_weather
+from web.rules import get_rule_engine
 
-@app.route('/')
+# Маршруты приложения; само приложение создает фабрика create_app
+weather = Blueprint('weather', __name__)
+
+_app = None
+_app_lock = threading.Lock()
+
+# Сообщения при недоступности API: для одной точки страница показывается с данными другой
+POINT_UNAVAILABLE = "Данные о погоде в этой точке временно недоступны."
+SERVICE_UNAVAILABLE = "Сервис погоды временно недоступен. Пожалуйста, попробуйте позже."
+
+# Статические файлы с отпечатком в URL кэшируются на год
+STATIC_MAX_AGE = 365 * 24 * 3600
+
+# Пул потоков для параллельной обработки точек маршрута создается при первом обращении
+_executor = None
+_executor_lock = threading.Lock()
+
+def request_deadline():
+    """
+    :return: Общий срок обработки одного запроса к /check-weather в секундах.
+    """
+    return float(os.getenv('WEATHER_REQUEST_DEADLINE', '15'))
+
+def form_max_age():
+    """
+    :return: Срок кэширования формы в браузере в секундах.
+    """
+    return int(os.getenv('WEATHER_FORM_MAX_AGE', '3600'))
+
+def get_executor():
+    """
+    :return: Общий пул обработки точек размером WEATHER_HANDLER_WORKERS.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=int(os.getenv('WEATHER_HANDLER_WORKERS', '16')),
+                                               thread_name_prefix='check-weather')
+    return _executor
+
+def create_app():
+    """
+    Фабрика приложения: загружает .env, проверяет наличие ключа API, регистрирует маршруты
+    и запускает фоновое обновление кэша популярных локаций. При импорте модулей ничего
+    из этого не происходит, поэтому их можно использовать в тестах и командах без ключа API.
+
+    :return: Экземпляр Flask.
+    :raises ValueError: Если ключ API не задан.
+    """
+    load_environment()
+    require_api_keys()
+    app = Flask(__name__)
+    app.register_blueprint(weather)
+    # Кэш популярных локаций обновляется в фоне до истечения свежести записей
+    start_prewarmer(prewarm_jobs(), resolve=get_location_key_by_name)
+    return app
+
+def get_app():
+    """
+    :return: Общее для процесса приложение, созданное фабрикой при первом обращении.
+    """
+    global _app
+    if _app is None:
+        with _app_lock:
+            if _app is None:
+                _app = create_app()
+    return _app
+
+def __getattr__(name):
+    # web.app.app (from web.app import app, flask --app web.app:app) создается только при обращении
+    if name == 'app':
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def resolve_location_key(address, latitude, longitude):
+    """
+    Определяет ключ локации по адресу, а если адрес не указан - по координатам.
+
+    :param address: Адрес точки (может быть пустым).
+    :param latitude: Широта точки.
+    :param longitude: Долгота точки.
+    :return: Ключ локации или None.
+    """
+    if address:
+        return get_location_key_by_name(address)
+    return get_location_key_by_coordinates(latitude, longitude)
+
+def check_weather_for_point(address, latitude, longitude, day=0):
+    """
+    Определяет ключ локации точки и проверяет погоду в ней.
+
+    :param day: Номер дня прогноза (0 - сегодня).
+    :return: Запись WeatherReport с оценкой погоды.
+    """
+    with stage('resolve_location'):
+        location_key = resolve_location_key(address, latitude, longitude)
+    # Проверяем, удалось ли получить ключ локации
+    if not location_key:
+        raise ValueError("Ошибка: недостаточно данных для определения координат начала или конца маршрута.")
+    with stage('check_weather'):
+        return check_weather_by_location_key(location_key, day)
+
+async def check_weather_for_point_async(address, latitude, longitude, day=0):
+    """
+    Асинхронный вариант check_weather_for_point.
+
+    :return: Запись WeatherReport с оценкой погоды.
+    """
+    # Асинхронный путь и httpx загружаются только при первом асинхронном запросе
+    from web import async_requests
+
+    if address:
+        location_key = await async_requests.get_location_key_by_name(address)
+    else:
+        location_key = await async_requests.get_location_key_by_coordinates(latitude, longitude)
+    if not location_key:
+        raise ValueError("Ошибка: недостаточно данных для определения координат начала или конца маршрута.")
+    return await async_requests.check_weather_by_location_key(location_key, day)
+
+async def check_route_points_async(start_point, end_point, day=0):
+    """
+    Проверяет погоду в обеих точках одновременно.
+
+    :return: Пара результатов (данные о погоде или исключение).
+    """
+    return await asyncio.gather(check_weather_for_point_async(*start_point, day),
+                                check_weather_for_point_async(*end_point, day), return_exceptions=True)
+
+def partial_result(outcome):
+    """
+    Разделяет результат обработки точки на данные о погоде и сообщение об ошибке.
+    Ошибки API (RuntimeError, в том числе разомкнутый предохранитель и превышение лимита)
+    не прерывают обработку маршрута, остальные исключения пробрасываются.
+
+    :param outcome: Запись WeatherReport или исключение.
+    :return: Пара (запись WeatherReport или None, сообщение об ошибке или None).
+    """
+    if isinstance(outcome, RuntimeError):
+        print(f"Ошибка при получении данных о погоде: {outcome}")
+        return None, POINT_UNAVAILABLE
+    if isinstance(outcome, BaseException):
+        raise outcome
+    return outcome, None
+
+def render_result(start, end, day=0, points=None):
+    """
+    Отображает результаты обеих точек; если API недоступен для обеих, показывает ошибку.
+
+    :param start: Результат partial_result для начальной точки.
+    :param end: Результат partial_result для конечной точки.
+    :param day: Номер дня прогноза.
+    :param points: Пара исходных точек; если задана, на странице есть ссылки на прогноз
+                   для тех же точек на другие дни.
+    :return: HTML-страница с результатами.
+    """
+    (start_weather, start_error), (end_weather, end_error) = start, end
+    if start_error and end_error:
+        return render_template('result.html', error=SERVICE_UNAVAILABLE)
+    day_links = []
+    if points is not None:
+        day_links = [(d, f"{url_for('weather.check_weather_page')}?{canonical_query(*points, d)}")
+                     for d in range(FORECAST_DAYS)]
+    return render_template('result.html', start_weather=start_weather, end_weather=end_weather,
+                           start_error=start_error, end_error=end_error, error=None,
+                           day=day, day_links=day_links)
+
+def read_route_points(values=None):
+    """
+    Читает адреса и координаты начальной и конечной точек маршрута и номер дня прогноза.
+
+    :param values: Параметры запроса (request.args); по умолчанию данные формы.
+    :return: Кортеж (начальная точка, конечная точка, номер дня), точки - кортежи (адрес, широта, долгота).
+    :raises ValueError: Если номер дня некорректен.
+    """
+    values = request.form if values is None else values
+    start_point = (values.get('start_address'), values.get('start_latitude'), values.get('start_longitude'))
+    end_point = (values.get('end_address'), values.get('end_latitude'), values.get('end_longitude'))
+    return start_point, end_point, forecast_day(values.get('day'))
+
+def remaining(deadline):
+    return max(deadline - time.monotonic(), 0)
+
+def future_outcome(future, deadline):
+    """
+    :return: Результат future или исключение, которым оно завершилось.
+    :raises concurrent.futures.TimeoutError: Если future не завершилось к сроку deadline.
+    """
+    return future.exception(timeout=remaining(deadline)) or future.result()
+
+def in_stage(name, function, *args):
+    """
+    Выполняет function(*args) как этап обработки запроса name (см. web.metrics.stage);
+    функцию можно передать в пул потоков, как и при обработке POST-запроса.
+    """
+    with stage(name):
+        return function(*args)
+
+def resolve_route_keys(start_point, end_point, deadline):
+    """
+    Определяет ключи локаций обеих точек параллельно.
+
+    :return: Пара, где для каждой точки ключ локации или исключение, если API недоступен.
+    :raises ValueError: Если местоположение точки определить не удалось.
+    """
+    futures = [get_executor().submit(in_stage, 'resolve_location', resolve_location_key, *point)
+               for point in (start_point, end_point)]
+    keys = tuple(future_outcome(future, deadline) for future in futures)
+    if not all(keys):
+        raise ValueError("Ошибка: недостаточно данных для определения координат начала или конца маршрута.")
+    return keys
+
+def check_route_keys(keys, day, deadline):
+    """
+    Проверяет погоду для уже определенных ключей локаций параллельно; для точки,
+    ключ которой не удалось получить, результатом становится ошибка определения ключа.
+
+    :return: Список результатов partial_result в порядке ключей.
+    """
+    futures = [key if isinstance(key, BaseException)
+               else get_executor().submit(in_stage, 'check_weather', check_weather_by_location_key, key, day)
+               for key in keys]
+    return [partial_result(future if isinstance(future, BaseException) else future_outcome(future, deadline))
+            for future in futures]
+
+def result_version(kind):
+    # Изменение шаблона страницы меняет ETag, даже если прогноз тот же
+    if kind == 'html':
+        return file_fingerprint(os.path.join(current_app.root_path, current_app.template_folder, 'result.html')) or ''
+    return ''
+
+def cacheable_response(page, max_age):
+    """
+    Отдает готовый ответ с ETag и Cache-Control; если ETag совпадает с If-None-Match, отдает 304 без тела.
+
+    :param page: Запись RenderedPage (тело может отсутствовать, если клиент уже имеет актуальную версию).
+    :param max_age: Срок свежести ответа в секундах.
+    """
+    if request.if_none_match.contains(page.etag):
+        response = Response(status=304)
+    else:
+        response = Response(page.body, mimetype=page.mimetype)
+    response.set_etag(page.etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    if not max_age:
+        # Прогноз уже обновляется: ответ можно хранить, но перед показом его нужно перепроверить
+        response.cache_control.no_cache = True
+    return response
+
+def cached_check_weather(kind, render):
+    """
+    GET-вариант проверки погоды с кэшированием ответа.
+
+    Неканонические параметры перенаправляются на канонический URL. После определения ключей
+    локаций ответ берется из кэша готовых ответов по каноническим параметрам, паре ключей и дню;
+    при промахе погода проверяется, и если клиент уже имеет ответ с тем же ETag, отдается 304
+    без отрисовки.
+    Ответ с ошибкой одной из точек не кэшируется.
+
+    :param kind: Вид ответа ('html' или 'json').
+    :param render: Функция render(start, end, day, points), возвращающая Response.
+    :return: Response.
+    """
+    start_point, end_point, day = read_route_points(request.args)
+    query = canonical_query(start_point, end_point, day)
+    if request.query_string.decode('utf-8', 'replace') != query:
+        # url_for учитывает SCRIPT_NAME, если приложение смонтировано не в корне сайта
+        return redirect(f"{url_for(request.endpoint)}?{query}", code=301)
+
+    deadline = time.monotonic() + request_deadline()
+    keys = resolve_route_keys(start_point, end_point, deadline)
+    # Ссылки на другие дни на странице строятся из адресов запроса, поэтому они входят в ключ кэша
+    cache_key = (kind, query, *keys, day)
+    # Если ключ точки не получен из-за недоступности API, ответ частичный и в кэш не попадает
+    page = None if any(isinstance(key, BaseException) for key in keys) else get_page_cache().get(cache_key)
+    if page is not None:
+        return cacheable_response(page, max(int(page.expires_at - time.time()), 0))
+
+    start, end = check_route_keys(keys, day, deadline)
+    if start[1] or end[1]:
+        response = render(start, end, day, (start_point, end_point))
+        response.cache_control.no_store = True
+        return response
+
+    max_age = forecast_freshness(keys)
+    etag = weather_etag(kind, day, (start[0], end[0]), get_rule_engine().rules, result_version(kind))
+    if request.if_none_match.contains(etag):
+        return cacheable_response(RenderedPage(etag, b'', '', 0.0), max_age)
+    response = render(start, end, day, (start_point, end_point))
+    page = RenderedPage(etag, response.get_data(), response.mimetype, time.time() + max_age)
+    if max_age:
+        get_page_cache().set(cache_key, page, ttl=max_age)
+    return cacheable_response(page, max_age)
+
+@weather.route('/')
 def form():
     """
     Отображает форму для ввода данных о местоположении.
 
     :return: HTML-страница с формой для ввода адресов.
     """
-    return render_template('form.html')  # Возвращаем шаблон формы
+    response = make_response(render_template('form.html', days=FORECAST_DAYS))  # Возвращаем шаблон формы
+    response.cache_control.public = True
+    response.cache_control.max_age = form_max_age()
+    response.add_etag()
+    return response.make_conditional(request)
+
+@weather.app_url_defaults
+def add_static_fingerprint(endpoint, values):
+    # Отпечаток содержимого в URL статического файла меняется при каждом изменении файла
+    if endpoint == 'static' and 'filename' in values:
+        fingerprint = file_fingerprint(os.path.join(current_app.static_folder, values['filename']))
+        if fingerprint:
+            values['v'] = fingerprint
+
+@weather.after_app_request
+def static_cache_headers(response):
+    # Файл по URL с актуальным отпечатком не меняется, поэтому браузер может хранить его без перепроверки
+    if request.endpoint == 'static' and response.status_code == 200:
+        fingerprint = file_fingerprint(os.path.join(current_app.static_folder, request.view_args['filename']))
+        if fingerprint and request.args.get('v') == fingerprint:
+            response.cache_control.public = True
+            response.cache_control.max_age = STATIC_MAX_AGE
+            response.cache_control.immutable = True
+    return response
 
-@app.route('/check-weather', methods=['POST'])
+@weather.route('/check-weather', methods=['POST'])
 def check_weather():
     """
     Обрабатывает запрос на проверку погоды по введенным адресам.
 
     :return: HTML-страница с результатами проверки погоды или сообщение об ошибке.
     """
+    with stage('check_weather_request'):
+        return _check_weather()
+
+def _check_weather():
     try:
-        # Получаем данные из формы о начальной точке
-        start_address = request.form.get('start_address')  # Адрес начала маршрута
-        if start_address:
-            # Если адрес указан, получаем ключ локации по имени
-            start_lk = get_location_key_by_name(start_address)
-        else:
-            # Если адрес не указан, пытаемся получить координаты
-            start_latitude = request.form.get('start_latitude')
-            start_longitude = request.form.get('start_longitude')
-            start_lk = get_location_key_by_coordinates(start_latitude, start_longitude)
-
-        # Получаем данные из формы о конечной точке
-        end_address = request.form.get('end_address')  # Адрес конца маршрута
-        if end_address:
-            # Если адрес указан, получаем ключ локации по имени
-            end_lk = get_location_key_by_name(end_address)
-        else:
-            # Если адрес не указан, пытаемся получить координаты
-            end_latitude = request.form.get('end_latitude')
-            end_longitude = request.form.get('end_longitude')
-            end_lk = get_location_key_by_coordinates(end_latitude, end_longitude)
-
-        # Проверяем, удалось ли получить ключи локаций
-        if not end_lk or not start_lk:
-            raise ValueError("Ошибка: недостаточно данных для определения координат начала или конца маршрута.")
-
-        # Проверяем погоду на начальной и конечной точках
-        start_weather = check_weather_by_location_key(start_lk)
-        end_weather = check_weather_by_location_key(end_lk)
+        # Данные формы читаем в потоке запроса: в пуле потоков контекст запроса Flask недоступен
+        start_point, end_point, day = read_route_points()
+
+        # Обе точки обрабатываются параллельно, общее время ограничено сроком WEATHER_REQUEST_DEADLINE
+        deadline = time.monotonic() + request_deadline()
+        executor = get_executor()
+        start_future = executor.submit(check_weather_for_point, *start_point, day)
+        end_future = executor.submit(check_weather_for_point, *end_point, day)
+
+        start = partial_result(future_outcome(start_future, deadline))
+        end = partial_result(future_outcome(end_future, deadline))
 
         # Отображаем результаты на странице
-        return render_template('result.html', start_weather=start_weather, end_weather=end_weather, error=None)
+        with stage('render'):
+            return render_result(start, end, day, (start_point, end_point))
+
+    except FuturesTimeoutError:
+        error_message = "Сервис погоды не ответил вовремя. Пожалуйста, попробуйте позже."
+        return render_template('result.html', error=error_message)
 
     except ValueError as e:
         # Безопасное сообщение об ошибке для пользователя
@@ -65,6 +388,132 @@ def check_weather():
         error_message = "Произошла ошибка при обработке запроса. Пожалуйста, попробуйте снова."
         return render_template('result.html', error=error_message)
 
+def uncached(body, status=200):
+    response = make_response(body, status)
+    response.cache_control.no_store = True
+    return response
+
+def render_result_response(start, end, day, points):
+    with stage('render'):
+        return make_response(render_result(start, end, day, points))
+
+def json_result_response(start, end, day, points):
+    (start_weather, start_error), (end_weather, end_error) = start, end
+    if start_error and end_error:
+        return make_response(jsonify(error=SERVICE_UNAVAILABLE), 503)
+    return jsonify(day=day, start=start_weather, end=end_weather, start_error=start_error, end_error=end_error)
+
+@weather.route('/check-weather', methods=['GET'])
+def check_weather_page():
+    """
+    GET-вариант /check-weather с каноническими параметрами start_address (или start_latitude
+    и start_longitude), end_address (или end_latitude и end_longitude) и day. Ответ можно
+    кэшировать: он содержит ETag и Cache-Control по свежести прогноза и поддерживает If-None-Match.
+
+    :return: HTML-страница с результатами проверки погоды, 304 или перенаправление на канонический URL.
+    """
+    with stage('check_weather_request'):
+        try:
+            return cached_check_weather('html', render_result_response)
+
+        except FuturesTimeoutError:
+            return uncached(render_template(
+                'result.html', error="Сервис погоды не ответил вовремя. Пожалуйста, попробуйте позже."))
+
+        except ValueError as e:
+            return uncached(render_template('result.html', error=str(e)))
+
+        except Exception as e:
+            print(f"Неожиданная ошибка: {e}")
+            return uncached(render_template(
+                'result.html', error="Произошла ошибка при обработке запроса. Пожалуйста, попробуйте снова."))
+
+@weather.route('/api/check-weather', methods=['GET'])
+def check_weather_json():
+    """
+    JSON-вариант GET /check-weather с теми же параметрами и кэшированием.
+
+    :return: JSON с оценкой погоды в обеих точках, 304 или перенаправление на канонический URL.
+    """
+    with stage('check_weather_request'):
+        try:
+            return cached_check_weather('json', json_result_response)
+
+        except FuturesTimeoutError:
+            return uncached(jsonify(error="Сервис погоды не ответил вовремя. Пожалуйста, попробуйте позже."), 504)
+
+        except ValueError as e:
+            return uncached(jsonify(error=str(e)), 400)
+
+        except Exception as e:
+            print(f"Неожиданная ошибка: {e}")
+            return uncached(jsonify(error="Произошла ошибка при обработке запроса. Пожалуйста, попробуйте снова."),
+                            500)
+
+@weather.route('/check-weather-async', methods=['POST'])
+async def check_weather_async():
+    """
+    Асинхронный вариант /check-weather: все запросы к API выполняются в одном цикле событий без пула потоков.
+
+    :return: HTML-страница с результатами проверки погоды или сообщение об ошибке.
+    """
+    try:
+        start_point, end_point, day = read_route_points()
+        # Запросы к API выполняются в общем цикле событий с одним клиентом и пулом соединений
+        start, end = await asyncio.wait_for(run_async(check_route_points_async(start_point, end_point, day)),
+                                            timeout=request_deadline())
+
+        return render_result(partial_result(start), partial_result(end), day, (start_point, end_point))
+
+    except TimeoutError:
+        error_message = "Сервис погоды не ответил вовремя. Пожалуйста, попробуйте позже."
+        return render_template('result.html', error=error_message)
+
+    except ValueError as e:
+        error_message = str(e)
+        return render_template('result.html', error=error_message)
+
+    except Exception as e:
+        print(f"Неожиданная ошибка: {e}")
+        error_message = "Произошла ошибка при обработке запроса. Пожалуйста, попробуйте снова."
+        return render_template('result.html', error=error_message)
+
+@weather.route('/api/route-weather', methods=['POST'])
+def route_weather():
+    """
+    Проверяет погоду во всех точках маршрута из JSON-запроса вида
+    {"waypoints": ["Москва", {"latitude": 56.86, "longitude": 35.9}, ...], "day": 2};
+    day - номер дня прогноза (0 - сегодня, по умолчанию).
+
+    :return: JSON со сводкой по каждой точке и общим выводом по маршруту.
+    """
+    payload = request.get_json(silent=True) or {}
+    if not isinstance(payload, dict):
+        return jsonify(error="Тело запроса должно быть JSON-объектом с полем waypoints."), 400
+    try:
+        result = check_route_weather(payload.get('waypoints'), deadline=time.monotonic() + request_deadline(),
+                                     day=forecast_day(payload.get('day')))
+        return jsonify(result)
+
+    except FuturesTimeoutError:
+        return jsonify(error="Сервис погоды не ответил вовремя. Пожалуйста, попробуйте позже."), 504
+
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+
+    except Exception as e:
+        print(f"Неожиданная ошибка: {e}")
+        return jsonify(error="Произошла ошибка при обработке запроса. Пожалуйста, попробуйте снова."), 500
+
+@weather.route('/metrics')
+def metrics():
+    """
+    Отдает метрики приложения в текстовом формате Prometheus.
+
+    :return: Текст метрик.
+    """
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
 if __name__ == '__main__':
-    app.run()
+    create_app().run()
 
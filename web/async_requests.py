@@ -0,0 +1,123 @@
+import asyncio
+
+import httpx
+
+from web import http_client
+from web.basic_requests import (FORECAST_DAYS, current_conditions_params, forecast_for_day, forecast_params,
+                                forecast_series_ttl, index_location, parse_current_temperature, parse_forecast_series,
+                                summarize_weather)
+from web.circuit_breaker import CircuitOpenError
+from web.forecast_cache import current_conditions_ttl, get_forecast_cache
+from web.geo_index import get_geo_index
+from web.location_cache import coordinates_cache_key, get_location_cache, name_cache_key
+from web.prewarm import record_location
+from web.rate_limiter import RateLimitExceeded, current_priority
+from web.singleflight import AsyncSingleFlight
+
+# Асинхронные аналоги функций из basic_requests: разбор ответов и кэш ключей локаций общие,
+# а запросы выполняются через общий httpx.AsyncClient без блокировки потоков.
+
+_flights = AsyncSingleFlight()
+
+async def get_location_key_by_coordinates(latitude, longitude):
+    cache_key = coordinates_cache_key(latitude, longitude)
+    if cache_key is not None:
+        location_key = get_location_cache().get(cache_key)
+        if location_key is not None:
+            return location_key
+
+    location_key = get_geo_index().lookup(latitude, longitude)
+    if location_key is None:
+        try:
+            response = await http_client.async_get('/locations/v1/cities/geoposition/search',
+                                                   {'q': f"{latitude},{longitude}"})
+            response.raise_for_status()
+            data = response.json()
+            location_key = data['Key']
+        except (CircuitOpenError, RateLimitExceeded):
+            raise
+        except Exception as e:
+            print(f"Ошибка при получении ключа локации по координатам: {e}")
+            return None
+        index_location(data, latitude, longitude)
+
+    if cache_key is not None:
+        get_location_cache().set(cache_key, location_key)
+    return location_key
+
+async def get_location_key_by_name(address):
+    cache_key = name_cache_key(address)
+    location_key = get_location_cache().get(cache_key)
+    if location_key is not None:
+        return location_key
+
+    try:
+        response = await http_client.async_get('/locations/v1/cities/autocomplete',
+                                               {'q': address.strip(), 'language': 'ru'})
+        response.raise_for_status()
+        data = response.json()
+        location_key = data[0]['Key'] if data else None
+    except (CircuitOpenError, RateLimitExceeded):
+        raise
+    except Exception as e:
+        print(f"Ошибка при получении ключа локации для адреса {address}: {e}")
+        return None
+
+    if location_key is not None:
+        get_location_cache().set(cache_key, location_key)
+    return location_key
+
+async def _fetch_shared(endpoint, fetch, location_key):
+    # Приоритет входит в ключ по той же причине, что и в web.basic_requests._fetch_shared
+    return await _flights.do((endpoint, location_key, current_priority()), fetch, location_key)
+
+async def get_current_temperature_by_location_key(location_key):
+    return await get_forecast_cache().get_or_fetch_async(('currentconditions', location_key), current_conditions_ttl(),
+                                                         _fetch_shared, 'currentconditions',
+                                                         _fetch_current_temperature, location_key)
+
+async def _fetch_current_temperature(location_key):
+    try:
+        response = await http_client.async_get(f'/currentconditions/v1/{location_key}', current_conditions_params())
+        response.raise_for_status()
+        return parse_current_temperature(response.json(), location_key)
+    except (CircuitOpenError, RateLimitExceeded):
+        raise
+    except Exception as e:
+        raise RuntimeError(f"Ошибка при получении текущей температуры: {e}")
+
+async def get_forecast_series_by_location_key(location_key):
+    return await get_forecast_cache().get_or_fetch_async(('forecast', location_key), forecast_series_ttl,
+                                                         _fetch_shared, 'forecast', _fetch_forecast_series,
+                                                         location_key)
+
+async def get_current_conditions_by_location_key(location_key, day=0):
+    return forecast_for_day(await get_forecast_series_by_location_key(location_key), day)
+
+async def _fetch_forecast_series(location_key):
+    try:
+        response = await http_client.async_get(f'/forecasts/v1/daily/{FORECAST_DAYS}day/{location_key}',
+                                               forecast_params())
+        response.raise_for_status()
+        return parse_forecast_series(response.json(), location_key)
+    except httpx.HTTPError as e:
+        raise RuntimeError(f"Ошибка сети: {e}")
+    except (KeyError, IndexError) as e:
+        raise RuntimeError(f"Ошибка доступа к данным: {e}")
+
+async def check_weather_by_location_key(lk, day=0):
+    if lk is None:
+        raise ValueError("Невозможно получить данные для указанного местоположения. Пожалуйста, проверьте введенные данные.")
+
+    record_location(lk)
+
+    try:
+        current_temperature_result, current_conditions_result = await asyncio.gather(
+            get_current_temperature_by_location_key(lk),
+            get_current_conditions_by_location_key(lk, day),
+        )
+        return summarize_weather(current_temperature_result, current_conditions_result)
+
+    except Exception as e:
+        print(f"Ошибка при получении данных о погоде: {e}")
+        raise
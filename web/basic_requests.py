@@ -1,107 +1,323 @@
 import requests
-from dotenv import load_dotenv
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
-# Загружаем переменные окружения для доступа к API
-load_dotenv()
-API_KEY = os.getenv('WEATHER_API_KEY')
+from web import http_client
+from web.circuit_breaker import CircuitOpenError
+from web.config import load_environment
+from web.forecast_cache import current_conditions_ttl, forecast_ttl, get_forecast_cache
+from web.geo_index import get_geo_index, location_position
+from web.location_cache import coordinates_cache_key, get_location_cache, name_cache_key
+from web.metrics import REGISTRY
+from web.prewarm import record_location
+from web.rate_limiter import RateLimitExceeded, current_priority
+from web.records import CurrentConditions, DailyForecast, ForecastSeries
+from web.rules import FAVORABLE_SUMMARY, UNFAVORABLE_SUMMARY, get_rule_engine
+from web.singleflight import SingleFlight
 
-if not API_KEY:
-    raise ValueError("API ключ не установлен. Пожалуйста, проверьте ваш .env файл.")
+# Число дней прогноза, получаемых одним запросом для локации
+FORECAST_DAYS = 5
+
+# Пул для параллельных запросов текущей погоды и прогноза по одной локации создается при первом обращении
+_fetch_executor = None
+_fetch_executor_lock = threading.Lock()
+
+# Одновременные запросы погоды для одной и той же локации объединяются в один запрос к API
+_flights = SingleFlight()
+REGISTRY.add_collector(lambda: [('weather_upstream_coalesced_total', 'counter',
+                                 "Запросы к API, объединенные с уже выполняющимися", {(): _flights.shared})])
+
+def get_fetch_executor():
+    """
+    :return: Общий пул запросов погоды размером WEATHER_FETCH_WORKERS.
+    """
+    global _fetch_executor
+    if _fetch_executor is None:
+        with _fetch_executor_lock:
+            if _fetch_executor is None:
+                _fetch_executor = ThreadPoolExecutor(max_workers=int(os.getenv('WEATHER_FETCH_WORKERS', '32')),
+                                                     thread_name_prefix='weather-fetch')
+    return _fetch_executor
 
 def get_location_key_by_coordinates(latitude, longitude):
+    # Близкие точки попадают в одну ячейку кэша благодаря округлению координат
+    cache_key = coordinates_cache_key(latitude, longitude)
+    if cache_key is not None:
+        location_key = get_location_cache().get(cache_key)
+        if location_key is not None:
+            return location_key
+
+    # Точки рядом с уже известной локацией определяются по локальному геоиндексу без запроса к API
+    location_key = get_geo_index().lookup(latitude, longitude)
+    if location_key is None:
+        location_key = _fetch_location_key_by_coordinates(latitude, longitude)
+    if location_key is not None and cache_key is not None:
+        get_location_cache().set(cache_key, location_key)
+    return location_key
+
+def _fetch_location_key_by_coordinates(latitude, longitude):
     try:
-        url = f"http://dataservice.accuweather.com/locations/v1/cities/geoposition/search?apikey={API_KEY}&q={latitude},{longitude}"
-        response = requests.get(url)
+        response = http_client.get('/locations/v1/cities/geoposition/search',
+                                   {'q': f"{latitude},{longitude}"})
         response.raise_for_status()
         data = response.json()
-        return data['Key']
+        location_key = data['Key']
+    except (CircuitOpenError, RateLimitExceeded):
+        # Недоступность API и исчерпание лимита - не ошибка ввода: вызывающий код показывает
+        # частичный результат, а пакетная проверка повторяет точку или останавливается
+        raise
     except Exception as e:
         print(f"Ошибка при получении ключа локации по координатам: {e}")
         return None
+    index_location(data, latitude, longitude)
+    return location_key
+
+def index_location(data, latitude, longitude):
+    """
+    Добавляет локацию из ответа API в геоиндекс; ошибка индекса не мешает обработке запроса.
+    """
+    try:
+        get_geo_index().add(*location_position(data, latitude, longitude), data['Key'], data.get('LocalizedName'))
+    except Exception as e:
+        print(f"Ошибка при добавлении локации в геоиндекс: {e}")
 
 def get_location_key_by_name(address):
+    cache_key = name_cache_key(address)
+    location_key = get_location_cache().get(cache_key)
+    if location_key is not None:
+        return location_key
+
+    location_key = _fetch_location_key_by_name(address)
+    if location_key is not None:
+        get_location_cache().set(cache_key, location_key)
+    return location_key
+
+def _fetch_location_key_by_name(address):
     try:
-        url = f"http://dataservice.accuweather.com/locations/v1/cities/autocomplete?apikey={API_KEY}&q={address}&language=ru"
-        response = requests.get(url)
+        response = http_client.get('/locations/v1/cities/autocomplete',
+                                   {'q': address.strip(), 'language': 'ru'})
         response.raise_for_status()
         data = response.json()
         return data[0]['Key'] if data else None
+    except (CircuitOpenError, RateLimitExceeded):
+        raise
     except Exception as e:
         print(f"Ошибка при получении ключа локации для адреса {address}: {e}")
         return None
 
+def lean_fetch_enabled():
+    """
+    Экономный режим запросов (включен по умолчанию, отключается WEATHER_LEAN_FETCH=0):
+    текущая погода запрашивается без details, а прогноз сразу в метрических единицах.
+    """
+    return os.getenv('WEATHER_LEAN_FETCH', '1') != '0'
+
+def current_conditions_params():
+    params = {'language': 'ru'}
+    # Из текущей погоды используются только температура и описание, они есть и без details
+    if not lean_fetch_enabled():
+        params['details'] = 'true'
+    return params
+
+def forecast_params():
+    # Ветер и вероятность осадков в дневном прогнозе приходят только с details=true
+    params = {'language': 'ru', 'details': 'true'}
+    if lean_fetch_enabled():
+        params['metric'] = 'true'
+    return params
+
+def _fetch_shared(endpoint, fetch, location_key):
+    # Приоритет входит в ключ: иначе промах кэша пользователя, присоединившись к фоновому обновлению,
+    # получил бы отказ ограничителя, выданный фоновому запросу из-за резерва для пользователей
+    return _flights.do((endpoint, location_key, current_priority()), fetch, location_key)
+
+def prewarm_jobs():
+    """
+    :return: Записи кэша, которые планировщик обновляет для популярных локаций: (endpoint, функция TTL, fetch).
+    """
+    return [
+        ('currentconditions', current_conditions_ttl,
+         partial(_fetch_shared, 'currentconditions', _fetch_current_temperature)),
+        # Свежесть ряда прогноза зависит от самого ряда, поэтому TTL - функция от полученного значения
+        ('forecast', lambda: forecast_series_ttl, partial(_fetch_shared, 'forecast', _fetch_forecast_series)),
+    ]
+
 def get_current_temperature_by_location_key(location_key):
+    # Результат берется из кэша с фоновым обновлением, промахи объединяются в один запрос к API
+    return get_forecast_cache().get_or_fetch(('currentconditions', location_key), current_conditions_ttl(),
+                                             _fetch_shared, 'currentconditions', _fetch_current_temperature,
+                                             location_key)
+
+def _fetch_current_temperature(location_key):
     try:
-        url = f"http://dataservice.accuweather.com/currentconditions/v1/{location_key}?apikey={API_KEY}&language=ru&details=True"
-        response = requests.get(url)
+        response = http_client.get(f'/currentconditions/v1/{location_key}', current_conditions_params())
         response.raise_for_status()
-        data = response.json()
-        return data[0]['Temperature']['Metric']['Value'], data[0]['WeatherText'] if data else (None, None)
+        return parse_current_temperature(response.json(), location_key)
+    except (CircuitOpenError, RateLimitExceeded):
+        raise
     except Exception as e:
         raise RuntimeError(f"Ошибка при получении текущей температуры: {e}")
 
-def get_current_conditions_by_location_key(location_key):
+def parse_current_temperature(data, location_key=None):
+    # Пустой ответ приводит к IndexError, который обрабатывает вызывающий код
+    current = data[0]
+    return CurrentConditions(location_key, time.time(), current['Temperature']['Metric']['Value'],
+                             current['WeatherText'])
+
+def forecast_day(value):
+    """
+    Приводит номер дня прогноза из формы или JSON-запроса к числу.
+
+    :param value: Номер дня (0 - сегодня); пустое значение означает сегодня.
+    :return: Номер дня от 0 до FORECAST_DAYS - 1.
+    :raises ValueError: Если номер дня некорректен.
+    """
+    if value is None or value == '':
+        return 0
     try:
-        url = f"http://dataservice.accuweather.com/forecasts/v1/daily/1day/{location_key}?apikey={API_KEY}&language=ru&details=true"
-        response = requests.get(url)
+        day = int(value)
+    except (TypeError, ValueError):
+        day = -1
+    if not 0 <= day < FORECAST_DAYS:
+        raise ValueError(f"Номер дня прогноза должен быть от 0 до {FORECAST_DAYS - 1}.")
+    return day
+
+def forecast_series_ttl(series):
+    """
+    Ряд прогноза свеж в течение WEATHER_FORECAST_TTL, но не дольше начала следующего дня,
+    когда AccuWeather сдвигает прогноз; если даты дней неизвестны, действует только WEATHER_FORECAST_TTL.
+
+    :param series: Запись ForecastSeries.
+    :return: Время свежести ряда в секундах.
+    """
+    rollover = series.next_rollover()
+    if rollover is None:
+        return forecast_ttl()
+    return min(forecast_ttl(), rollover - series.fetched_at)
+
+def get_forecast_series_by_location_key(location_key):
+    # Один запрос дает прогноз на FORECAST_DAYS дней, все дни берутся из одной записи кэша
+    return get_forecast_cache().get_or_fetch(('forecast', location_key), forecast_series_ttl,
+                                             _fetch_shared, 'forecast', _fetch_forecast_series, location_key)
+
+def get_current_conditions_by_location_key(location_key, day=0):
+    return forecast_for_day(get_forecast_series_by_location_key(location_key), day)
+
+def forecast_for_day(series, day):
+    """
+    :param series: Запись ForecastSeries или None.
+    :param day: Номер дня прогноза (0 - сегодня).
+    :return: Запись DailyForecast или None, если прогноза нет.
+    :raises ValueError: Если выбранного дня нет в ряду прогноза.
+    """
+    if series is None:
+        return None
+    forecast = series.day(day)
+    if forecast is None:
+        raise ValueError("Прогноз на выбранный день недоступен.")
+    return forecast
+
+def _fetch_forecast_series(location_key):
+    try:
+        response = http_client.get(f'/forecasts/v1/daily/{FORECAST_DAYS}day/{location_key}', forecast_params())
         response.raise_for_status()
-        data = response.json()
-        if 'DailyForecasts' in data and data['DailyForecasts']:
-            min_temperature = round(5/9 * (data['DailyForecasts'][0]['Temperature']['Minimum']['Value'] - 32), 2)
-            max_temperature = round(5/9 * (data['DailyForecasts'][0]['Temperature']['Maximum']['Value'] - 32), 2)
-            wind_speed = round(data['DailyForecasts'][0]['Day']['Wind']['Speed']['Value'] * 1.61, 2)
-            precipitation_probability = data['DailyForecasts'][0]['Day']['PrecipitationProbability']
-            return min_temperature, max_temperature, wind_speed, precipitation_probability
-        else:
-            return None
+        return parse_forecast_series(response.json(), location_key)
     except requests.exceptions.RequestException as e:
         raise RuntimeError(f"Ошибка сети: {e}")
     except (KeyError, IndexError) as e:
         raise RuntimeError(f"Ошибка доступа к данным: {e}")
 
-def check_weather_by_location_key(lk):
+def _to_celsius(temperature):
+    # В метрическом режиме API уже возвращает градусы Цельсия
+    if temperature.get('Unit') == 'C':
+        return temperature['Value']
+    return round(5/9 * (temperature['Value'] - 32), 2)
+
+def _to_kmh(speed):
+    if speed.get('Unit') == 'km/h':
+        return speed['Value']
+    return round(speed['Value'] * 1.61, 2)
+
+def _parse_day(forecast, location_key, fetched_at):
+    day = forecast['Day']
+    return DailyForecast(
+        location_key=location_key,
+        fetched_at=fetched_at,
+        min_temperature=_to_celsius(forecast['Temperature']['Minimum']),
+        max_temperature=_to_celsius(forecast['Temperature']['Maximum']),
+        wind_speed=_to_kmh(day['Wind']['Speed']),
+        precipitation_probability=day['PrecipitationProbability'],
+        # Date приходит в виде 2024-10-18T07:00:00+03:00, для отображения нужна только дата
+        date=forecast['Date'][:10] if forecast.get('Date') else None,
+    )
+
+def parse_forecast_series(data, location_key=None):
+    """
+    :param data: Ответ /forecasts/v1/daily/{N}day.
+    :return: Запись ForecastSeries или None, если в ответе нет дней прогноза.
+    """
+    if not data.get('DailyForecasts'):
+        return None
+    fetched_at = time.time()
+    forecasts = data['DailyForecasts']
+    epochs = tuple(forecast['EpochDate'] for forecast in forecasts) \
+        if all('EpochDate' in forecast for forecast in forecasts) else ()
+    return ForecastSeries(location_key, fetched_at,
+                          tuple(_parse_day(forecast, location_key, fetched_at) for forecast in forecasts), epochs)
+
+def check_weather_by_location_key(lk, day=0):
+    return summarize_forecast(get_weather_by_location_key(lk, day))
+
+def get_weather_by_location_key(lk, day=0):
+    """
+    Получает текущую погоду и дневной прогноз для локации.
+
+    :param lk: Ключ локации.
+    :param day: Номер дня прогноза (0 - сегодня, не больше FORECAST_DAYS - 1).
+    :return: Запись DailyForecast для оценки погоды.
+    """
     if lk is None:
         raise ValueError("Невозможно получить данные для указанного местоположения. Пожалуйста, проверьте введенные данные.")
 
+    # Популярные локации планировщик обновляет в кэше заранее
+    record_location(lk)
+
     try:
-        current_temperature_result = get_current_temperature_by_location_key(lk)
-        if current_temperature_result is None:
-            raise ValueError("Не удалось получить текущую температуру.")
-
-        current_conditions_result = get_current_conditions_by_location_key(lk)
-        if current_conditions_result is None:
-            raise ValueError("Не удалось получить текущие погодные условия.")
-
-        min_temperature, max_temperature, wind_speed, precipitation_probability = current_conditions_result
-
-        data = {
-            "min_temperature": min_temperature,
-            "max_temperature": max_temperature,
-            "wind_speed": wind_speed,
-            "precipitation_probability": precipitation_probability,
-            "temperature_summary": None,
-            "wind_summary": None,
-            "precipitation_summary": None,
-            "weather_summary": 'Погода неблагоприятная',
-        }
-
-        if min_temperature < 0 or max_temperature > 35:
-            data['temperature_summary'] = "Температура неблагоприятная"
-        elif wind_speed > 50:
-            data['wind_summary'] = "Сильный ветер"
-        elif precipitation_probability > 70:
-            data['precipitation_summary'] = "Высокая вероятность осадков"
-        else:
-            data['weather_summary'] = "Погода благоприятная"
-
-        return data
+        # Оба запроса независимы, поэтому выполняем их одновременно
+        executor = get_fetch_executor()
+        temperature_future = executor.submit(get_current_temperature_by_location_key, lk)
+        conditions_future = executor.submit(get_current_conditions_by_location_key, lk, day)
+
+        return validate_weather(temperature_future.result(), conditions_future.result())
 
     except Exception as e:
         print(f"Ошибка при получении данных о погоде: {e}")
         raise
 
+def validate_weather(current_temperature_result, current_conditions_result):
+    if current_temperature_result is None:
+        raise ValueError("Не удалось получить текущую температуру.")
+    if current_conditions_result is None:
+        raise ValueError("Не удалось получить текущие погодные условия.")
+    return current_conditions_result
+
+def summarize_weather(current_temperature_result, current_conditions_result):
+    return summarize_forecast(validate_weather(current_temperature_result, current_conditions_result))
+
+def summarize_forecast(forecast):
+    """
+    Оценивает погоду по дневному прогнозу по всем правилам (см. web.rules).
+
+    :param forecast: Запись DailyForecast.
+    :return: Запись WeatherReport.
+    """
+    return get_rule_engine().report(forecast)
+
 def main():
+    load_environment()
     start_address = 'Москва'
     end_address = 'Санкт-Петербург'
 
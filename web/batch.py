@@ -0,0 +1,262 @@
+"""
+Пакетная проверка погоды для списка локаций.
+
+Запуск из корня репозитория:
+    python -m web.batch points.csv -o results.jsonl --workers 8
+
+Входной файл - CSV с колонками address или latitude и longitude либо JSONL, где каждая
+строка - адрес или объект в формате точки маршрута. Результаты пишутся по мере готовности
+в порядке входного файла: в JSONL исходная запись переносится целиком, в CSV - только
+колонки CSV_FIELDS. После прерывания повторный запуск с тем же выходным файлом
+продолжает с контрольной точки.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from web.basic_requests import get_location_key_by_coordinates, get_location_key_by_name, get_weather_by_location_key
+from web.circuit_breaker import CircuitOpenError
+from web.config import load_environment
+from web.rate_limiter import QuotaExceeded, RateLimitExceeded, require_api_keys
+from web.route import parse_waypoint
+from web.rules import get_rule_engine
+
+# Колонки результата в формате CSV
+CSV_FIELDS = ('index', 'address', 'latitude', 'longitude', 'location_key', 'min_temperature', 'max_temperature',
+              'wind_speed', 'precipitation_probability', 'weather_summary', 'reasons', 'error')
+
+# Сколько раз повторять точку, получившую отказ ограничителя запросов, и пауза между попытками
+RATE_LIMIT_ATTEMPTS = 5
+RATE_LIMIT_PAUSE = 1.0
+
+
+def iter_points(path):
+    """
+    Читает точки из CSV или JSONL построчно, не загружая файл целиком.
+
+    :param path: Путь к входному файлу.
+    :return: Генератор пар (номер записи, исходная запись).
+    """
+    with open(path, encoding='utf-8', newline='') as file:
+        if path.endswith('.csv'):
+            yield from enumerate(csv.DictReader(file))
+            return
+        index = 0
+        for line in file:
+            if line.strip():
+                yield index, json.loads(line)
+                index += 1
+
+
+def _point_from_row(row):
+    # В CSV пустые колонки приходят пустыми строками, а точку маршрута описывает только часть колонок
+    if isinstance(row, dict):
+        row = {key: value for key, value in row.items() if value not in ('', None)}
+    return parse_waypoint(row)
+
+
+def evaluate_point(index, row):
+    """
+    Определяет ключ локации точки и получает прогноз для нее; оценка выполняется позже
+    сразу для группы точек (см. run_batch).
+
+    :param index: Номер записи во входном файле.
+    :param row: Исходная запись (адрес или словарь).
+    :return: Пара (словарь результата, DailyForecast или None); ошибка точки записывается в поле error.
+    :raises QuotaExceeded: Если суточная квота API исчерпана - продолжать пакет бессмысленно.
+    :raises RateLimitExceeded: Если лимит запросов не освободился за RATE_LIMIT_ATTEMPTS попыток.
+    :raises CircuitOpenError: Если API остается недоступным после RATE_LIMIT_ATTEMPTS попыток.
+        Такая точка не записывается с ошибкой, и повторный запуск обработает ее с контрольной точки.
+    """
+    result = {'index': index, 'input': row, 'location_key': None, 'weather': None, 'error': None}
+    for attempt in range(RATE_LIMIT_ATTEMPTS):
+        try:
+            address, latitude, longitude = _point_from_row(row)
+            if address:
+                location_key = get_location_key_by_name(address)
+            else:
+                location_key = get_location_key_by_coordinates(latitude, longitude)
+            result['location_key'] = location_key
+            if not location_key:
+                result['error'] = "Не удалось определить местоположение точки."
+                return result, None
+            return result, get_weather_by_location_key(location_key)
+        except QuotaExceeded:
+            raise
+        except (RateLimitExceeded, CircuitOpenError):
+            # Пакетная проверка не торопится: ждем пополнения лимита или восстановления API и повторяем точку
+            if attempt == RATE_LIMIT_ATTEMPTS - 1:
+                raise
+            time.sleep(RATE_LIMIT_PAUSE * (attempt + 1))
+        except Exception as e:
+            result['error'] = str(e)
+            return result, None
+
+
+class JsonlWriter:
+    def __init__(self, file):
+        self._file = file
+
+    def write(self, result):
+        self._file.write(json.dumps(result, ensure_ascii=False) + '\n')
+
+
+class CsvWriter:
+    def __init__(self, file):
+        self._writer = csv.DictWriter(file, fieldnames=CSV_FIELDS, extrasaction='ignore')
+        # Заголовок пишется только в новый файл, при продолжении файл уже содержит его
+        if file.tell() == 0:
+            self._writer.writeheader()
+
+    def write(self, result):
+        values = dict(result['input']) if isinstance(result['input'], dict) else {'address': result['input']}
+        values.update(result['weather'] or {})
+        values['reasons'] = '; '.join(values.get('reasons') or ())
+        values.update(index=result['index'], location_key=result['location_key'], error=result['error'])
+        self._writer.writerow(values)
+
+
+def load_checkpoint(path, input_path):
+    """
+    :return: Пара (число обработанных записей, размер выходного файла в байтах) или (0, 0), если начинаем заново.
+    """
+    if not os.path.exists(path):
+        return 0, 0
+    with open(path, encoding='utf-8') as file:
+        checkpoint = json.load(file)
+    if checkpoint['input'] != os.path.abspath(input_path):
+        raise ValueError(f"Контрольная точка {path} относится к другому входному файлу: {checkpoint['input']}")
+    return checkpoint['processed'], checkpoint['output_offset']
+
+
+def save_checkpoint(path, input_path, processed, output_offset):
+    # Запись через временный файл: прерывание не оставит поврежденную контрольную точку
+    temporary = f"{path}.tmp"
+    with open(temporary, 'w', encoding='utf-8') as file:
+        json.dump({'input': os.path.abspath(input_path), 'processed': processed, 'output_offset': output_offset}, file)
+    os.replace(temporary, path)
+
+
+def run_batch(input_path, output_path, output_format=None, workers=8, checkpoint_path=None, checkpoint_every=100,
+              progress=None):
+    """
+    Проверяет погоду для всех точек входного файла.
+
+    Одновременно обрабатывается не больше 2 * workers точек, поэтому расход памяти не зависит
+    от размера файла. Готовые прогнозы оцениваются движком правил группами по checkpoint_every
+    точек за один векторный проход, после записи группы обновляется контрольная точка. Она хранит
+    число записанных результатов и размер выходного файла; при продолжении файл обрезается
+    до этого размера, так что результаты не дублируются. Если выходного файла нет или он короче
+    сохраненного размера, контрольная точка не используется и пакет обрабатывается заново.
+
+    :param input_path: Входной файл CSV или JSONL.
+    :param output_path: Выходной файл; формат определяется расширением, если не задан output_format.
+    :param output_format: 'jsonl' или 'csv'.
+    :param workers: Число потоков обработки.
+    :param checkpoint_path: Файл контрольной точки; по умолчанию output_path + '.checkpoint'.
+    :param checkpoint_every: Через сколько записанных результатов обновлять контрольную точку.
+    :param progress: Функция progress(processed), вызываемая при обновлении контрольной точки.
+    :return: Общее число обработанных записей.
+    """
+    output_format = output_format or ('csv' if output_path.endswith('.csv') else 'jsonl')
+    checkpoint_path = checkpoint_path or f"{output_path}.checkpoint"
+    processed, offset = load_checkpoint(checkpoint_path, input_path)
+    if processed and (not os.path.exists(output_path) or os.path.getsize(output_path) < offset):
+        # Выходной файл удален или обрезан: записанных результатов в нем нет, пакет начинается заново
+        print(f"Выходной файл {output_path} не соответствует контрольной точке, обработка начинается заново.",
+              file=sys.stderr)
+        processed, offset = 0, 0
+
+    mode = 'r+' if processed else 'w'
+    with open(output_path, mode, encoding='utf-8', newline='') as output, \
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix='weather-batch') as pool:
+        output.seek(offset)
+        output.truncate()
+        writer = CsvWriter(output) if output_format == 'csv' else JsonlWriter(output)
+        pending = deque()
+        ready = []
+
+        def write_ready():
+            nonlocal processed
+            if not ready:
+                return
+            forecasts = [forecast for _, forecast in ready if forecast is not None]
+            reports = iter(get_rule_engine().reports(forecasts))
+            for result, forecast in ready:
+                if forecast is not None:
+                    result['weather'] = next(reports).to_dict()
+                writer.write(result)
+            processed += len(ready)
+            ready.clear()
+            output.flush()
+            save_checkpoint(checkpoint_path, input_path, processed, output.tell())
+            if progress:
+                progress(processed)
+
+        def collect_oldest():
+            ready.append(pending.popleft().result())
+            if len(ready) >= checkpoint_every:
+                write_ready()
+
+        try:
+            for index, row in iter_points(input_path):
+                if index < processed:
+                    continue
+                pending.append(pool.submit(evaluate_point, index, row))
+                # Результаты пишутся в порядке входного файла, очередь ограничена
+                while len(pending) >= 2 * workers or (pending and pending[0].done()):
+                    collect_oldest()
+            while pending:
+                collect_oldest()
+            write_ready()
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            # Уже готовые результаты сохраняем, чтобы не запрашивать их повторно
+            write_ready()
+            raise
+
+    # Пакет завершен, следующий запуск с этим выходным файлом начнется заново
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return processed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пакетная проверка погоды для списка локаций")
+    parser.add_argument('input', help="Входной файл CSV или JSONL")
+    parser.add_argument('-o', '--output', required=True, help="Выходной файл JSONL или CSV")
+    parser.add_argument('--format', choices=('jsonl', 'csv'), help="Формат результата (по умолчанию по расширению)")
+    parser.add_argument('--workers', type=int, default=int(os.getenv('WEATHER_BATCH_WORKERS', '8')),
+                        help="Число одновременно обрабатываемых точек")
+    parser.add_argument('--checkpoint', help="Файл контрольной точки (по умолчанию OUTPUT.checkpoint)")
+    parser.add_argument('--checkpoint-every', type=int, default=100, help="Период обновления контрольной точки")
+    args = parser.parse_args()
+    load_environment()
+    try:
+        require_api_keys()
+    except ValueError as e:
+        parser.error(str(e))
+
+    def progress(processed):
+        print(f"Обработано записей: {processed}", file=sys.stderr)
+
+    try:
+        processed = run_batch(args.input, args.output, args.format, args.workers, args.checkpoint,
+                              args.checkpoint_every, progress)
+    except (RateLimitExceeded, CircuitOpenError) as e:
+        print(f"{e} Повторите запуск позже, обработка продолжится с контрольной точки.", file=sys.stderr)
+        sys.exit(2)
+    except KeyboardInterrupt:
+        print("Прервано, обработка продолжится с контрольной точки.", file=sys.stderr)
+        sys.exit(130)
+    print(f"Готово, обработано записей: {processed}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Нагрузочный бенчмарк /check-weather против локальной замены API AccuWeather.
+
+Поднимает фиктивный API и приложение Flask на локальных портах, отправляет запросы
+с заданной параллельностью и выводит задержки p50/p95/p99, запросы в секунду
+и среднее число запросов к API на один запрос пользователя.
+
+Запуск из корня репозитория: python -m web.benchmarks.bench_check_weather --requests 500 --concurrency 20
+
+С --method get нагрузка идет на GET-вариант с каноническими параметрами, а с --revalidate
+клиенты повторяют запросы с If-None-Match, как браузер с закэшированной страницей.
+"""
+import argparse
+import logging
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from werkzeug.serving import make_server
+
+from web.benchmarks.fake_accuweather import FakeAccuWeatherServer
+from web.response_cache import canonical_query
+
+CITIES = ['Москва', 'Санкт-Петербург', 'Тверь', 'Казань', 'Нижний Новгород', 'Екатеринбург', 'Новосибирск',
+          'Самара', 'Ростов-на-Дону', 'Краснодар', 'Воронеж', 'Пермь', 'Уфа', 'Омск', 'Челябинск', 'Красноярск']
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def configure_environment(base_url, cold):
+    os.environ['WEATHER_API_BASE_URL'] = base_url
+    os.environ.setdefault('WEATHER_API_KEY', 'benchmark')
+    # У фиктивного API нет лимитов, ограничитель не должен влиять на замеры
+    os.environ.setdefault('WEATHER_RATE_LIMIT', '100000')
+    # Фоновые обновления планировщика исказили бы число запросов к API на запрос пользователя
+    os.environ.setdefault('WEATHER_PREWARM_TOP_N', '0')
+    if cold:
+        # Без кэшей каждый запрос пользователя доходит до API
+        os.environ['WEATHER_LOCATION_CACHE_TTL'] = '0'
+        os.environ['WEATHER_CURRENT_CONDITIONS_TTL'] = '0'
+        os.environ['WEATHER_FORECAST_TTL'] = '0'
+        os.environ['WEATHER_STALE_TTL'] = '0'
+        os.environ['WEATHER_STALE_IF_ERROR'] = '0'
+
+
+def run_load(url, total, concurrency, cities, path, method='post', revalidate=False):
+    local = threading.local()
+
+    def one(index):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+            local.etags = {}
+        start, end = cities[index % len(cities)], cities[(index + 1) % len(cities)]
+        started = time.perf_counter()
+        if method == 'get':
+            target = f"{url}{path}?{canonical_query((start, None, None), (end, None, None))}"
+            headers = {'If-None-Match': local.etags[target]} if revalidate and target in local.etags else {}
+            response = session.get(target, headers=headers)
+            if 'ETag' in response.headers:
+                local.etags[target] = response.headers['ETag']
+        else:
+            response = session.post(f"{url}{path}", data={'start_address': start, 'end_address': end})
+        elapsed = time.perf_counter() - started
+        return elapsed, response.status_code in (200, 304) and 'Произошла ошибка' not in response.text
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(one, range(total)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=300, help="Число запросов к /check-weather")
+    parser.add_argument('--concurrency', type=int, default=10, help="Число одновременных клиентов")
+    parser.add_argument('--latency-ms', type=float, default=50.0, help="Задержка ответа фиктивного API")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Доля ответов 503 от фиктивного API")
+    parser.add_argument('--padding', type=int, default=0, help="Дополнительные байты в каждом ответе API")
+    parser.add_argument('--responses-dir', help="Каталог с записанными ответами API")
+    parser.add_argument('--cities', type=int, default=len(CITIES), help="Число различных городов в нагрузке")
+    parser.add_argument('--cold', action='store_true', help="Отключить кэши, чтобы измерить работу с API")
+    parser.add_argument('--path', default='/check-weather', help="Маршрут приложения для нагрузки")
+    parser.add_argument('--method', choices=('post', 'get'), default='post', help="Форма (POST) или GET-вариант")
+    parser.add_argument('--revalidate', action='store_true', help="Повторять GET-запросы с If-None-Match")
+    args = parser.parse_args()
+
+    upstream = FakeAccuWeatherServer(latency=args.latency_ms / 1000, error_rate=args.error_rate,
+                                     padding=args.padding, responses_dir=args.responses_dir, seed=1)
+    configure_environment(upstream.start(), args.cold)
+
+    # Приложение импортируется после настройки окружения, чтобы подхватить адрес фиктивного API
+    from web.app import create_app
+    app = create_app()
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}"
+
+    try:
+        started = time.perf_counter()
+        results = run_load(url, args.requests, args.concurrency, CITIES[:args.cities], args.path, args.method,
+                           args.revalidate)
+        duration = time.perf_counter() - started
+    finally:
+        server.shutdown()
+        upstream.stop()
+
+    latencies = [elapsed * 1000 for elapsed, _ in results]
+    failures = sum(1 for _, ok in results if not ok)
+    print(f"Запросов: {len(results)}, ошибок: {failures}, параллельность: {args.concurrency}")
+    print(f"Пропускная способность: {len(results) / duration:.1f} запросов/с")
+    print(f"Задержка, мс: p50={percentile(latencies, 0.50):.1f} p95={percentile(latencies, 0.95):.1f} "
+          f"p99={percentile(latencies, 0.99):.1f} среднее={statistics.fmean(latencies):.1f}")
+    print(f"Запросов к API на запрос пользователя: {upstream.total_calls() / len(results):.2f} "
+          f"({', '.join(f'{name}={count}' for name, count in sorted(upstream.calls.items()))})")
+
+
+if __name__ == '__main__':
+    main()
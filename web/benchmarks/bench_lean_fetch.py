@@ -0,0 +1,53 @@
+"""
+Сравнивает объем ответов и время разбора для обычного и экономного режимов запросов.
+
+Запуск из корня репозитория: python -m web.benchmarks.bench_lean_fetch
+"""
+import argparse
+import json
+import timeit
+
+from web.basic_requests import FORECAST_DAYS, parse_current_temperature, parse_forecast_series
+from web.benchmarks import payloads
+
+
+def measure(body, parse, number):
+    def run():
+        parse(json.loads(body))
+    seconds = min(timeit.repeat(run, number=number, repeat=5)) / number
+    return len(body), seconds * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--number', type=int, default=2000, help="Число разборов в одном замере")
+    args = parser.parse_args()
+
+    cases = [
+        ("currentconditions", "full (details=true)",
+         payloads.current_conditions('294021', details=True), parse_current_temperature),
+        ("currentconditions", "lean",
+         payloads.current_conditions('294021', details=False), parse_current_temperature),
+        (f"forecast {FORECAST_DAYS}day", "full (details=true, °F)",
+         payloads.daily_forecast('294021', days=FORECAST_DAYS, metric=False), parse_forecast_series),
+        (f"forecast {FORECAST_DAYS}day", "lean (details=true, metric=true)",
+         payloads.daily_forecast('294021', days=FORECAST_DAYS, metric=True), parse_forecast_series),
+    ]
+
+    print(f"{'endpoint':<20} {'mode':<34} {'bytes':>8} {'parse, мкс':>12}")
+    totals = {}
+    for endpoint, mode, data, parse in cases:
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        size, micros = measure(body, parse, args.number)
+        totals.setdefault(mode.split()[0], [0, 0.0])
+        totals[mode.split()[0]][0] += size
+        totals[mode.split()[0]][1] += micros
+        print(f"{endpoint:<20} {mode:<34} {size:>8} {micros:>12.1f}")
+
+    print()
+    for mode, (size, micros) in totals.items():
+        print(f"Итого на одну проверку погоды ({mode}): {size} байт, {micros:.1f} мкс разбора")
+
+
+if __name__ == '__main__':
+    main()
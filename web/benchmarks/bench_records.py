@@ -0,0 +1,75 @@
+"""
+Сравнивает объем памяти на одну запись кэша: прежние словари и кортежи против записей records.
+
+Запуск из корня репозитория: python -m web.benchmarks.bench_records
+"""
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+
+from web.basic_requests import summarize_forecast
+from web.records import CurrentConditions, DailyForecast
+
+
+def legacy_entry(index):
+    # Так результаты выглядели до перехода на записи: кортежи из функций запроса и словарь оценки
+    forecast = (float(index % 30), float(index % 30 + 10), float(index % 50), index % 100)
+    current = (float(index % 30 + 5), "Переменная облачность")
+    report = {
+        "min_temperature": forecast[0],
+        "max_temperature": forecast[1],
+        "wind_speed": forecast[2],
+        "precipitation_probability": forecast[3],
+        "temperature_summary": None,
+        "wind_summary": None,
+        "precipitation_summary": None,
+        "weather_summary": "Погода благоприятная",
+    }
+    return current, forecast, report
+
+
+def record_entry(index):
+    location_key = str(294021 + index)
+    fetched_at = time.time()
+    forecast = DailyForecast(location_key, fetched_at, float(index % 30), float(index % 30 + 10),
+                             float(index % 50), index % 100)
+    current = CurrentConditions(location_key, fetched_at, float(index % 30 + 5), "Переменная облачность")
+    return current, forecast, summarize_forecast(forecast)
+
+
+def measure(build, count):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    entries = [build(index) for index in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # Список entries сам занимает 8 байт на элемент, его не учитываем
+    return (after - before) / count - 8, entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=100000, help="Число записей")
+    args = parser.parse_args()
+
+    legacy, _ = measure(legacy_entry, args.count)
+    records, entries = measure(record_entry, args.count)
+    current, forecast, report = entries[0]
+    legacy_current, legacy_forecast, legacy_report = legacy_entry(0)
+
+    # Записи дополнительно хранят ключ локации и время получения, которых в прежнем формате не было
+    print(f"{'формат':<40} {'байт на локацию':>16}")
+    print(f"{'dict + tuple (прежний)':<40} {legacy:>16.0f}")
+    print(f"{'records (slots, frozen)':<40} {records:>16.0f}")
+    print()
+    print(f"{'контейнер':<40} {'прежний':>8} {'records':>8}")
+    for name, old, new in (("текущая погода", legacy_current, current), ("прогноз", legacy_forecast, forecast),
+                           ("оценка", legacy_report, report)):
+        print(f"{name:<40} {sys.getsizeof(old):>8} {sys.getsizeof(new):>8}")
+
+
+if __name__ == '__main__':
+    main()
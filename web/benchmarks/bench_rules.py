@@ -0,0 +1,45 @@
+"""
+Сравнивает время оценки набора прогнозов по одной точке и одним векторным проходом движка правил.
+
+Запуск из корня репозитория: python -m web.benchmarks.bench_rules
+"""
+import argparse
+import timeit
+
+import numpy as np
+
+from web.records import DailyForecast
+from web.rules import FIELDS, RuleEngine
+
+
+def make_forecasts(count, seed=7):
+    rng = np.random.default_rng(seed)
+    low = rng.uniform(-10, 30, count)
+    return [DailyForecast(str(index), 0.0, float(low[index]), float(low[index] + spread), float(wind), int(rain))
+            for index, (spread, wind, rain) in enumerate(zip(rng.uniform(0, 15, count), rng.uniform(0, 80, count),
+                                                             rng.integers(0, 101, count)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=10000, help="Число прогнозов")
+    parser.add_argument('--repeat', type=int, default=5, help="Число замеров")
+    args = parser.parse_args()
+
+    engine = RuleEngine()
+    forecasts = make_forecasts(args.count)
+    values = np.array([[getattr(forecast, field) for field in FIELDS] for forecast in forecasts])
+
+    cases = [
+        ("по одной точке (report)", lambda: [engine.report(forecast) for forecast in forecasts]),
+        ("векторно, с оценками (reports)", lambda: engine.reports(forecasts)),
+        ("векторно, только правила (evaluate_columns)", lambda: engine.evaluate_columns(values)),
+    ]
+    print(f"{'способ':<46} {'мс':>8} {'мкс на точку':>14}")
+    for name, run in cases:
+        seconds = min(timeit.repeat(run, number=1, repeat=args.repeat))
+        print(f"{name:<46} {seconds * 1e3:>8.2f} {seconds * 1e6 / args.count:>14.3f}")
+
+
+if __name__ == '__main__':
+    main()
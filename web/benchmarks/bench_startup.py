@@ -0,0 +1,60 @@
+"""
+Измеряет время запуска: импорт модулей и создание приложения в новом процессе Python.
+
+Каждый сценарий выполняется в отдельном процессе несколько раз, выводится медиана
+и минимум. Импорт модулей не читает .env и не требует ключа API, поэтому сценарии
+импорта выполняются без WEATHER_API_KEY.
+
+Запуск из корня репозитория: python -m web.benchmarks.bench_startup --runs 10
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+SCENARIOS = [
+    ("import web.basic_requests", "import web.basic_requests", False),
+    ("import web.batch", "import web.batch", False),
+    ("import web.app", "import web.app", False),
+    ("create_app()", "import web.app; web.app.create_app()", True),
+]
+
+TEMPLATE = """
+import time
+started = time.perf_counter()
+{code}
+print(time.perf_counter() - started)
+"""
+
+
+def measure(code, with_key, runs):
+    environment = {name: value for name, value in os.environ.items()
+                   if name not in ('WEATHER_API_KEY', 'WEATHER_API_KEYS')}
+    if with_key:
+        environment['WEATHER_API_KEY'] = 'benchmark'
+    # Фоновый планировщик не должен влиять на замер
+    environment['WEATHER_PREWARM_TOP_N'] = '0'
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    environment['PYTHONPATH'] = os.pathsep.join(filter(None, [root, environment.get('PYTHONPATH')]))
+    timings = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', TEMPLATE.format(code=code)], env=environment, cwd=root,
+                                capture_output=True, text=True, check=True).stdout
+        timings.append(float(output.strip().splitlines()[-1]) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=10, help="Число запусков каждого сценария")
+    args = parser.parse_args()
+
+    print(f"{'сценарий':<28} {'медиана, мс':>12} {'минимум, мс':>12}")
+    for name, code, with_key in SCENARIOS:
+        timings = measure(code, with_key, args.runs)
+        print(f"{name:<28} {statistics.median(timings):>12.1f} {min(timings):>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
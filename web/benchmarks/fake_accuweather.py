@@ -0,0 +1,174 @@
+"""
+Локальная замена API AccuWeather для бенчмарков и тестов без доступа к сети.
+
+Отвечает на запросы locations, currentconditions и daily forecast, поддерживает
+искусственную задержку, долю ошибок 503 и увеличение объема ответов.
+
+Запуск отдельно: python -m web.benchmarks.fake_accuweather --port 8081 --latency-ms 80
+"""
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from web.benchmarks import payloads
+
+_CURRENT_CONDITIONS = re.compile(r'^/currentconditions/v1/(?P<key>[^/]+)$')
+_DAILY_FORECAST = re.compile(r'^/forecasts/v1/daily/(?P<days>\d+)day/(?P<key>[^/]+)$')
+
+
+def location_key_for(query):
+    """
+    Детерминированный ключ локации для строки запроса.
+    """
+    return str(100000 + zlib.crc32(query.strip().casefold().encode('utf-8')) % 900000)
+
+
+class FakeAccuWeatherHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Без TCP_NODELAY ответ на keep-alive соединении ждет отложенного ACK клиента (около 40 мс)
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        url = urlsplit(self.path)
+        params = {name: values[0] for name, values in parse_qs(url.query).items()}
+        endpoint, data = self._route(url.path, params)
+        server.count(endpoint)
+
+        if server.latency:
+            time.sleep(server.latency)
+        if endpoint is None:
+            return self._send(404, {"Code": "ResourceNotFound"})
+        if server.error_rate and server.random.random() < server.error_rate:
+            return self._send(503, {"Code": "ServiceUnavailable"})
+        if server.padding:
+            if isinstance(data, list):
+                data = [dict(item, Padding='x' * server.padding) for item in data]
+            else:
+                data = dict(data, Padding='x' * server.padding)
+        self._send(200, data)
+
+    def _route(self, path, params):
+        server = self.server
+        details = params.get('details', '').lower() == 'true'
+        metric = params.get('metric', '').lower() == 'true'
+
+        if path == '/locations/v1/cities/autocomplete':
+            query = params.get('q', '')
+            return 'autocomplete', server.recorded.get('autocomplete') or [payloads.location(location_key_for(query), query)]
+        if path == '/locations/v1/cities/geoposition/search':
+            query = params.get('q', '')
+            return 'geoposition', server.recorded.get('geoposition') or payloads.location(location_key_for(query), query)
+
+        match = _CURRENT_CONDITIONS.match(path)
+        if match:
+            return 'currentconditions', server.recorded.get('currentconditions') or \
+                payloads.current_conditions(match['key'], details=details)
+
+        match = _DAILY_FORECAST.match(path)
+        if match:
+            return 'forecast', server.recorded.get('forecast') or \
+                payloads.daily_forecast(match['key'], days=int(match['days']), metric=metric, details=details)
+        return None, None
+
+    def _send(self, status, data):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeAccuWeatherServer(ThreadingHTTPServer):
+    """
+    HTTP-сервер, имитирующий API AccuWeather и считающий запросы по эндпоинтам.
+    """
+    daemon_threads = True
+
+    def __init__(self, address=('127.0.0.1', 0), latency=0.0, error_rate=0.0, padding=0, responses_dir=None,
+                 seed=None):
+        super().__init__(address, FakeAccuWeatherHandler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.padding = padding
+        self.random = random.Random(seed)
+        self.recorded = load_recorded_responses(responses_dir) if responses_dir else {}
+        self.calls = {}
+        self._calls_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, endpoint):
+        with self._calls_lock:
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+
+    def total_calls(self):
+        with self._calls_lock:
+            return sum(self.calls.values())
+
+    def start(self):
+        """
+        Запускает сервер в фоновом потоке.
+
+        :return: Базовый адрес сервера.
+        """
+        self._thread = threading.Thread(target=self.serve_forever, name='fake-accuweather', daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def load_recorded_responses(directory):
+    """
+    Загружает записанные ответы API из файлов autocomplete.json, geoposition.json,
+    currentconditions.json и forecast.json (отсутствующие файлы пропускаются).
+    """
+    recorded = {}
+    for endpoint in ('autocomplete', 'geoposition', 'currentconditions', 'forecast'):
+        path = os.path.join(directory, f"{endpoint}.json")
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as file:
+                recorded[endpoint] = json.load(file)
+    return recorded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="Задержка каждого ответа")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Доля ответов 503 (0..1)")
+    parser.add_argument('--padding', type=int, default=0, help="Дополнительные байты в каждом ответе")
+    parser.add_argument('--responses-dir', help="Каталог с записанными ответами API")
+    args = parser.parse_args()
+
+    server = FakeAccuWeatherServer((args.host, args.port), latency=args.latency_ms / 1000,
+                                   error_rate=args.error_rate, padding=args.padding,
+                                   responses_dir=args.responses_dir)
+    print(f"Сервер запущен: {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
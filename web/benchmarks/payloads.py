@@ -0,0 +1,176 @@
+"""
+Ответы API AccuWeather для бенчмарков, повторяющие структуру и объем настоящих ответов.
+"""
+
+
+def _temperature(celsius, metric=True):
+    if metric:
+        return {"Value": round(celsius, 1), "Unit": "C", "UnitType": 17}
+    return {"Value": round(celsius * 9 / 5 + 32), "Unit": "F", "UnitType": 18}
+
+
+def _pair(celsius):
+    return {"Metric": _temperature(celsius, True), "Imperial": _temperature(celsius, False)}
+
+
+def location(location_key, name):
+    """
+    Элемент ответа autocomplete/geoposition.
+    """
+    return {
+        "Version": 1,
+        "Key": location_key,
+        "Type": "City",
+        "Rank": 10,
+        "LocalizedName": name,
+        "Country": {"ID": "RU", "LocalizedName": "Россия"},
+        "AdministrativeArea": {"ID": "MOW", "LocalizedName": name},
+    }
+
+
+def current_conditions(location_key, details=False, temperature=20.5):
+    """
+    Ответ /currentconditions/v1/{key}; с details=True добавляются десятки полей, которые сервис не использует.
+    """
+    data = {
+        "LocalObservationDateTime": "2024-10-18T12:00:00+03:00",
+        "EpochTime": 1729242000,
+        "WeatherText": "Переменная облачность",
+        "WeatherIcon": 3,
+        "HasPrecipitation": False,
+        "PrecipitationType": None,
+        "IsDayTime": True,
+        "Temperature": _pair(temperature),
+        "MobileLink": f"http://www.accuweather.com/ru/ru/moscow/{location_key}/current-weather/{location_key}",
+        "Link": f"http://www.accuweather.com/ru/ru/moscow/{location_key}/current-weather/{location_key}",
+    }
+    if details:
+        data.update({
+            "RealFeelTemperature": {**_pair(temperature - 1), "Phrase": "Приятно"},
+            "RealFeelTemperatureShade": {**_pair(temperature - 2), "Phrase": "Приятно"},
+            "RelativeHumidity": 61,
+            "IndoorRelativeHumidity": 45,
+            "DewPoint": _pair(9.2),
+            "Wind": {"Direction": {"Degrees": 225, "Localized": "ЮЗ", "English": "SW"},
+                     "Speed": {"Metric": {"Value": 14.8, "Unit": "km/h", "UnitType": 7},
+                               "Imperial": {"Value": 9.2, "Unit": "mi/h", "UnitType": 9}}},
+            "WindGust": {"Speed": {"Metric": {"Value": 25.9, "Unit": "km/h", "UnitType": 7},
+                                   "Imperial": {"Value": 16.1, "Unit": "mi/h", "UnitType": 9}}},
+            "UVIndex": 2,
+            "UVIndexText": "Низкий",
+            "Visibility": {"Metric": {"Value": 16.1, "Unit": "km", "UnitType": 6},
+                           "Imperial": {"Value": 10.0, "Unit": "mi", "UnitType": 2}},
+            "ObstructionsToVisibility": "",
+            "CloudCover": 40,
+            "Ceiling": {"Metric": {"Value": 9144.0, "Unit": "m", "UnitType": 5},
+                        "Imperial": {"Value": 30000.0, "Unit": "ft", "UnitType": 0}},
+            "Pressure": {"Metric": {"Value": 1016.0, "Unit": "mb", "UnitType": 14},
+                         "Imperial": {"Value": 30.0, "Unit": "inHg", "UnitType": 12}},
+            "PressureTendency": {"LocalizedText": "Устойчивое", "Code": "S"},
+            "Past24HourTemperatureDeparture": _pair(1.1),
+            "ApparentTemperature": _pair(temperature + 0.5),
+            "WindChillTemperature": _pair(temperature),
+            "WetBulbTemperature": _pair(14.3),
+            "Precip1hr": _pair(0.0),
+            "PrecipitationSummary": {
+                period: _pair(0.0)
+                for period in ("Precipitation", "PastHour", "Past3Hours", "Past6Hours", "Past9Hours",
+                               "Past12Hours", "Past18Hours", "Past24Hours")
+            },
+            "TemperatureSummary": {
+                period: {"Minimum": _pair(temperature - 8), "Maximum": _pair(temperature + 1)}
+                for period in ("Past6HourRange", "Past12HourRange", "Past24HourRange")
+            },
+        })
+    return [data]
+
+
+def _day_part(wind_kmh, precipitation_probability, metric):
+    wind = {"Value": wind_kmh, "Unit": "km/h", "UnitType": 7} if metric else \
+        {"Value": round(wind_kmh / 1.61, 1), "Unit": "mi/h", "UnitType": 9}
+    return {
+        "Icon": 3,
+        "IconPhrase": "Переменная облачность",
+        "HasPrecipitation": False,
+        "ShortPhrase": "Переменная облачность",
+        "LongPhrase": "Переменная облачность, временами солнечно",
+        "PrecipitationProbability": precipitation_probability,
+        "ThunderstormProbability": 0,
+        "RainProbability": precipitation_probability,
+        "SnowProbability": 0,
+        "IceProbability": 0,
+        "Wind": {"Speed": wind, "Direction": {"Degrees": 220, "Localized": "ЮЗ", "English": "SW"}},
+        "WindGust": {"Speed": dict(wind, Value=round(wind["Value"] * 1.8, 1)),
+                     "Direction": {"Degrees": 230, "Localized": "ЮЗ", "English": "SW"}},
+        "TotalLiquid": {"Value": 0.0, "Unit": "mm" if metric else "in", "UnitType": 3 if metric else 1},
+        "Rain": {"Value": 0.0, "Unit": "mm" if metric else "in", "UnitType": 3 if metric else 1},
+        "Snow": {"Value": 0.0, "Unit": "cm" if metric else "in", "UnitType": 4 if metric else 1},
+        "Ice": {"Value": 0.0, "Unit": "mm" if metric else "in", "UnitType": 3 if metric else 1},
+        "HoursOfPrecipitation": 0.0,
+        "HoursOfRain": 0.0,
+        "HoursOfSnow": 0.0,
+        "HoursOfIce": 0.0,
+        "CloudCover": 45,
+        "Evapotranspiration": {"Value": 1.3, "Unit": "mm", "UnitType": 3},
+        "SolarIrradiance": {"Value": 2410.6, "Unit": "W/m²", "UnitType": 33},
+        "RelativeHumidity": {"Minimum": 50, "Maximum": 88, "Average": 68},
+        "WetBulbTemperature": {"Minimum": _temperature(6.1, metric), "Maximum": _temperature(12.2, metric),
+                               "Average": _temperature(9.4, metric)},
+        "WetBulbGlobeTemperature": {"Minimum": _temperature(7.2, metric), "Maximum": _temperature(16.7, metric),
+                                    "Average": _temperature(12.8, metric)},
+    }
+
+
+def daily_forecast(location_key, days=1, metric=False, details=True, minimum=10.0, maximum=25.0, wind_kmh=16.1,
+                   precipitation_probability=30, start_epoch=1729224000):
+    """
+    Ответ /forecasts/v1/daily/{days}day/{key}. Без details у дня и ночи нет ветра и вероятности осадков.
+    """
+    forecasts = []
+    for index in range(days):
+        epoch = start_epoch + index * 86400
+        forecast = {
+            "Date": f"2024-10-{18 + index:02d}T07:00:00+03:00",
+            "EpochDate": epoch,
+            "Temperature": {"Minimum": _temperature(minimum, metric), "Maximum": _temperature(maximum, metric)},
+            "Day": _day_part(wind_kmh, precipitation_probability, metric) if details else
+            {"Icon": 3, "IconPhrase": "Переменная облачность", "HasPrecipitation": False},
+            "Night": _day_part(wind_kmh * 0.6, precipitation_probability // 2, metric) if details else
+            {"Icon": 35, "IconPhrase": "Переменная облачность", "HasPrecipitation": False},
+            "Sources": ["AccuWeather"],
+            "MobileLink": f"http://www.accuweather.com/ru/ru/moscow/{location_key}/daily-weather-forecast/{location_key}",
+            "Link": f"http://www.accuweather.com/ru/ru/moscow/{location_key}/daily-weather-forecast/{location_key}",
+        }
+        if details:
+            forecast.update({
+                "Sun": {"Rise": "2024-10-18T07:25:00+03:00", "EpochRise": epoch + 1500,
+                        "Set": "2024-10-18T17:48:00+03:00", "EpochSet": epoch + 38880},
+                "Moon": {"Rise": "2024-10-18T18:30:00+03:00", "EpochRise": epoch + 41400,
+                         "Set": "2024-10-19T10:11:00+03:00", "EpochSet": epoch + 97860, "Phase": "WaningGibbous",
+                         "Age": 16},
+                "RealFeelTemperature": {"Minimum": {**_temperature(minimum - 2, metric), "Phrase": "Прохладно"},
+                                        "Maximum": {**_temperature(maximum, metric), "Phrase": "Приятно"}},
+                "RealFeelTemperatureShade": {"Minimum": {**_temperature(minimum - 2, metric), "Phrase": "Прохладно"},
+                                             "Maximum": {**_temperature(maximum - 2, metric), "Phrase": "Приятно"}},
+                "HoursOfSun": 4.6,
+                "DegreeDaySummary": {"Heating": _temperature(0.0, metric), "Cooling": _temperature(0.0, metric)},
+                "AirAndPollen": [
+                    {"Name": name, "Value": 0, "Category": "Низкий", "CategoryValue": 1}
+                    for name in ("AirQuality", "Grass", "Mold", "Ragweed", "Tree", "UVIndex")
+                ],
+            })
+        forecasts.append(forecast)
+    return {
+        "Headline": {
+            "EffectiveDate": "2024-10-18T07:00:00+03:00",
+            "EffectiveEpochDate": start_epoch,
+            "Severity": 4,
+            "Text": "Переменная облачность в ближайшие дни",
+            "Category": "",
+            "EndDate": None,
+            "EndEpochDate": None,
+            "MobileLink": f"http://www.accuweather.com/ru/ru/moscow/{location_key}/extended-weather-forecast/{location_key}",
+            "Link": f"http://www.accuweather.com/ru/ru/moscow/{location_key}/daily-weather-forecast/{location_key}",
+        },
+        "DailyForecasts": forecasts,
+    }
@@ -0,0 +1,143 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class SQLiteStore:
+    """
+    Постоянное хранилище ключ-значение на SQLite, переживающее перезапуск процесса.
+    Значения сериализуются в JSON, для каждой записи хранится время истечения.
+    """
+
+    def __init__(self, path, table='cache'):
+        self._table = table
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def get(self, key, now):
+        """
+        :return: Пара (значение, время истечения) или None, если записи нет или она устарела.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                f"SELECT value, expires_at FROM {self._table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                with self._connection:
+                    self._connection.execute(f"DELETE FROM {self._table} WHERE key = ?", (key,))
+                return None
+        return json.loads(row[0]), row[1]
+
+    def set(self, key, value, expires_at):
+        with self._lock, self._connection:
+            self._connection.execute(
+                f"INSERT OR REPLACE INTO {self._table} (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), expires_at),
+            )
+
+    def clear(self):
+        with self._lock, self._connection:
+            self._connection.execute(f"DELETE FROM {self._table}")
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+class TTLCache:
+    """
+    Потокобезопасный LRU-кэш с ограниченным размером и временем жизни записей.
+    При наличии постоянного хранилища промахи в памяти дочитываются из него.
+    """
+
+    def __init__(self, maxsize=1024, ttl=86400.0, store=None, clock=time.time):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._store = store
+        self._clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """
+        Возвращает значение по ключу, обновляя его позицию в LRU.
+
+        :param key: Ключ записи.
+        :param default: Значение, возвращаемое при промахе.
+        :return: Сохраненное значение или default.
+        """
+        now = self._clock()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                del self._data[key]
+
+        if self._store is not None:
+            stored = self._store.get(key, now)
+            if stored is not None:
+                with self._lock:
+                    self._put(key, stored[0], stored[1])
+                    self.hits += 1
+                return stored[0]
+
+        with self._lock:
+            self.misses += 1
+        return default
+
+    def set(self, key, value, ttl=None):
+        """
+        Сохраняет значение в памяти и, если настроено, в постоянном хранилище.
+
+        :param key: Ключ записи.
+        :param value: Значение (для постоянного хранилища должно сериализоваться в JSON).
+        :param ttl: Время жизни записи в секундах; по умолчанию используется ttl кэша.
+        """
+        expires_at = self._clock() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._put(key, value, expires_at)
+        if self._store is not None:
+            self._store.set(key, value, expires_at)
+
+    def _put(self, key, value, expires_at):
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+        if self._store is not None:
+            self._store.clear()
+
+    def stats(self):
+        """
+        :return: Словарь со счетчиками попаданий, промахов, вытеснений и текущим размером.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._data),
+            }
+
+    def __len__(self):
+        return len(self._data)
@@ -0,0 +1,149 @@
+import os
+import threading
+import time
+from collections import deque
+
+from web.metrics import REGISTRY, Counter
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Значения состояний для метрики: 0 - замкнут, 1 - пробный запрос, 2 - разомкнут
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+BREAKER_REJECTIONS = REGISTRY.register(Counter(
+    'weather_circuit_breaker_rejected_total', "Запросы к API, отклоненные разомкнутым предохранителем",
+    ('endpoint',)))
+
+
+class CircuitOpenError(RuntimeError):
+    """
+    Предохранитель разомкнут: запрос к API отклонен без обращения к сети.
+    """
+
+
+class CircuitBreaker:
+    """
+    Предохранитель для одного метода API.
+
+    Хранит исходы последних window запросов. Если доля ошибок среди них (не меньше min_calls)
+    достигает failure_rate, предохранитель размыкается и open_timeout секунд отклоняет запросы
+    сразу. Затем пропускается один пробный запрос: успех замыкает предохранитель, ошибка снова
+    размыкает его.
+    """
+
+    def __init__(self, name, window=20, failure_rate=0.5, min_calls=5, open_timeout=30.0, clock=time.monotonic):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.open_timeout = open_timeout
+        self._clock = clock
+        self._outcomes = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self._opened_at = 0.0
+        self._probe_at = 0.0
+
+    def allow(self):
+        """
+        Проверяет, можно ли выполнить запрос.
+
+        :raises CircuitOpenError: Если предохранитель разомкнут или пробный запрос уже выполняется.
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            now = self._clock()
+            if self.state == OPEN and now - self._opened_at >= self.open_timeout:
+                self.state = HALF_OPEN
+                self._probe_at = now
+                return
+            # Пробный запрос, не сообщивший результат за open_timeout, считается потерянным
+            if self.state == HALF_OPEN and now - self._probe_at >= self.open_timeout:
+                self._probe_at = now
+                return
+        BREAKER_REJECTIONS.inc(self.name)
+        raise CircuitOpenError("Сервис погоды временно недоступен. Пожалуйста, попробуйте позже.")
+
+    def record_success(self):
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self.state = CLOSED
+                self._outcomes.clear()
+            self._outcomes.append(True)
+
+    def record_failure(self):
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._open()
+                return
+            # Запросы, начатые до размыкания, на состояние уже не влияют
+            if self.state == OPEN:
+                return
+            self._outcomes.append(False)
+            if len(self._outcomes) >= self.min_calls:
+                failures = self._outcomes.count(False)
+                if failures >= self.failure_rate * len(self._outcomes):
+                    self._open()
+
+    def _open(self):
+        print(f"Предохранитель {self.name} разомкнут на {self.open_timeout} с из-за ошибок API")
+        self.state = OPEN
+        self._opened_at = self._clock()
+        self._outcomes.clear()
+
+
+def create_breaker(name):
+    """
+    Создает предохранитель по настройкам окружения.
+
+    :param name: Имя метода API (см. metrics.endpoint_name).
+    :return: Экземпляр CircuitBreaker.
+    """
+    return CircuitBreaker(
+        name,
+        window=int(os.getenv('WEATHER_BREAKER_WINDOW', '20')),
+        failure_rate=float(os.getenv('WEATHER_BREAKER_FAILURE_RATE', '0.5')),
+        min_calls=int(os.getenv('WEATHER_BREAKER_MIN_CALLS', '5')),
+        open_timeout=float(os.getenv('WEATHER_BREAKER_OPEN_TIMEOUT', '30')),
+    )
+
+
+def get_breaker(name):
+    """
+    :return: Общий для процесса предохранитель метода API.
+    """
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(name)
+            if breaker is None:
+                breaker = _breakers[name] = create_breaker(name)
+    return breaker
+
+
+def reset_breakers():
+    """
+    Сбрасывает все предохранители; новые будут созданы с актуальными настройками.
+    """
+    with _breakers_lock:
+        _breakers.clear()
+
+
+def _collect_metrics():
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    if not breakers:
+        return []
+    return [
+        ('weather_circuit_breaker_state', 'gauge',
+         "Состояние предохранителя: 0 - замкнут, 1 - пробный запрос, 2 - разомкнут",
+         {(('endpoint', breaker.name),): _STATE_VALUES[breaker.state] for breaker in breakers}),
+    ]
+
+
+REGISTRY.add_collector(_collect_metrics)
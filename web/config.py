@@ -0,0 +1,27 @@
+import os
+import threading
+
+from dotenv import find_dotenv, load_dotenv
+
+# Файл .env рядом с пакетом, используется, если в текущем каталоге .env нет
+PACKAGE_ENV_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
+
+_loaded = False
+_load_lock = threading.Lock()
+
+
+def load_environment():
+    """
+    Загружает переменные окружения из файла .env при первом вызове: сначала из .env текущего
+    каталога (или ближайшего родительского), затем из .env пакета. Уже заданные переменные
+    не перезаписываются. Вызывается фабрикой приложения, командами и при первом обращении
+    к API, а не при импорте модулей.
+    """
+    global _loaded
+    if _loaded:
+        return
+    with _load_lock:
+        if not _loaded:
+            load_dotenv(find_dotenv(usecwd=True))
+            load_dotenv(PACKAGE_ENV_PATH)
+            _loaded = True
@@ -0,0 +1,269 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from web.http_client import get_async_loop
+from web.metrics import REGISTRY
+from web.rate_limiter import background_priority
+
+FRESH = 'fresh'
+STALE = 'stale'
+EXPIRED = 'expired'
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+class StaleWhileRevalidateCache:
+    """
+    Кэш результатов запросов погоды по ключу локации.
+
+    Свежая запись отдается сразу. Устаревшая запись (не старше stale_ttl после истечения ttl)
+    тоже отдается сразу, а обновление запускается в фоне. Если API недоступен, отдается
+    последняя известная запись не старше stale_if_error после истечения ttl.
+    """
+
+    def __init__(self, maxsize=4096, stale_ttl=600.0, stale_if_error=3600.0, refresh_workers=4, clock=time.time):
+        self.maxsize = maxsize
+        self.stale_ttl = stale_ttl
+        self.stale_if_error = stale_if_error
+        self._clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._refresh_executor = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix='forecast-refresh')
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.stale_errors = 0
+
+    def _lookup(self, key, now):
+        """
+        :return: Пара (состояние записи, запись) или (None, None), если записи нет.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, None
+            self._data.move_to_end(key)
+            value, fetched_at, ttl = entry
+            age = now - fetched_at
+            if age < ttl:
+                self.hits += 1
+                return FRESH, entry
+            if age < ttl + self.stale_ttl:
+                self.stale_hits += 1
+                return STALE, entry
+            self.misses += 1
+            return EXPIRED, entry
+
+    def _store(self, key, value, ttl):
+        # Отсутствие данных не кэшируем, чтобы следующий запрос повторил попытку
+        if value is None:
+            return
+        if callable(ttl):
+            ttl = ttl(value)
+        with self._lock:
+            self._data[key] = (value, self._clock(), ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def _fallback(self, entry, now, error):
+        # Ответ на ошибку API: последняя известная запись, если она не слишком старая
+        if entry is not None and now - entry[1] < entry[2] + self.stale_if_error:
+            with self._lock:
+                self.stale_errors += 1
+            print(f"Используются устаревшие данные из-за ошибки API: {error}")
+            return entry[0]
+        raise error
+
+    def _start_refresh(self, key):
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            self.refreshes += 1
+        return True
+
+    def _finish_refresh(self, key):
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def get_or_fetch(self, key, ttl, fetch, *args):
+        """
+        Возвращает значение из кэша или получает его вызовом fetch(*args).
+
+        :param key: Ключ записи, например (endpoint, location_key).
+        :param ttl: Время свежести записи в секундах или функция ttl(value), вычисляющая его
+                    по полученному значению.
+        :param fetch: Функция получения данных из API.
+        :return: Значение из кэша или результат fetch.
+        """
+        now = self._clock()
+        state, entry = self._lookup(key, now)
+        if state == FRESH:
+            return entry[0]
+        if state == STALE:
+            if self._start_refresh(key):
+                self._refresh_executor.submit(self._refresh, key, ttl, fetch, args)
+            return entry[0]
+
+        try:
+            value = fetch(*args)
+        except Exception as e:
+            return self._fallback(entry, now, e)
+        self._store(key, value, ttl)
+        return value
+
+    def _refresh(self, key, ttl, fetch, args):
+        try:
+            # Фоновые обновления уступают лимит запросов промахам кэша
+            with background_priority():
+                value = fetch(*args)
+            self._store(key, value, ttl)
+        except Exception as e:
+            print(f"Ошибка фонового обновления кэша прогноза {key}: {e}")
+        finally:
+            self._finish_refresh(key)
+
+    async def get_or_fetch_async(self, key, ttl, fetch, *args):
+        """
+        Асинхронный вариант get_or_fetch: fetch должна быть асинхронной функцией,
+        фоновое обновление выполняется в общем цикле событий (см. http_client.get_async_loop).
+        """
+        now = self._clock()
+        state, entry = self._lookup(key, now)
+        if state == FRESH:
+            return entry[0]
+        if state == STALE:
+            if self._start_refresh(key):
+                # Цикл событий запроса может закрыться сразу после ответа вместе с незавершенными задачами,
+                # поэтому обновление не привязывается к нему
+                asyncio.run_coroutine_threadsafe(self._refresh_async(key, ttl, fetch, args), get_async_loop())
+            return entry[0]
+
+        try:
+            value = await fetch(*args)
+        except Exception as e:
+            return self._fallback(entry, now, e)
+        self._store(key, value, ttl)
+        return value
+
+    async def _refresh_async(self, key, ttl, fetch, args):
+        try:
+            with background_priority():
+                value = await fetch(*args)
+            self._store(key, value, ttl)
+        except Exception as e:
+            print(f"Ошибка фонового обновления кэша прогноза {key}: {e}")
+        finally:
+            self._finish_refresh(key)
+
+    def expires_in(self, key):
+        """
+        :return: Сколько секунд запись останется свежей (отрицательное число для устаревшей)
+                 или None, если записи нет.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+        if entry is None:
+            return None
+        _, fetched_at, ttl = entry
+        return fetched_at + ttl - self._clock()
+
+    def refresh(self, key, ttl, fetch, *args):
+        """
+        Обновляет запись вызовом fetch(*args), не дожидаясь обращения к ней.
+
+        :return: True, если обновление выполнено; False, если запись уже обновляется.
+        :raises Exception: Ошибка fetch передается вызывающему коду.
+        """
+        if not self._start_refresh(key):
+            return False
+        try:
+            self._store(key, fetch(*args), ttl)
+        finally:
+            self._finish_refresh(key)
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.stale_hits = self.misses = self.refreshes = self.stale_errors = 0
+
+    def stats(self):
+        """
+        :return: Словарь со счетчиками попаданий, устаревших ответов, промахов и размером кэша.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+                "stale_errors": self.stale_errors,
+                "size": len(self._data),
+            }
+
+
+def current_conditions_ttl():
+    return float(os.getenv('WEATHER_CURRENT_CONDITIONS_TTL', '300'))
+
+
+def forecast_ttl():
+    return float(os.getenv('WEATHER_FORECAST_TTL', '1800'))
+
+
+def create_forecast_cache():
+    """
+    Создает кэш результатов по настройкам окружения.
+
+    :return: Экземпляр StaleWhileRevalidateCache.
+    """
+    return StaleWhileRevalidateCache(
+        maxsize=int(os.getenv('WEATHER_FORECAST_CACHE_SIZE', '4096')),
+        stale_ttl=float(os.getenv('WEATHER_STALE_TTL', '600')),
+        stale_if_error=float(os.getenv('WEATHER_STALE_IF_ERROR', '3600')),
+    )
+
+
+def get_forecast_cache():
+    """
+    :return: Общий для процесса кэш результатов запросов погоды.
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = create_forecast_cache()
+    return _cache
+
+
+def reset_forecast_cache():
+    """
+    Сбрасывает общий кэш; следующий будет создан с актуальными настройками.
+    """
+    global _cache
+    with _cache_lock:
+        _cache = None
+
+
+def _collect_metrics():
+    if _cache is None:
+        return []
+    stats = _cache.stats()
+    results = ('hits', 'stale_hits', 'misses', 'refreshes', 'stale_errors')
+    return [
+        ('weather_forecast_cache_events_total', 'counter', "Обращения к кэшу результатов запросов погоды",
+         {(('result', result),): stats[result] for result in results}),
+        ('weather_forecast_cache_entries', 'gauge', "Число записей в кэше результатов", {(): stats['size']}),
+    ]
+
+
+REGISTRY.add_collector(_collect_metrics)
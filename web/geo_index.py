@@ -0,0 +1,257 @@
+import argparse
+import csv
+import json
+import math
+import os
+import sqlite3
+import threading
+
+from web.config import load_environment
+from web.metrics import REGISTRY, Counter
+
+# Средний радиус Земли и длина одного градуса широты в километрах
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+
+_index = None
+_index_lock = threading.Lock()
+
+GEO_LOOKUPS = REGISTRY.register(Counter(
+    'weather_geo_index_lookups_total', "Поиск ключа локации по координатам в локальном геоиндексе", ('result',)))
+
+
+def haversine_km(latitude1, longitude1, latitude2, longitude2):
+    """
+    :return: Расстояние между двумя точками по поверхности Земли в километрах.
+    """
+    phi1, phi2 = math.radians(latitude1), math.radians(latitude2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(longitude2 - longitude1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GeoStore:
+    """
+    Постоянное хранилище известных локаций на SQLite.
+    """
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS geo_locations (location_key TEXT PRIMARY KEY,"
+                " latitude REAL NOT NULL, longitude REAL NOT NULL, name TEXT)"
+            )
+
+    def load(self):
+        """
+        :return: Список (широта, долгота, ключ локации, название).
+        """
+        with self._lock:
+            return self._connection.execute(
+                "SELECT latitude, longitude, location_key, name FROM geo_locations"
+            ).fetchall()
+
+    def save(self, rows):
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO geo_locations (latitude, longitude, location_key, name) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+class GeoIndex:
+    """
+    Пространственный индекс известных локаций на равномерной сетке.
+
+    Сторона ячейки не меньше радиуса поиска, поэтому ближайшая локация в пределах радиуса
+    находится среди соседних ячеек и поиск не зависит от общего числа локаций.
+    """
+
+    def __init__(self, radius_km=3.0, store=None):
+        self.radius_km = radius_km
+        self.cell_degrees = max(radius_km / KM_PER_DEGREE, 0.001)
+        self._store = store
+        self._cells = {}
+        self._keys = {}
+        self._lock = threading.Lock()
+        if store is not None:
+            for latitude, longitude, location_key, name in store.load():
+                self._insert(latitude, longitude, location_key, name)
+
+    def _cell(self, latitude, longitude):
+        return math.floor(latitude / self.cell_degrees), math.floor(longitude / self.cell_degrees)
+
+    def _insert(self, latitude, longitude, location_key, name):
+        with self._lock:
+            previous = self._keys.pop(location_key, None)
+            if previous is not None:
+                self._cells[self._cell(previous[0], previous[1])].remove(previous)
+            entry = (latitude, longitude, location_key, name)
+            self._keys[location_key] = entry
+            self._cells.setdefault(self._cell(latitude, longitude), []).append(entry)
+
+    def add(self, latitude, longitude, location_key, name=None):
+        """
+        Добавляет локацию в индекс и в постоянное хранилище.
+
+        :param latitude: Широта локации.
+        :param longitude: Долгота локации.
+        :param location_key: Ключ локации AccuWeather.
+        :param name: Название локации.
+        """
+        self.add_many([(latitude, longitude, location_key, name)])
+
+    def add_many(self, rows):
+        """
+        Добавляет несколько локаций одной транзакцией хранилища.
+
+        :param rows: Последовательность (широта, долгота, ключ локации, название).
+        :return: Число добавленных локаций.
+        """
+        rows = [(float(latitude), float(longitude), str(location_key), name)
+                for latitude, longitude, location_key, name in rows]
+        for row in rows:
+            self._insert(*row)
+        if self._store is not None and rows:
+            self._store.save(rows)
+        return len(rows)
+
+    def nearest(self, latitude, longitude):
+        """
+        Ищет ближайшую известную локацию в пределах радиуса.
+
+        :return: Пара (ключ локации, расстояние в км) или None.
+        """
+        row, column = self._cell(latitude, longitude)
+        # Ячейки по долготе сужаются к полюсам, поэтому по долготе просматривается больше соседей
+        cos_latitude = max(math.cos(math.radians(latitude)), 0.01)
+        span = min(math.ceil(1 / cos_latitude), int(360 / self.cell_degrees))
+
+        best = None
+        with self._lock:
+            for d_row in (-1, 0, 1):
+                for d_column in range(-span, span + 1):
+                    for entry in self._cells.get((row + d_row, column + d_column), ()):
+                        distance = haversine_km(latitude, longitude, entry[0], entry[1])
+                        if distance <= self.radius_km and (best is None or distance < best[1]):
+                            best = (entry[2], distance)
+        return best
+
+    def lookup(self, latitude, longitude):
+        """
+        :return: Ключ ближайшей локации в пределах радиуса или None; некорректные координаты дают None.
+        """
+        try:
+            latitude, longitude = float(latitude), float(longitude)
+        except (TypeError, ValueError):
+            return None
+        match = self.nearest(latitude, longitude)
+        GEO_LOOKUPS.inc('hit' if match else 'miss')
+        return match[0] if match else None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._keys)
+
+
+def location_position(data, latitude, longitude):
+    """
+    Координаты локации из ответа API; если их нет, используются координаты запроса.
+
+    :param data: Ответ API с описанием локации.
+    :return: Пара (широта, долгота).
+    """
+    position = data.get('GeoPosition') or {}
+    if 'Latitude' in position and 'Longitude' in position:
+        return position['Latitude'], position['Longitude']
+    return latitude, longitude
+
+
+def create_geo_index():
+    """
+    Создает геоиндекс по настройкам окружения. Если задан WEATHER_GEO_INDEX_PATH,
+    локации сохраняются в SQLite и загружаются при следующем запуске.
+
+    :return: Экземпляр GeoIndex.
+    """
+    path = os.getenv('WEATHER_GEO_INDEX_PATH')
+    return GeoIndex(
+        radius_km=float(os.getenv('WEATHER_GEO_RADIUS_KM', '3')),
+        store=GeoStore(path) if path else None,
+    )
+
+
+def get_geo_index():
+    """
+    :return: Общий для процесса геоиндекс.
+    """
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = create_geo_index()
+    return _index
+
+
+def reset_geo_index():
+    """
+    Сбрасывает общий геоиндекс; следующий будет создан с актуальными настройками.
+    """
+    global _index
+    with _index_lock:
+        _index = None
+
+
+def read_locations(path):
+    """
+    Читает список локаций для импорта.
+
+    Поддерживаются CSV с колонками key, latitude, longitude и необязательной name,
+    а также JSON в формате ответа AccuWeather (список объектов с Key, LocalizedName и GeoPosition).
+
+    :param path: Путь к файлу.
+    :return: Список (широта, долгота, ключ локации, название).
+    """
+    with open(path, encoding='utf-8') as file:
+        if path.endswith('.json'):
+            return [(item['GeoPosition']['Latitude'], item['GeoPosition']['Longitude'], item['Key'],
+                     item.get('LocalizedName')) for item in json.load(file)]
+        return [(row['latitude'], row['longitude'], row['key'], row.get('name')) for row in csv.DictReader(file)]
+
+
+def _collect_metrics():
+    if _index is None:
+        return []
+    return [('weather_geo_index_entries', 'gauge', "Число локаций в локальном геоиндексе", {(): len(_index)})]
+
+
+REGISTRY.add_collector(_collect_metrics)
+
+
+def main():
+    # Путь к геоиндексу может быть задан в .env
+    load_environment()
+    parser = argparse.ArgumentParser(description="Импорт списка городов в локальный геоиндекс")
+    parser.add_argument('files', nargs='+', help="CSV (key,latitude,longitude[,name]) или JSON в формате AccuWeather")
+    parser.add_argument('--db', default=os.getenv('WEATHER_GEO_INDEX_PATH'),
+                        help="Файл SQLite геоиндекса (по умолчанию WEATHER_GEO_INDEX_PATH)")
+    args = parser.parse_args()
+    if not args.db:
+        parser.error("Укажите файл геоиндекса через --db или WEATHER_GEO_INDEX_PATH")
+
+    store = GeoStore(args.db)
+    index = GeoIndex(store=store)
+    imported = sum(index.add_many(read_locations(path)) for path in args.files)
+    store.close()
+    print(f"Импортировано локаций: {imported}, всего в индексе: {len(index)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,310 @@
+import asyncio
+import os
+import threading
+import time
+import weakref
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from web.circuit_breaker import get_breaker
+from web.metrics import endpoint_name, observe_upstream
+from web.rate_limiter import get_rate_limiter
+
+# Адрес API AccuWeather по умолчанию
+DEFAULT_BASE_URL = 'http://dataservice.accuweather.com'
+
+# Коды ответов, при которых запрос имеет смысл повторить
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Сетевые ошибки, при которых запрос повторяется
+RETRY_EXCEPTIONS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+
+# Коды ответов, которые предохранитель считает отказом API
+FAILURE_STATUS_CODES = (500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+
+# Асинхронный клиент привязан к циклу событий, поэтому храним по одному клиенту на цикл
+_async_clients = weakref.WeakKeyDictionary()
+
+# Долгоживущий цикл событий для асинхронных запросов приложения создается при первом обращении
+_async_loop = None
+_async_loop_lock = threading.Lock()
+
+
+def _env_float(name, default):
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def _env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def get_base_url():
+    """
+    Возвращает базовый адрес API (можно переопределить через WEATHER_API_BASE_URL).
+
+    :return: Базовый адрес без завершающего слэша.
+    """
+    return os.getenv('WEATHER_API_BASE_URL', DEFAULT_BASE_URL).rstrip('/')
+
+
+def get_timeout():
+    """
+    Возвращает пару таймаутов (подключение, чтение) в секундах.
+
+    :return: Кортеж (connect_timeout, read_timeout).
+    """
+    return (_env_float('WEATHER_HTTP_CONNECT_TIMEOUT', 3.05),
+            _env_float('WEATHER_HTTP_READ_TIMEOUT', 10.0))
+
+
+def create_session(pool_connections=None, pool_maxsize=None):
+    """
+    Создает сессию с пулом соединений. Повторы запросов выполняет get: каждая попытка
+    должна получить разрешение ограничителя запросов, поэтому адаптер сам запросы не повторяет.
+
+    :param pool_connections: Количество пулов (хостов), которые хранит адаптер.
+    :param pool_maxsize: Максимальное число соединений в пуле одного хоста.
+    :return: Настроенный экземпляр requests.Session.
+    """
+    if pool_connections is None:
+        pool_connections = _env_int('WEATHER_HTTP_POOL_CONNECTIONS', 4)
+    if pool_maxsize is None:
+        pool_maxsize = _env_int('WEATHER_HTTP_POOL_MAXSIZE', 32)
+
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0)
+
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def retry_settings():
+    """
+    :return: Кортеж (максимальное число повторов для 5xx/429 и сетевых ошибок,
+             коэффициент экспоненциальной задержки между повторами,
+             предельная задержка перед повтором в секундах).
+    """
+    return (_env_int('WEATHER_HTTP_MAX_RETRIES', 2), _env_float('WEATHER_HTTP_BACKOFF_FACTOR', 0.3),
+            _env_float('WEATHER_HTTP_BACKOFF_MAX', 5.0))
+
+
+def get_session():
+    """
+    Возвращает общую для процесса сессию, создавая ее при первом обращении.
+
+    :return: Экземпляр requests.Session.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+
+def reset_session():
+    """
+    Закрывает общую сессию; следующая сессия будет создана с актуальными настройками.
+    """
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+def get(path, params=None):
+    """
+    Выполняет GET-запрос к API через общую сессию с повторами для 5xx/429 и сетевых ошибок.
+    Если API просит подождать (Retry-After) дольше WEATHER_HTTP_BACKOFF_MAX, повтора нет:
+    возвращается полученный ответ, чтобы поток не блокировался.
+
+    :param path: Путь относительно базового адреса API (например, '/locations/v1/...').
+    :param params: Параметры строки запроса.
+    :return: Объект requests.Response.
+    :raises CircuitOpenError: Если предохранитель метода API разомкнут.
+    :raises RateLimitExceeded: Если ограничитель не выдал ключ API для очередной попытки.
+    """
+    endpoint = endpoint_name(path)
+    # Пока API недоступен, запрос отклоняется сразу, не занимая поток ожиданием сети и не расходуя лимит
+    breaker = get_breaker(endpoint)
+    breaker.allow()
+
+    session = get_session()
+    limiter = get_rate_limiter()
+    max_retries, backoff_factor, backoff_max = retry_settings()
+    started = time.perf_counter()
+    attempt = 0
+    while True:
+        # Каждая попытка расходует запрос из лимита и суточной квоты, поэтому ключ запрашивается для каждой
+        api_key = limiter.acquire()
+        try:
+            response = session.get(f"{get_base_url()}{path}", params=dict(params or {}, apikey=api_key),
+                                   timeout=get_timeout())
+        except requests.exceptions.RequestException as e:
+            if attempt >= max_retries or not isinstance(e, RETRY_EXCEPTIONS):
+                observe_upstream(endpoint, 'error', time.perf_counter() - started, attempt)
+                breaker.record_failure()
+                raise
+            delay = _retry_delay(None, attempt, backoff_factor, backoff_max)
+        else:
+            if response.status_code == 429:
+                limiter.report_throttled(api_key, _retry_after(response))
+            retry = response.status_code in RETRY_STATUS_CODES and attempt < max_retries
+            delay = _retry_delay(response, attempt, backoff_factor, backoff_max) if retry else None
+            if delay is None:
+                observe_upstream(endpoint, response.status_code, time.perf_counter() - started, attempt)
+                _record_outcome(breaker, response)
+                return response
+        time.sleep(delay)
+        attempt += 1
+
+
+def _record_outcome(breaker, response):
+    if response.status_code in FAILURE_STATUS_CODES:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+
+
+def _retry_after(response):
+    retry_after = response.headers.get('Retry-After') if response is not None else None
+    return float(retry_after) if retry_after and retry_after.isdigit() else None
+
+
+def create_async_client(max_connections=None, max_keepalive_connections=None):
+    """
+    Создает асинхронный клиент с ограничением числа соединений.
+
+    :param max_connections: Максимальное число одновременных соединений.
+    :param max_keepalive_connections: Максимальное число соединений, удерживаемых в пуле.
+    :return: Экземпляр httpx.AsyncClient.
+    """
+    if max_connections is None:
+        max_connections = _env_int('WEATHER_HTTP_ASYNC_MAX_CONNECTIONS', 100)
+    if max_keepalive_connections is None:
+        max_keepalive_connections = _env_int('WEATHER_HTTP_POOL_MAXSIZE', 32)
+    # httpx нужен только асинхронному пути, а его импорт заметно замедляет запуск процесса
+    import httpx
+
+    connect_timeout, read_timeout = get_timeout()
+    return httpx.AsyncClient(
+        base_url=get_base_url(),
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive_connections),
+        timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+    )
+
+
+def get_async_client():
+    """
+    Возвращает асинхронный клиент текущего цикла событий, создавая его при первом обращении.
+
+    :return: Экземпляр httpx.AsyncClient.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = create_async_client()
+    return client
+
+
+def get_async_loop():
+    """
+    Возвращает общий цикл событий, работающий в фоновом потоке, запуская его при первом обращении.
+
+    :return: Экземпляр asyncio.AbstractEventLoop.
+    """
+    global _async_loop
+    if _async_loop is None:
+        with _async_loop_lock:
+            if _async_loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name='weather-async', daemon=True).start()
+                _async_loop = loop
+    return _async_loop
+
+
+def run_async(coroutine):
+    """
+    Выполняет сопрограмму в общем цикле событий (см. get_async_loop).
+
+    Flask выполняет каждое асинхронное представление в собственном цикле событий и закрывает
+    его после ответа, поэтому клиент такого цикла не переиспользует соединения между запросами.
+    В общем цикле все запросы к API идут через один клиент с общим пулом и лимитом соединений.
+
+    :param coroutine: Сопрограмма, например вызов функции из web.async_requests.
+    :return: Future текущего цикла событий с результатом сопрограммы; его отмена отменяет и сопрограмму.
+    """
+    return asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coroutine, get_async_loop()))
+
+
+async def close_async_client():
+    """
+    Закрывает асинхронный клиент текущего цикла событий.
+    """
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def _retry_delay(response, attempt, backoff_factor, backoff_max):
+    # После 429 ключ приостановлен в ограничителе: следующая попытка сразу возьмет другой ключ,
+    # а если других нет, ограничитель сам подождет окончания паузы в пределах max_wait
+    if response is not None and response.status_code == 429:
+        return 0.0
+    retry_after = _retry_after(response)
+    if retry_after is not None:
+        # Ждать дольше предела нельзя: поток пула занят до конца ожидания, поэтому повтора не будет
+        return retry_after if retry_after <= backoff_max else None
+    return min(backoff_factor * (2 ** attempt), backoff_max)
+
+
+async def async_get(path, params=None):
+    """
+    Выполняет асинхронный GET-запрос к API с повторами для 5xx/429 и сетевых ошибок.
+
+    :param path: Путь относительно базового адреса API.
+    :param params: Параметры строки запроса.
+    :return: Объект httpx.Response.
+    :raises CircuitOpenError: Если предохранитель метода API разомкнут.
+    """
+    import httpx
+
+    endpoint = endpoint_name(path)
+    breaker = get_breaker(endpoint)
+    breaker.allow()
+
+    client = get_async_client()
+    limiter = get_rate_limiter()
+    max_retries, backoff_factor, backoff_max = retry_settings()
+    started = time.perf_counter()
+    attempt = 0
+    while True:
+        # Каждая попытка расходует запрос из лимита, поэтому ключ запрашивается для каждой
+        api_key = await limiter.acquire_async()
+        try:
+            response = await client.get(path, params=dict(params or {}, apikey=api_key))
+        except httpx.TransportError:
+            if attempt >= max_retries:
+                observe_upstream(endpoint, 'error', time.perf_counter() - started, attempt)
+                breaker.record_failure()
+                raise
+            delay = _retry_delay(None, attempt, backoff_factor, backoff_max)
+        else:
+            if response.status_code == 429:
+                limiter.report_throttled(api_key, _retry_after(response))
+            retry = response.status_code in RETRY_STATUS_CODES and attempt < max_retries
+            delay = _retry_delay(response, attempt, backoff_factor, backoff_max) if retry else None
+            if delay is None:
+                observe_upstream(endpoint, response.status_code, time.perf_counter() - started, attempt)
+                _record_outcome(breaker, response)
+                return response
+        await asyncio.sleep(delay)
+        attempt += 1
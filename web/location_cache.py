@@ -0,0 +1,100 @@
+import os
+import threading
+
+from web.cache import SQLiteStore, TTLCache
+from web.metrics import REGISTRY
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def normalize_address(address):
+    """
+    Приводит адрес к каноническому виду: без лишних пробелов и без учета регистра.
+
+    :param address: Адрес, введенный пользователем.
+    :return: Нормализованная строка адреса.
+    """
+    return ' '.join(address.split()).casefold()
+
+
+def coordinate_precision():
+    """
+    :return: Число знаков после запятой, до которого округляются координаты (2 знака ~ 1 км).
+    """
+    return int(os.getenv('WEATHER_COORDINATE_PRECISION', '2'))
+
+
+def name_cache_key(address):
+    return f"name:{normalize_address(address)}"
+
+
+def coordinates_cache_key(latitude, longitude, precision=None):
+    """
+    Формирует ключ кэша для координат, округляя их до заданной точности.
+
+    :param latitude: Широта (число или строка).
+    :param longitude: Долгота (число или строка).
+    :param precision: Число знаков после запятой; по умолчанию берется из окружения.
+    :return: Ключ кэша или None, если координаты не являются числами.
+    """
+    if precision is None:
+        precision = coordinate_precision()
+    try:
+        latitude = round(float(latitude), precision)
+        longitude = round(float(longitude), precision)
+    except (TypeError, ValueError):
+        return None
+    # Избавляемся от отрицательного нуля, чтобы -0.0 и 0.0 попадали в одну ячейку
+    return f"geo:{latitude + 0.0:.{precision}f},{longitude + 0.0:.{precision}f}"
+
+
+def create_location_cache():
+    """
+    Создает кэш ключей локаций по настройкам окружения.
+    Если задан WEATHER_LOCATION_CACHE_PATH, кэш дополнительно хранится в SQLite.
+
+    :return: Экземпляр TTLCache.
+    """
+    path = os.getenv('WEATHER_LOCATION_CACHE_PATH')
+    store = SQLiteStore(path, table='location_keys') if path else None
+    return TTLCache(
+        maxsize=int(os.getenv('WEATHER_LOCATION_CACHE_SIZE', '2048')),
+        ttl=float(os.getenv('WEATHER_LOCATION_CACHE_TTL', str(7 * 24 * 3600))),
+        store=store,
+    )
+
+
+def get_location_cache():
+    """
+    :return: Общий для процесса кэш ключей локаций.
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = create_location_cache()
+    return _cache
+
+
+def reset_location_cache():
+    """
+    Сбрасывает общий кэш; следующий будет создан с актуальными настройками.
+    """
+    global _cache
+    with _cache_lock:
+        _cache = None
+
+
+def _collect_metrics():
+    if _cache is None:
+        return []
+    stats = _cache.stats()
+    return [
+        ('weather_location_cache_events_total', 'counter', "Обращения к кэшу ключей локаций",
+         {(('result', result),): stats[result] for result in ('hits', 'misses', 'evictions')}),
+        ('weather_location_cache_entries', 'gauge', "Число записей в кэше ключей локаций", {(): stats['size']}),
+    ]
+
+
+REGISTRY.add_collector(_collect_metrics)
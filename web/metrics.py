@@ -0,0 +1,191 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Границы корзин гистограмм задержек в секундах
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Counter:
+    """
+    Монотонный счетчик с метками.
+    """
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    """
+    Гистограмма с фиксированными корзинами и метками.
+    Для каждой комбинации меток хранится список счетчиков корзин, сумма и количество.
+    """
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # Последняя корзина соответствует +Inf
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def count(self, *labels):
+        state = self._values.get(labels)
+        return state[2] if state else 0
+
+    @contextmanager
+    def time(self, *labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, (list(state[0]), state[1], state[2])) for labels, state in self._values.items())
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                bucket_labels = _format_labels(self.labelnames + ('le',), labels + (le,))
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {total}")
+            lines.append(f"{self.name}_count{label_text} {count}")
+        return lines
+
+
+class Registry:
+    """
+    Набор метрик и функций, собирающих значения (например, статистику кэшей) в момент выгрузки.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        """
+        :param collector: Функция без аргументов, возвращающая список кортежей (имя, тип, описание, {метки: значение}).
+        """
+        self._collectors.append(collector)
+
+    def render(self):
+        """
+        :return: Все метрики в текстовом формате Prometheus.
+        """
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for name, metric_type, documentation, samples in collector():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                for labels, value in samples.items():
+                    names = tuple(label_name for label_name, _ in labels)
+                    values = tuple(label_value for _, label_value in labels)
+                    lines.append(f"{name}{_format_labels(names, values)} {value}")
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+UPSTREAM_LATENCY = REGISTRY.register(Histogram(
+    'weather_upstream_request_duration_seconds', "Длительность запросов к API AccuWeather", ('endpoint',)))
+UPSTREAM_RESPONSES = REGISTRY.register(Counter(
+    'weather_upstream_responses_total', "Ответы API AccuWeather по кодам состояния", ('endpoint', 'status')))
+UPSTREAM_RETRIES = REGISTRY.register(Counter(
+    'weather_upstream_retries_total', "Повторные запросы к API AccuWeather", ('endpoint',)))
+STAGE_LATENCY = REGISTRY.register(Histogram(
+    'weather_stage_duration_seconds', "Длительность этапов обработки запросов", ('stage',)))
+
+
+def endpoint_name(path):
+    """
+    Короткое имя эндпоинта API для меток метрик.
+
+    :param path: Путь запроса, например '/forecasts/v1/daily/1day/294021'.
+    :return: Имя эндпоинта: autocomplete, geoposition, currentconditions, forecast или other.
+    """
+    if path.startswith('/currentconditions/'):
+        return 'currentconditions'
+    if path.startswith('/forecasts/'):
+        return 'forecast'
+    if path.endswith('/autocomplete'):
+        return 'autocomplete'
+    if path.endswith('/geoposition/search'):
+        return 'geoposition'
+    return 'other'
+
+
+def observe_upstream(endpoint, status, seconds, retries=0):
+    """
+    Учитывает один запрос к API: длительность, код ответа и число повторов.
+
+    :param endpoint: Имя эндпоинта (см. endpoint_name).
+    :param status: Код ответа или 'error' при сетевой ошибке.
+    :param seconds: Длительность запроса вместе с повторами.
+    :param retries: Число выполненных повторов.
+    """
+    UPSTREAM_LATENCY.observe(seconds, endpoint)
+    UPSTREAM_RESPONSES.inc(endpoint, str(status))
+    if retries:
+        UPSTREAM_RETRIES.inc(endpoint, amount=retries)
+
+
+def stage(name):
+    """
+    Контекстный менеджер, измеряющий длительность этапа обработки запроса.
+
+    :param name: Имя этапа, например 'resolve_location' или 'render'.
+    """
+    return STAGE_LATENCY.time(name)
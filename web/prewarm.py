@@ -0,0 +1,245 @@
+import heapq
+import os
+import threading
+
+from web.forecast_cache import get_forecast_cache
+from web.metrics import REGISTRY, Counter
+from web.rate_limiter import background_priority
+
+_tracker = None
+_tracker_lock = threading.Lock()
+
+_prewarmer = None
+_prewarmer_lock = threading.Lock()
+
+PREWARM_EVENTS = REGISTRY.register(Counter(
+    'weather_prewarm_refreshes_total', "Упреждающие обновления кэша популярных локаций", ('result',)))
+
+
+class PopularityTracker:
+    """
+    Частота запросов по ключам локаций. Счетчики периодически уменьшаются (decay),
+    поэтому популярность отражает недавний трафик, а редкие локации со временем забываются.
+    """
+
+    def __init__(self, min_count=0.01):
+        self.min_count = min_count
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def record(self, location_key, weight=1.0):
+        with self._lock:
+            self._counts[location_key] = self._counts.get(location_key, 0.0) + weight
+
+    def decay(self, factor):
+        """
+        Умножает все счетчики на factor и удаляет локации со счетчиком меньше min_count.
+        """
+        with self._lock:
+            self._counts = {key: count * factor for key, count in self._counts.items()
+                            if count * factor >= self.min_count}
+
+    def top(self, n):
+        """
+        :return: Список не более чем n самых популярных ключей локаций.
+        """
+        with self._lock:
+            return heapq.nlargest(n, self._counts, key=self._counts.get)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._counts)
+
+
+class Prewarmer:
+    """
+    Фоновое обновление кэша для самых популярных локаций.
+
+    Раз в interval секунд для top_n локаций обновляются записи, свежесть которых истекает
+    в ближайшие lead секунд (или которых нет в кэше), чтобы пользователь не ждал запроса к API.
+    За минуту выполняется не больше budget запросов к API; запросы идут с низким приоритетом
+    и не расходуют резерв ограничителя, оставленный для промахов кэша.
+    """
+
+    def __init__(self, jobs, tracker, cache=None, top_n=20, budget=30, interval=30.0, lead=None,
+                 half_life=3600.0, resolve=None, seed=()):
+        """
+        :param jobs: Список (endpoint, функция TTL, fetch(location_key)); ключ записи кэша - (endpoint, location_key).
+        :param tracker: PopularityTracker с частотой запросов.
+        :param cache: Кэш результатов; по умолчанию общий кэш процесса.
+        :param resolve: Функция получения ключа локации по адресу для начального списка.
+        :param seed: Адреса или ключи локаций, которые прогреваются при запуске.
+        """
+        self.jobs = list(jobs)
+        self.tracker = tracker
+        self._cache = cache
+        self.top_n = top_n
+        self.budget = budget
+        self.interval = interval
+        self.lead = lead if lead is not None else 2 * interval
+        self.decay_factor = 0.5 ** (interval / half_life) if half_life else 1.0
+        self._resolve = resolve
+        self._seed = list(seed)
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def cache(self):
+        return self._cache if self._cache is not None else get_forecast_cache()
+
+    def seed(self):
+        """
+        Добавляет локации из начального списка в число популярных. Строка из одних цифр
+        считается ключом локации, остальные строки - адресами.
+        """
+        for item in self._seed:
+            location_key = item if item.isdigit() or self._resolve is None else self._resolve(item)
+            if location_key:
+                self.tracker.record(location_key)
+        self._seed = []
+
+    def due(self):
+        """
+        :return: Список (endpoint, location_key, ttl, fetch) для записей, которые пора обновить,
+                 начиная с самых популярных локаций и самых скоро истекающих записей.
+        """
+        due = []
+        for rank, location_key in enumerate(self.tracker.top(self.top_n)):
+            for endpoint, ttl, fetch in self.jobs:
+                expires_in = self.cache.expires_in((endpoint, location_key))
+                if expires_in is None or expires_in <= self.lead:
+                    due.append((rank, expires_in if expires_in is not None else float('-inf'),
+                                endpoint, location_key, ttl(), fetch))
+        due.sort(key=lambda item: item[:2])
+        return [item[2:] for item in due]
+
+    def tick(self):
+        """
+        Выполняет один цикл обновления в пределах бюджета запросов.
+
+        :return: Число выполненных обновлений.
+        """
+        with background_priority():
+            self.seed()
+            allowance = max(int(self.budget * self.interval / 60), 1)
+            due = self.due()
+            refreshed = 0
+            for endpoint, location_key, ttl, fetch in due[:allowance]:
+                try:
+                    if self.cache.refresh((endpoint, location_key), ttl, fetch, location_key):
+                        refreshed += 1
+                        PREWARM_EVENTS.inc('ok')
+                except Exception as e:
+                    PREWARM_EVENTS.inc('error')
+                    print(f"Ошибка упреждающего обновления {endpoint} для {location_key}: {e}")
+            if len(due) > allowance:
+                PREWARM_EVENTS.inc('over_budget', amount=len(due) - allowance)
+        self.tracker.decay(self.decay_factor)
+        return refreshed
+
+    def run(self):
+        while not self._stop.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"Ошибка упреждающего обновления кэша: {e}")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name='weather-prewarm', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def get_tracker():
+    """
+    :return: Общий для процесса счетчик популярности локаций.
+    """
+    global _tracker
+    if _tracker is None:
+        with _tracker_lock:
+            if _tracker is None:
+                _tracker = PopularityTracker()
+    return _tracker
+
+
+def record_location(location_key):
+    """
+    Учитывает запрос погоды для локации при выборе популярных локаций.
+    """
+    get_tracker().record(location_key)
+
+
+def read_seed_file(path):
+    """
+    Читает начальный список локаций: по одному адресу или ключу локации в строке,
+    пустые строки и строки, начинающиеся с '#', пропускаются.
+
+    :param path: Путь к файлу.
+    :return: Список строк.
+    """
+    with open(path, encoding='utf-8') as file:
+        return [line.strip() for line in file if line.strip() and not line.lstrip().startswith('#')]
+
+
+def create_prewarmer(jobs, resolve=None):
+    """
+    Создает планировщик по настройкам окружения.
+
+    :param jobs: Список (endpoint, функция TTL, fetch) для каждой обновляемой записи локации.
+    :param resolve: Функция получения ключа локации по адресу.
+    :return: Экземпляр Prewarmer.
+    """
+    seed_path = os.getenv('WEATHER_PREWARM_SEED')
+    interval = float(os.getenv('WEATHER_PREWARM_INTERVAL', '30'))
+    lead = os.getenv('WEATHER_PREWARM_LEAD')
+    return Prewarmer(
+        jobs,
+        get_tracker(),
+        top_n=int(os.getenv('WEATHER_PREWARM_TOP_N', '20')),
+        budget=int(os.getenv('WEATHER_PREWARM_BUDGET', '30')),
+        interval=interval,
+        lead=float(lead) if lead else None,
+        half_life=float(os.getenv('WEATHER_PREWARM_HALF_LIFE', '3600')),
+        resolve=resolve,
+        seed=read_seed_file(seed_path) if seed_path else (),
+    )
+
+
+def start_prewarmer(jobs, resolve=None):
+    """
+    Запускает общий для процесса планировщик, если он еще не запущен
+    и не отключен через WEATHER_PREWARM_TOP_N=0.
+
+    :return: Запущенный Prewarmer или None.
+    """
+    global _prewarmer
+    with _prewarmer_lock:
+        if _prewarmer is None and int(os.getenv('WEATHER_PREWARM_TOP_N', '20')) > 0:
+            _prewarmer = create_prewarmer(jobs, resolve)
+            _prewarmer.start()
+        return _prewarmer
+
+
+def stop_prewarmer():
+    global _prewarmer
+    with _prewarmer_lock:
+        if _prewarmer is not None:
+            _prewarmer.stop()
+        _prewarmer = None
+
+
+def _collect_metrics():
+    if _tracker is None:
+        return []
+    return [('weather_prewarm_tracked_locations', 'gauge', "Число локаций, для которых учитывается популярность",
+             {(): len(_tracker)})]
+
+
+REGISTRY.add_collector(_collect_metrics)
@@ -0,0 +1,313 @@
+import asyncio
+import contextvars
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from web.config import load_environment
+from web.metrics import REGISTRY, Counter
+
+# Приоритеты запросов к API: промахи кэша пользователя важнее фоновых обновлений
+HIGH = 'high'
+LOW = 'low'
+
+_priority = contextvars.ContextVar('weather_request_priority', default=HIGH)
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+LIMITER_EVENTS = REGISTRY.register(Counter(
+    'weather_rate_limiter_events_total', "Решения ограничителя запросов к API", ('priority', 'result')))
+
+
+class RateLimitExceeded(RuntimeError):
+    """
+    Запрос к API не может быть выполнен без превышения лимитов ключей.
+    """
+
+
+class QuotaExceeded(RateLimitExceeded):
+    """
+    Суточная квота всех ключей API исчерпана.
+    """
+
+
+@contextmanager
+def background_priority():
+    """
+    Помечает запросы к API внутри блока как фоновые (низкий приоритет).
+    """
+    token = _priority.set(LOW)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority():
+    return _priority.get()
+
+
+def _utc_day(now):
+    return datetime.fromtimestamp(now, timezone.utc).strftime('%Y-%m-%d')
+
+
+def _key_id(api_key):
+    # В общем хранилище ключи не сохраняются в открытом виде
+    return hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:16]
+
+
+def _refill(state, now, rate, capacity):
+    """
+    Пополняет корзину токенов на момент now и сбрасывает суточный счетчик в начале нового дня (UTC).
+
+    :param state: Кортеж (токены, время обновления, день, использовано за день, пауза до) или None.
+    :return: Обновленное состояние.
+    """
+    day = _utc_day(now)
+    if state is None:
+        return capacity, now, day, 0, 0.0
+    tokens, updated, state_day, used, paused_until = state
+    tokens = min(capacity, tokens + (now - updated) * rate)
+    if state_day != day:
+        state_day, used = day, 0
+    return tokens, now, state_day, used, paused_until
+
+
+def _decide(state, now, rate, capacity, daily_quota, reserve, priority):
+    """
+    Решает, можно ли выполнить запрос, и расходует токен и единицу квоты, если можно.
+
+    :return: Тройка (новое состояние, разрешено ли, сколько секунд ждать; None - ждать бесполезно).
+    """
+    tokens, _, state_day, used, paused_until = _refill(state, now, rate, capacity)
+
+    # Фоновые запросы не расходуют резерв корзины и суточной квоты
+    token_floor = capacity * reserve if priority == LOW else 0.0
+    quota_limit = daily_quota * (1 - reserve) if priority == LOW else daily_quota
+
+    if daily_quota and used >= quota_limit:
+        return (tokens, now, state_day, used, paused_until), False, None
+    if paused_until > now:
+        return (tokens, now, state_day, used, paused_until), False, paused_until - now
+    if tokens - 1 < token_floor:
+        return (tokens, now, state_day, used, paused_until), False, (token_floor + 1 - tokens) / rate
+    return (tokens - 1, now, state_day, used + 1, paused_until), True, 0.0
+
+
+class MemoryStore:
+    """
+    Состояние лимитов в памяти процесса.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states = {}
+
+    def update(self, key_id, fn):
+        with self._lock:
+            state, *result = fn(self._states.get(key_id))
+            self._states[key_id] = state
+        return result
+
+
+class SQLiteLimiterStore:
+    """
+    Состояние лимитов в файле SQLite, общем для нескольких процессов на одной машине.
+    Каждое решение принимается в транзакции BEGIN IMMEDIATE, которая блокирует файл на запись.
+    """
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits (key_id TEXT PRIMARY KEY, tokens REAL, updated REAL,"
+            " day TEXT, used INTEGER, paused_until REAL)"
+        )
+
+    def update(self, key_id, fn):
+        with self._lock:
+            cursor = self._connection.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                row = cursor.execute(
+                    "SELECT tokens, updated, day, used, paused_until FROM rate_limits WHERE key_id = ?", (key_id,)
+                ).fetchone()
+                state, *result = fn(tuple(row) if row else None)
+                cursor.execute("INSERT OR REPLACE INTO rate_limits VALUES (?, ?, ?, ?, ?, ?)", (key_id, *state))
+                cursor.execute("COMMIT")
+            except BaseException:
+                cursor.execute("ROLLBACK")
+                raise
+        return result
+
+
+class RateLimiter:
+    """
+    Ограничитель запросов к API: корзина токенов и суточная квота для каждого ключа.
+    Ключи используются по очереди, следующий ключ берется, если у текущего нет токенов или квоты.
+    """
+
+    def __init__(self, api_keys, rate=10.0, burst=None, daily_quota=0, reserve=0.2, max_wait=2.0, store=None,
+                 clock=time.time):
+        if not api_keys:
+            raise ValueError("API ключ не установлен. Пожалуйста, проверьте ваш .env файл.")
+        self.api_keys = list(api_keys)
+        self.rate = rate
+        self.capacity = burst if burst else max(rate, 1.0)
+        self.daily_quota = daily_quota
+        self.reserve = reserve
+        self.max_wait = max_wait
+        self._store = store or MemoryStore()
+        self._clock = clock
+        self._next = 0
+        self._next_lock = threading.Lock()
+
+    def _key_order(self):
+        with self._next_lock:
+            start = self._next
+            self._next = (self._next + 1) % len(self.api_keys)
+        return self.api_keys[start:] + self.api_keys[:start]
+
+    def try_acquire(self, priority=HIGH):
+        """
+        Пытается получить разрешение на один запрос без ожидания.
+
+        :param priority: HIGH или LOW.
+        :return: Пара (ключ API или None, сколько секунд ждать до следующей попытки).
+        :raises QuotaExceeded: Если суточная квота исчерпана у всех ключей.
+        """
+        now = self._clock()
+        waits = []
+        for api_key in self._key_order():
+            granted, wait = self._store.update(
+                _key_id(api_key),
+                lambda state: _decide(state, now, self.rate, self.capacity, self.daily_quota, self.reserve, priority),
+            )
+            if granted:
+                return api_key, 0.0
+            if wait is not None:
+                waits.append(wait)
+        if not waits:
+            LIMITER_EVENTS.inc(priority, 'quota_exceeded')
+            raise QuotaExceeded("Суточная квота запросов к API исчерпана.")
+        return None, min(waits)
+
+    def acquire(self, priority=None):
+        """
+        Возвращает ключ API для запроса, при необходимости ожидая пополнения токенов.
+        Фоновые запросы не ждут: при нехватке токенов они сразу получают отказ.
+
+        :param priority: HIGH или LOW; по умолчанию берется из контекста (см. background_priority).
+        :return: Ключ API.
+        :raises RateLimitExceeded: Если разрешение не получено за max_wait секунд.
+        """
+        priority = priority or current_priority()
+        deadline = self._clock() + self.max_wait
+        while True:
+            api_key, wait = self.try_acquire(priority)
+            if api_key is not None:
+                LIMITER_EVENTS.inc(priority, 'granted')
+                return api_key
+            if priority == LOW or self._clock() + wait > deadline:
+                LIMITER_EVENTS.inc(priority, 'rejected')
+                raise RateLimitExceeded("Превышен лимит запросов к API. Пожалуйста, попробуйте позже.")
+            LIMITER_EVENTS.inc(priority, 'waited')
+            time.sleep(wait)
+
+    async def acquire_async(self, priority=None):
+        """
+        Асинхронный вариант acquire: ожидание не блокирует цикл событий.
+        """
+        priority = priority or current_priority()
+        deadline = self._clock() + self.max_wait
+        while True:
+            api_key, wait = self.try_acquire(priority)
+            if api_key is not None:
+                LIMITER_EVENTS.inc(priority, 'granted')
+                return api_key
+            if priority == LOW or self._clock() + wait > deadline:
+                LIMITER_EVENTS.inc(priority, 'rejected')
+                raise RateLimitExceeded("Превышен лимит запросов к API. Пожалуйста, попробуйте позже.")
+            LIMITER_EVENTS.inc(priority, 'waited')
+            await asyncio.sleep(wait)
+
+    def report_throttled(self, api_key, retry_after=None):
+        """
+        Приостанавливает ключ после ответа 429, чтобы следующие запросы шли через другие ключи.
+
+        :param api_key: Ключ, получивший ответ 429.
+        :param retry_after: Пауза в секундах из заголовка Retry-After.
+        """
+        now = self._clock()
+        pause = retry_after if retry_after is not None else 1.0 / self.rate
+
+        def pause_key(state):
+            tokens, updated, day, used, paused_until = _refill(state, now, self.rate, self.capacity)
+            return (tokens, updated, day, used, max(paused_until, now + pause)),
+
+        self._store.update(_key_id(api_key), pause_key)
+
+
+def api_keys_from_environment():
+    """
+    :return: Список ключей из WEATHER_API_KEYS (через запятую) или из WEATHER_API_KEY.
+    """
+    keys = os.getenv('WEATHER_API_KEYS') or os.getenv('WEATHER_API_KEY') or ''
+    return [key.strip() for key in keys.split(',') if key.strip()]
+
+
+def require_api_keys():
+    """
+    :return: Список ключей API из окружения (с учетом файла .env).
+    :raises ValueError: Если ни один ключ не задан.
+    """
+    load_environment()
+    keys = api_keys_from_environment()
+    if not keys:
+        raise ValueError("API ключ не установлен. Пожалуйста, проверьте ваш .env файл.")
+    return keys
+
+
+def create_rate_limiter():
+    """
+    Создает ограничитель по настройкам окружения. Если задан WEATHER_RATE_LIMIT_DB,
+    лимиты хранятся в SQLite и действуют на все процессы, использующие этот файл.
+
+    :return: Экземпляр RateLimiter.
+    :raises ValueError: Если ключ API не задан.
+    """
+    keys = require_api_keys()
+    path = os.getenv('WEATHER_RATE_LIMIT_DB')
+    rate = float(os.getenv('WEATHER_RATE_LIMIT', '10'))
+    return RateLimiter(
+        keys,
+        rate=rate,
+        burst=float(os.getenv('WEATHER_RATE_BURST', '0')) or None,
+        daily_quota=int(os.getenv('WEATHER_DAILY_QUOTA', '0')),
+        reserve=float(os.getenv('WEATHER_LOW_PRIORITY_RESERVE', '0.2')),
+        max_wait=float(os.getenv('WEATHER_RATE_MAX_WAIT', '2')),
+        store=SQLiteLimiterStore(path) if path else None,
+    )
+
+
+def get_rate_limiter():
+    """
+    :return: Общий для процесса ограничитель запросов к API.
+    """
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = create_rate_limiter()
+    return _limiter
+
+
+def reset_rate_limiter():
+    global _limiter
+    with _limiter_lock:
+        _limiter = None
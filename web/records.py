@@ -0,0 +1,99 @@
+import time
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+
+@dataclass(frozen=True, slots=True)
+class CurrentConditions:
+    """
+    Текущая погода в локации.
+    """
+    location_key: Optional[str]
+    fetched_at: float
+    temperature: float
+    weather_text: str
+
+
+@dataclass(frozen=True, slots=True)
+class DailyForecast:
+    """
+    Дневной прогноз в метрических единицах: температура в °C, ветер в км/ч, осадки в процентах.
+    Дата дня прогноза хранится в формате ГГГГ-ММ-ДД, если она есть в ответе API.
+    """
+    location_key: Optional[str]
+    fetched_at: float
+    min_temperature: float
+    max_temperature: float
+    wind_speed: float
+    precipitation_probability: int
+    date: Optional[str] = None
+
+
+@dataclass(frozen=True, slots=True)
+class ForecastSeries:
+    """
+    Многодневный прогноз для локации, полученный одним запросом.
+
+    Первый день ряда - день, действовавший в момент запроса. epochs - начала дней
+    (EpochDate из ответа API): когда наступает начало следующего дня, ряд сдвигается
+    и днем 0 становится следующий день, поэтому кэшированный ряд остается пригодным
+    до обновления без повторного запроса.
+    """
+    location_key: Optional[str]
+    fetched_at: float
+    days: tuple
+    epochs: tuple = ()
+
+    def offset(self, now=None):
+        """
+        :param now: Момент времени в секундах Unix; по умолчанию текущий.
+        :return: Сколько дней ряда уже прошло после запроса.
+        """
+        now = time.time() if now is None else now
+        return sum(1 for epoch in self.epochs[1:] if self.fetched_at < epoch <= now)
+
+    def day(self, index, now=None):
+        """
+        :param index: Номер дня, начиная с 0 для текущего дня.
+        :return: Запись DailyForecast или None, если этого дня в ряду нет.
+        """
+        position = index + self.offset(now)
+        if index < 0 or position >= len(self.days):
+            return None
+        return self.days[position]
+
+    def next_rollover(self):
+        """
+        :return: Момент начала следующего дня прогноза или None, если даты дней неизвестны.
+        """
+        return min((epoch for epoch in self.epochs if epoch > self.fetched_at), default=None)
+
+
+@dataclass(frozen=True, slots=True)
+class WeatherReport:
+    """
+    Оценка погоды в точке маршрута: данные прогноза, итоговые выводы и все сработавшие причины.
+
+    Поддерживает обращение по ключу (report['weather_summary']), как прежний словарь.
+    """
+    location_key: Optional[str]
+    fetched_at: float
+    min_temperature: float
+    max_temperature: float
+    wind_speed: float
+    precipitation_probability: int
+    temperature_summary: Optional[str]
+    wind_summary: Optional[str]
+    precipitation_summary: Optional[str]
+    weather_summary: str
+    reasons: tuple = ()
+    date: Optional[str] = None
+
+    def __getitem__(self, name):
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            raise KeyError(name) from None
+
+    def to_dict(self):
+        return asdict(self)
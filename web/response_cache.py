@@ -0,0 +1,151 @@
+import hashlib
+import os
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from urllib.parse import urlencode
+
+from web.cache import TTLCache
+from web.forecast_cache import get_forecast_cache
+from web.metrics import REGISTRY
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+@dataclass(frozen=True, slots=True)
+class RenderedPage:
+    """
+    Готовый ответ проверки погоды: тело, тип содержимого и ETag, под которым он отдавался.
+    """
+    etag: str
+    body: bytes
+    mimetype: str
+    expires_at: float
+
+
+def canonical_query(start_point, end_point, day=0):
+    """
+    Канонические параметры запроса проверки погоды: для точки указывается адрес без лишних
+    пробелов либо координаты, пустые поля и номер дня 0 опускаются, порядок параметров постоянный.
+    Одинаковые проверки получают один URL и попадают в одну запись HTTP-кэшей.
+
+    :param start_point: Кортеж (адрес, широта, долгота) начальной точки.
+    :param end_point: Кортеж (адрес, широта, долгота) конечной точки.
+    :param day: Номер дня прогноза.
+    :return: Строка запроса без '?'.
+    """
+    params = []
+    for prefix, (address, latitude, longitude) in (('start', start_point), ('end', end_point)):
+        address = ' '.join((address or '').split())
+        if address:
+            params.append((f'{prefix}_address', address))
+        elif latitude or longitude:
+            params.append((f'{prefix}_latitude', _canonical_number(latitude)))
+            params.append((f'{prefix}_longitude', _canonical_number(longitude)))
+    if day:
+        params.append(('day', str(day)))
+    return urlencode(params)
+
+
+def _canonical_number(value):
+    try:
+        return str(float(value))
+    except (TypeError, ValueError):
+        return (value or '').strip()
+
+
+@lru_cache(maxsize=64)
+def _file_fingerprint(path, mtime):
+    with open(path, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()[:12]
+
+
+def file_fingerprint(path):
+    """
+    :return: Короткий хэш содержимого файла (пересчитывается при изменении файла) или None, если файла нет.
+    """
+    try:
+        return _file_fingerprint(path, os.stat(path).st_mtime_ns)
+    except OSError:
+        return None
+
+
+@lru_cache(maxsize=8)
+def _rules_fingerprint(rules):
+    return hashlib.sha256(repr(rules).encode('utf-8')).hexdigest()[:12]
+
+
+def weather_etag(kind, day, reports, rules=(), version=''):
+    """
+    ETag результата проверки погоды. Он меняется только вместе с данными прогноза, правилами
+    оценки или версией шаблона. В ETag входят все поля оценки, а не только время получения
+    прогноза: после смены дня кэшированный ряд отдает следующий день с тем же fetched_at.
+
+    :param kind: Вид ответа ('html' или 'json').
+    :param day: Номер дня прогноза.
+    :param reports: Записи WeatherReport для точек маршрута.
+    :param rules: Правила движка оценки.
+    :param version: Версия представления, например отпечаток шаблона.
+    :return: Значение ETag без кавычек.
+    """
+    parts = [kind, str(day), _rules_fingerprint(tuple(rules)), version or '']
+    parts.extend(repr(report) for report in reports)
+    return hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest()[:32]
+
+
+def forecast_freshness(location_keys):
+    """
+    :param location_keys: Ключи локаций, данные которых входят в ответ.
+    :return: Сколько целых секунд ответ останется свежим: минимум по свежести прогнозов в кэше.
+    """
+    cache = get_forecast_cache()
+    remaining = [cache.expires_in(('forecast', location_key)) for location_key in location_keys]
+    if not remaining or None in remaining:
+        return 0
+    return max(int(min(remaining)), 0)
+
+
+def create_page_cache():
+    """
+    Создает кэш готовых ответов по настройкам окружения; срок жизни каждой записи
+    задается при сохранении по свежести прогнозов.
+
+    :return: Экземпляр TTLCache.
+    """
+    return TTLCache(maxsize=int(os.getenv('WEATHER_PAGE_CACHE_SIZE', '256')), ttl=60.0)
+
+
+def get_page_cache():
+    """
+    :return: Общий для процесса кэш готовых ответов проверки погоды.
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = create_page_cache()
+    return _cache
+
+
+def reset_page_cache():
+    """
+    Сбрасывает общий кэш готовых ответов.
+    """
+    global _cache
+    with _cache_lock:
+        _cache = None
+
+
+def _collect_metrics():
+    if _cache is None:
+        return []
+    stats = _cache.stats()
+    return [
+        ('weather_page_cache_events_total', 'counter', "Обращения к кэшу готовых ответов проверки погоды",
+         {(('result', result),): stats[result] for result in ('hits', 'misses', 'evictions')}),
+        ('weather_page_cache_entries', 'gauge', "Число записей в кэше готовых ответов", {(): stats['size']}),
+    ]
+
+
+REGISTRY.add_collector(_collect_metrics)
@@ -0,0 +1,174 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError, as_completed
+
+from web.basic_requests import (FAVORABLE_SUMMARY, UNFAVORABLE_SUMMARY, get_location_key_by_coordinates,
+                                get_location_key_by_name, get_weather_by_location_key)
+from web.location_cache import coordinates_cache_key, name_cache_key
+from web.rules import get_rule_engine
+
+# Пул ограничивает число одновременных запросов к API при обработке маршрутов
+_route_executor = None
+_route_executor_lock = threading.Lock()
+
+
+def max_waypoints():
+    """
+    :return: Максимальное число точек маршрута в одном запросе.
+    """
+    return int(os.getenv('WEATHER_ROUTE_MAX_POINTS', '50'))
+
+
+def get_route_executor():
+    """
+    :return: Общий пул обработки маршрутов размером WEATHER_ROUTE_WORKERS, создается при первом обращении.
+    """
+    global _route_executor
+    if _route_executor is None:
+        with _route_executor_lock:
+            if _route_executor is None:
+                _route_executor = ThreadPoolExecutor(max_workers=int(os.getenv('WEATHER_ROUTE_WORKERS', '8')),
+                                                     thread_name_prefix='route-weather')
+    return _route_executor
+
+
+def parse_waypoint(item):
+    """
+    Приводит точку маршрута к виду (адрес, широта, долгота).
+
+    Некорректная точка отклоняется до обращения к API, чтобы не расходовать на нее квоту.
+
+    :param item: Строка с адресом или словарь с ключом 'address' либо 'latitude' и 'longitude'.
+    :return: Кортеж (address, latitude, longitude); координаты приводятся к float.
+    :raises ValueError: Если адрес пустой или не строка, а координаты не числа или вне допустимого диапазона.
+    """
+    if isinstance(item, str):
+        if not item.strip():
+            raise ValueError("Адрес точки маршрута не может быть пустым.")
+        return item, None, None
+    if not isinstance(item, dict):
+        raise ValueError("Точка маршрута должна быть адресом или объектом с координатами.")
+    address = item.get('address')
+    if address is not None and not isinstance(address, str):
+        raise ValueError("Адрес точки маршрута должен быть строкой.")
+    if address and address.strip():
+        return address, None, None
+    latitude, longitude = item.get('latitude'), item.get('longitude')
+    if latitude is None or longitude is None:
+        raise ValueError("Для точки маршрута нужно указать адрес или широту и долготу.")
+    return None, _parse_coordinate(latitude, 90), _parse_coordinate(longitude, 180)
+
+
+def _parse_coordinate(value, limit):
+    # bool - подкласс int, но True в качестве координаты - ошибка ввода
+    if isinstance(value, bool):
+        raise ValueError("Координаты точки маршрута должны быть числами.")
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError("Координаты точки маршрута должны быть числами.") from None
+    # Сравнение ложно и для NaN
+    if not -limit <= number <= limit:
+        raise ValueError(f"Координата точки маршрута должна быть в диапазоне от -{limit} до {limit}.")
+    return number
+
+
+def waypoint_key(address, latitude, longitude):
+    """
+    Ключ для дедупликации точек: одинаковые адреса и близкие координаты дают один ключ.
+    """
+    if address:
+        return name_cache_key(address)
+    return coordinates_cache_key(latitude, longitude) or f"raw:{latitude},{longitude}"
+
+
+def _resolve(address, latitude, longitude):
+    if address:
+        return get_location_key_by_name(address)
+    return get_location_key_by_coordinates(latitude, longitude)
+
+
+def check_route_weather(waypoints, deadline=None, day=0):
+    """
+    Проверяет погоду во всех точках маршрута.
+
+    Одинаковые и близкие точки обрабатываются один раз, ключи локаций и прогнозы
+    запрашиваются параллельно; число одновременных запросов ограничено пулом потоков.
+    Полученные прогнозы оцениваются движком правил за один векторный проход.
+
+    :param waypoints: Список точек маршрута (см. parse_waypoint).
+    :param deadline: Момент time.monotonic(), к которому обработка должна завершиться.
+    :param day: Номер дня прогноза для всех точек (0 - сегодня).
+    :return: Словарь со сводкой по каждой точке и общим выводом по маршруту.
+    """
+    if not isinstance(waypoints, list) or not waypoints:
+        raise ValueError("Маршрут не содержит точек.")
+    limit = max_waypoints()
+    if len(waypoints) > limit:
+        raise ValueError(f"Маршрут не может содержать больше {limit} точек.")
+
+    points = [parse_waypoint(item) for item in waypoints]
+    keys = [waypoint_key(*point) for point in points]
+
+    def remaining():
+        return None if deadline is None else max(deadline - time.monotonic(), 0)
+
+    executor = get_route_executor()
+
+    # Ключи локаций для уникальных точек; прогноз для каждой новой локации запрашивается сразу после ее определения
+    key_futures = {}
+    for key, point in zip(keys, points):
+        if key not in key_futures:
+            key_futures[key] = executor.submit(_resolve, *point)
+    future_keys = {future: key for key, future in key_futures.items()}
+
+    location_keys = {}
+    weather_futures = {}
+    for future in as_completed(future_keys, timeout=remaining()):
+        try:
+            location_key = future.result()
+        except RuntimeError as e:
+            # Недоступность API при определении ключа - ошибка только этой точки
+            location_key = e
+        location_keys[future_keys[future]] = location_key
+        if location_key and not isinstance(location_key, RuntimeError) and location_key not in weather_futures:
+            weather_futures[location_key] = executor.submit(get_weather_by_location_key, location_key, day)
+
+    weather = {}
+    forecasts = {}
+    for location_key, future in weather_futures.items():
+        try:
+            forecasts[location_key] = future.result(timeout=remaining())
+        except FuturesTimeoutError:
+            raise
+        except Exception as e:
+            # Ошибка одной точки не должна прерывать обработку всего маршрута
+            weather[location_key] = e
+    weather.update(zip(forecasts, get_rule_engine().reports(forecasts.values())))
+
+    results = []
+    favorable = True
+    for index, (item, key) in enumerate(zip(waypoints, keys)):
+        location_key = location_keys[key]
+        point = {"index": index, "input": item, "location_key": location_key, "weather": None, "error": None}
+        if isinstance(location_key, RuntimeError):
+            point["location_key"] = None
+            point["error"] = str(location_key)
+        elif not location_key:
+            point["error"] = "Не удалось определить местоположение точки."
+        elif isinstance(weather[location_key], Exception):
+            point["error"] = str(weather[location_key])
+        else:
+            point["weather"] = weather[location_key]
+        if point["error"] or point["weather"]["weather_summary"] != FAVORABLE_SUMMARY:
+            favorable = False
+        results.append(point)
+
+    return {
+        "points": results,
+        "day": day,
+        "unique_locations": len(weather_futures),
+        "favorable": favorable,
+        "verdict": FAVORABLE_SUMMARY if favorable else UNFAVORABLE_SUMMARY,
+    }
@@ -0,0 +1,216 @@
+import json
+import operator
+import os
+import threading
+from dataclasses import dataclass
+
+from web.records import WeatherReport
+
+# Итоговые оценки погоды в точке
+FAVORABLE_SUMMARY = "Погода благоприятная"
+UNFAVORABLE_SUMMARY = "Погода неблагоприятная"
+
+# Поля прогноза, по которым можно задавать правила
+FIELDS = ('min_temperature', 'max_temperature', 'wind_speed', 'precipitation_probability')
+
+# Операторы сравнения: скалярный вариант для одной точки и имя функции NumPy для массивов.
+# NumPy импортируется только при векторной оценке, чтобы запросы по одной точке не платили за его загрузку
+OPERATORS = {
+    '<': (operator.lt, 'less'),
+    '<=': (operator.le, 'less_equal'),
+    '>': (operator.gt, 'greater'),
+    '>=': (operator.ge, 'greater_equal'),
+}
+
+# Категории правил, для которых в оценке есть отдельное поле
+SUMMARY_FIELDS = {
+    'temperature': 'temperature_summary',
+    'wind': 'wind_summary',
+    'precipitation': 'precipitation_summary',
+}
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+@dataclass(frozen=True, slots=True)
+class Rule:
+    """
+    Условие неблагоприятной погоды: значение поля прогноза сравнивается с порогом.
+    """
+    name: str
+    field: str
+    op: str
+    threshold: float
+    message: str
+    category: str = ''
+
+    def __post_init__(self):
+        if self.field not in FIELDS:
+            raise ValueError(f"Правило {self.name}: неизвестное поле {self.field}.")
+        if self.op not in OPERATORS:
+            raise ValueError(f"Правило {self.name}: неизвестный оператор {self.op}.")
+
+
+DEFAULT_RULES = (
+    Rule('frost', 'min_temperature', '<', 0, "Температура неблагоприятная", 'temperature'),
+    Rule('heat', 'max_temperature', '>', 35, "Температура неблагоприятная", 'temperature'),
+    Rule('strong_wind', 'wind_speed', '>', 50, "Сильный ветер", 'wind'),
+    Rule('precipitation', 'precipitation_probability', '>', 70, "Высокая вероятность осадков", 'precipitation'),
+)
+
+
+class RuleEngine:
+    """
+    Проверяет прогнозы по всем правилам и возвращает все сработавшие причины.
+
+    Одна точка проверяется обычными сравнениями, набор точек - одним проходом NumPy
+    по колонкам прогнозов: число операций над массивами равно числу разных операторов
+    в правилах и не зависит от числа точек.
+    """
+
+    def __init__(self, rules=DEFAULT_RULES):
+        self.rules = tuple(rules)
+        self._plan = None
+        self._outcomes = {}
+
+    def triggered(self, forecast):
+        """
+        :param forecast: Запись DailyForecast.
+        :return: Кортеж сработавших правил.
+        """
+        return tuple(rule for rule in self.rules
+                     if OPERATORS[rule.op][0](getattr(forecast, rule.field), rule.threshold))
+
+    def evaluate_columns(self, values):
+        """
+        Проверяет все правила для массива прогнозов.
+
+        :param values: Массив формы (число точек, len(FIELDS)) со значениями полей в порядке FIELDS;
+                       NaN означает отсутствие значения, такое правило не срабатывает.
+        :return: Булев массив формы (число точек, число правил).
+        """
+        import numpy as np
+
+        columns, thresholds, groups = self._vector_plan()
+        operands = values[:, columns]
+        triggered = np.zeros(operands.shape, dtype=bool)
+        for compare, indices in groups:
+            triggered[:, indices] = compare(operands[:, indices], thresholds[indices])
+        return triggered
+
+    def report(self, forecast):
+        """
+        :param forecast: Запись DailyForecast.
+        :return: Запись WeatherReport со всеми сработавшими причинами.
+        """
+        return _build_report(forecast, self._outcome(self.triggered(forecast)))
+
+    def reports(self, forecasts):
+        """
+        Оценивает набор прогнозов одним векторным проходом.
+
+        :param forecasts: Последовательность записей DailyForecast.
+        :return: Список записей WeatherReport в том же порядке.
+        """
+        forecasts = list(forecasts)
+        if not forecasts:
+            return []
+        import numpy as np
+
+        values = np.array(list(map(_field_values, forecasts)), dtype=float)
+        triggered = self.evaluate_columns(values)
+        # Различных сочетаний сработавших правил немного, выводы считаются один раз для каждого.
+        # Строки упаковываются в байты: сравнение одномерного массива намного быстрее np.unique(axis=0)
+        packed = np.packbits(triggered, axis=1, bitorder='little')
+        _, first, inverse = np.unique(packed.view(np.dtype((np.void, packed.shape[1]))).ravel(),
+                                      return_index=True, return_inverse=True)
+        outcomes = [self._outcome(tuple(rule for rule, hit in zip(self.rules, triggered[index]) if hit))
+                    for index in first]
+        return [_build_report(forecast, outcomes[index]) for forecast, index in zip(forecasts, inverse.ravel())]
+
+    def _vector_plan(self):
+        """
+        :return: Кортеж (номера колонок правил, пороги, группы правил по функциям сравнения NumPy),
+                 строится при первой векторной оценке.
+        """
+        plan = self._plan
+        if plan is None:
+            import numpy as np
+
+            field_index = {field: index for index, field in enumerate(FIELDS)}
+            columns = np.array([field_index[rule.field] for rule in self.rules], dtype=np.intp)
+            thresholds = np.array([rule.threshold for rule in self.rules], dtype=float)
+            groups = [(getattr(np, OPERATORS[op][1]),
+                       np.array([index for index, rule in enumerate(self.rules) if rule.op == op], dtype=np.intp))
+                      for op in sorted({rule.op for rule in self.rules})]
+            plan = self._plan = (columns, thresholds, groups)
+        return plan
+
+    def _outcome(self, rules):
+        """
+        :param rules: Кортеж сработавших правил.
+        :return: Кортеж (вывод по температуре, ветру, осадкам, итоговая оценка, причины).
+        """
+        outcome = self._outcomes.get(rules)
+        if outcome is not None:
+            return outcome
+        summaries = dict.fromkeys(SUMMARY_FIELDS.values())
+        for rule in rules:
+            field = SUMMARY_FIELDS.get(rule.category)
+            if field and summaries[field] is None:
+                summaries[field] = rule.message
+        reasons = tuple(dict.fromkeys(rule.message for rule in rules))
+        outcome = self._outcomes[rules] = (*summaries.values(), UNFAVORABLE_SUMMARY if rules else FAVORABLE_SUMMARY,
+                                           reasons)
+        return outcome
+
+
+_field_values = operator.attrgetter(*FIELDS)
+
+
+def _build_report(forecast, outcome):
+    return WeatherReport(forecast.location_key, forecast.fetched_at, forecast.min_temperature,
+                         forecast.max_temperature, forecast.wind_speed, forecast.precipitation_probability, *outcome,
+                         date=forecast.date)
+
+
+def load_rules(path):
+    """
+    Читает правила из JSON-файла: список объектов с полями name, field, op, threshold, message
+    и необязательным category.
+
+    :param path: Путь к файлу.
+    :return: Кортеж правил.
+    """
+    with open(path, encoding='utf-8') as file:
+        return tuple(Rule(**item) for item in json.load(file))
+
+
+def create_rule_engine():
+    """
+    Создает движок правил. Если задан WEATHER_RULES_PATH, правила читаются из файла,
+    иначе используются правила по умолчанию.
+
+    :return: Экземпляр RuleEngine.
+    """
+    path = os.getenv('WEATHER_RULES_PATH')
+    return RuleEngine(load_rules(path) if path else DEFAULT_RULES)
+
+
+def get_rule_engine():
+    """
+    :return: Общий для процесса движок правил.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_rule_engine()
+    return _engine
+
+
+def reset_rule_engine():
+    global _engine
+    with _engine_lock:
+        _engine = None
@@ -0,0 +1,76 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """
+    Объединяет одновременные одинаковые вызовы: пока вызов с данным ключом выполняется,
+    остальные потоки с тем же ключом не отправляют свой запрос, а ждут и получают его результат.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.shared = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Выполняет fn(*args, **kwargs) не более одного раза одновременно для каждого ключа.
+
+        :param key: Ключ вызова, например (endpoint, location_key).
+        :param fn: Вызываемая функция.
+        :return: Результат fn; исключение fn передается всем ожидающим.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.shared += 1
+                leader = False
+            else:
+                future = self._calls[key] = Future()
+                leader = True
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+class AsyncSingleFlight:
+    """
+    Вариант SingleFlight для корутин в пределах одного цикла событий.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self.shared = 0
+
+    async def do(self, key, fn, *args, **kwargs):
+        """
+        Выполняет await fn(*args, **kwargs) не более одного раза одновременно для каждого ключа.
+
+        :param key: Ключ вызова.
+        :param fn: Асинхронная функция.
+        :return: Результат fn.
+        """
+        loop = asyncio.get_running_loop()
+        call_key = (loop, key)
+        task = self._calls.get(call_key)
+        if task is not None:
+            self.shared += 1
+        else:
+            task = self._calls[call_key] = loop.create_task(fn(*args, **kwargs))
+            task.add_done_callback(lambda _: self._calls.pop(call_key, None))
+        # shield: отмена одного из ожидающих не должна отменять общий запрос
+        return await asyncio.shield(task)
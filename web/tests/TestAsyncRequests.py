@@ -0,0 +1,139 @@
+import asyncio
+import os
+import threading
+import unittest
+from unittest.mock import patch
+
+import httpx
+
+from web import async_requests, http_client
+from web.app import app
+from web.circuit_breaker import reset_breakers
+from web.forecast_cache import reset_forecast_cache
+from web.geo_index import reset_geo_index
+from web.location_cache import reset_location_cache
+
+CURRENT_CONDITIONS = [{'Temperature': {'Metric': {'Value': 20.5}}, 'WeatherText': 'Солнечно'}]
+DAILY_FORECAST = {
+    'DailyForecasts': [{
+        'Temperature': {'Minimum': {'Value': 50.0}, 'Maximum': {'Value': 77.0}},
+        'Day': {'Wind': {'Speed': {'Value': 10.0}}, 'PrecipitationProbability': 30},
+    }]
+}
+
+
+def make_client(handler):
+    return lambda: httpx.AsyncClient(base_url='http://accuweather.test', transport=httpx.MockTransport(handler))
+
+
+def run(coroutine):
+    async def wrapper():
+        try:
+            return await coroutine
+        finally:
+            await http_client.close_async_client()
+    return asyncio.run(wrapper())
+
+
+class TestAsyncRequests(unittest.TestCase):
+    def setUp(self):
+        reset_location_cache()
+        reset_forecast_cache()
+        reset_breakers()
+        reset_geo_index()
+
+    def test_check_weather_by_location_key(self):
+        def handler(request):
+            if request.url.path.startswith('/currentconditions/'):
+                return httpx.Response(200, json=CURRENT_CONDITIONS)
+            return httpx.Response(200, json=DAILY_FORECAST)
+
+        with patch('web.http_client.create_async_client', make_client(handler)):
+            result = run(async_requests.check_weather_by_location_key('294021'))
+        self.assertEqual(result['min_temperature'], 10.0)
+        self.assertEqual(result['max_temperature'], 25.0)
+        self.assertEqual(result['weather_summary'], "Погода благоприятная")
+
+    @patch.dict(os.environ, {'WEATHER_HTTP_BACKOFF_FACTOR': '0'})
+    def test_retry_on_server_error(self):
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            if len(calls) == 1:
+                return httpx.Response(503)
+            return httpx.Response(200, json=[{'Key': '294021'}])
+
+        with patch('web.http_client.create_async_client', make_client(handler)):
+            location_key = run(async_requests.get_location_key_by_name('Москва'))
+        self.assertEqual(location_key, '294021')
+        self.assertEqual(len(calls), 2)
+
+    def test_network_error(self):
+        def handler(request):
+            raise httpx.ConnectError("Network Error")
+
+        with patch.dict(os.environ, {'WEATHER_HTTP_MAX_RETRIES': '0'}), \
+                patch('web.http_client.create_async_client', make_client(handler)):
+            with self.assertRaises(RuntimeError):
+                run(async_requests.get_current_conditions_by_location_key('294021'))
+
+    @patch('web.async_requests.check_weather_by_location_key')
+    @patch('web.async_requests.get_location_key_by_name')
+    def test_async_route(self, mock_get_key, mock_check_weather):
+        async def location_key(address):
+            return f"key-{address}"
+
+        async def weather(key, day=0):
+            return {"weather_summary": f"Погода благоприятная ({key})"}
+
+        mock_get_key.side_effect = location_key
+        mock_check_weather.side_effect = weather
+
+        response = app.test_client().post('/check-weather-async', data={'start_address': 'Москва', 'end_address': 'Тверь'})
+        body = response.get_data(as_text=True)
+        self.assertIn('key-Москва', body)
+        self.assertIn('key-Тверь', body)
+
+    @patch('web.async_requests.check_weather_by_location_key')
+    @patch('web.async_requests.get_location_key_by_name')
+    def test_async_route_shares_client(self, mock_get_key, mock_check_weather):
+        clients = set()
+
+        async def location_key(address):
+            clients.add(http_client.get_async_client())
+            return f"key-{address}"
+
+        async def weather(key, day=0):
+            return {"weather_summary": f"Погода благоприятная ({key})"}
+
+        mock_get_key.side_effect = location_key
+        mock_check_weather.side_effect = weather
+
+        client = app.test_client()
+        for _ in range(3):
+            client.post('/check-weather-async', data={'start_address': 'Москва', 'end_address': 'Тверь'})
+        # Все запросы выполняются в общем цикле событий и используют один пул соединений
+        self.assertEqual(len(clients), 1)
+
+    @patch.dict(os.environ, {'WEATHER_REQUEST_DEADLINE': '0.05'})
+    @patch('web.async_requests.get_location_key_by_name')
+    def test_async_route_deadline(self, mock_get_key):
+        cancelled = threading.Event()
+
+        async def slow_location_key(address):
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        mock_get_key.side_effect = slow_location_key
+        response = app.test_client().post('/check-weather-async', data={'start_address': 'Москва',
+                                                                          'end_address': 'Тверь'})
+        self.assertIn('не ответил вовремя', response.get_data(as_text=True))
+        # Запросы, не уложившиеся в срок, отменяются и в общем цикле событий
+        self.assertTrue(cancelled.wait(1))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,171 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from web import batch, http_client
+from web.basic_requests import FAVORABLE_SUMMARY, UNFAVORABLE_SUMMARY
+from web.benchmarks.fake_accuweather import FakeAccuWeatherServer
+from web.circuit_breaker import reset_breakers
+from web.forecast_cache import reset_forecast_cache
+from web.location_cache import reset_location_cache
+from web.rate_limiter import QuotaExceeded, RateLimitExceeded, reset_rate_limiter
+from web.records import DailyForecast
+
+
+def location_key_by_name(address):
+    return {'Москва': '294021', 'Тверь': '178087'}.get(address)
+
+
+def weather(location_key):
+    if location_key == '295212':
+        return DailyForecast(location_key, 0.0, -5.0, 2.0, 60.0, 80)
+    return DailyForecast(location_key, 0.0, 10.0, 20.0, 5.0, 10)
+
+
+@patch('web.batch.get_weather_by_location_key', side_effect=weather)
+@patch('web.batch.get_location_key_by_coordinates', return_value='295212')
+@patch('web.batch.get_location_key_by_name', side_effect=location_key_by_name)
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def write_input(self, name, text):
+        with open(self.path(name), 'w', encoding='utf-8') as file:
+            file.write(text)
+        return self.path(name)
+
+    def read_jsonl(self, path):
+        with open(path, encoding='utf-8') as file:
+            return [json.loads(line) for line in file]
+
+    def test_csv_to_jsonl(self, mock_by_name, mock_by_coordinates, mock_check_weather):
+        source = self.write_input('points.csv', "id,address,latitude,longitude\n"
+                                                "a,Москва,,\nb,,59.93,30.31\nc,Нигде,,\n")
+        output = self.path('results.jsonl')
+        self.assertEqual(batch.run_batch(source, output, workers=2), 3)
+
+        results = self.read_jsonl(output)
+        self.assertEqual([result['index'] for result in results], [0, 1, 2])
+        self.assertEqual(results[0]['input']['id'], 'a')
+        self.assertEqual(results[0]['weather']['weather_summary'], FAVORABLE_SUMMARY)
+        self.assertEqual(results[1]['location_key'], '295212')
+        self.assertEqual(results[1]['weather']['weather_summary'], UNFAVORABLE_SUMMARY)
+        self.assertEqual(len(results[1]['weather']['reasons']), 3)
+        self.assertIsNotNone(results[2]['error'])
+        self.assertFalse(os.path.exists(output + '.checkpoint'))
+
+    def test_jsonl_to_csv(self, mock_by_name, mock_by_coordinates, mock_check_weather):
+        source = self.write_input('points.jsonl', '"Москва"\n\n{"latitude": 59.93, "longitude": 30.31}\n')
+        output = self.path('results.csv')
+        batch.run_batch(source, output)
+
+        with open(output, encoding='utf-8') as file:
+            lines = file.read().splitlines()
+        self.assertEqual(lines[0], ','.join(batch.CSV_FIELDS))
+        self.assertEqual(len(lines), 3)
+        self.assertIn('294021', lines[1])
+
+    def test_resume_from_checkpoint(self, mock_by_name, mock_by_coordinates, mock_check_weather):
+        source = self.write_input('points.jsonl', '"Москва"\n' * 5)
+        output = self.path('results.jsonl')
+        calls = []
+
+        def interrupted(location_key):
+            calls.append(location_key)
+            if len(calls) == 4:
+                raise KeyboardInterrupt
+            return weather(location_key)
+
+        mock_check_weather.side_effect = interrupted
+        with self.assertRaises(KeyboardInterrupt):
+            batch.run_batch(source, output, workers=1, checkpoint_every=2)
+        self.assertTrue(os.path.exists(output + '.checkpoint'))
+        # Вслед за результатом, который не попал в контрольную точку, файл дописывается с нее
+        with open(output, 'a', encoding='utf-8') as file:
+            file.write('{"index": 99}\n')
+
+        mock_check_weather.side_effect = weather
+        batch.run_batch(source, output, workers=1, checkpoint_every=2)
+
+        self.assertEqual([result['index'] for result in self.read_jsonl(output)], [0, 1, 2, 3, 4])
+
+    def test_checkpoint_without_output_starts_over(self, mock_by_name, mock_by_coordinates, mock_check_weather):
+        source = self.write_input('points.jsonl', '"Москва"\n' * 3)
+        output = self.path('results.csv')
+        batch.save_checkpoint(output + '.checkpoint', source, 2, 40)
+
+        # Выходной файл удален после прерывания: результаты записываются заново, с заголовком и без нулевых байтов
+        self.assertEqual(batch.run_batch(source, output, workers=1), 3)
+        with open(output, encoding='utf-8') as file:
+            text = file.read()
+        self.assertNotIn('\x00', text)
+        self.assertEqual(text.splitlines()[0], ','.join(batch.CSV_FIELDS))
+        self.assertEqual(len(text.splitlines()), 4)
+
+    @patch('web.batch.RATE_LIMIT_PAUSE', 0)
+    def test_rate_limited_point_is_retried(self, mock_by_name, mock_by_coordinates, mock_check_weather):
+        source = self.write_input('points.jsonl', '"Москва"\n')
+        output = self.path('results.jsonl')
+        mock_by_name.side_effect = [RateLimitExceeded("Превышен лимит"), '294021']
+        batch.run_batch(source, output)
+        self.assertEqual(self.read_jsonl(output)[0]['location_key'], '294021')
+
+        # Если лимит так и не освободился, точка не записывается с ошибкой и остается для повторного запуска
+        mock_by_name.side_effect = RateLimitExceeded("Превышен лимит")
+        with self.assertRaises(RateLimitExceeded):
+            batch.run_batch(source, self.path('retry.jsonl'))
+        self.assertEqual(mock_by_name.call_count, 2 + batch.RATE_LIMIT_ATTEMPTS)
+
+
+class TestBatchQuota(unittest.TestCase):
+    """
+    Пакет с настоящими функциями запросов к локальной замене API и ограничителем, у которого заканчивается квота.
+    """
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.source = os.path.join(directory.name, 'points.jsonl')
+        self.output = os.path.join(directory.name, 'results.jsonl')
+        with open(self.source, 'w', encoding='utf-8') as file:
+            file.write('"Москва"\n"Тверь"\n"Клин"\n"Казань"\n')
+
+        self.server = FakeAccuWeatherServer(seed=1)
+        environment = patch.dict(os.environ, {'WEATHER_API_BASE_URL': self.server.start(), 'WEATHER_API_KEY': 'test',
+                                              'WEATHER_RATE_LIMIT': '1000', 'WEATHER_DAILY_QUOTA': '7'})
+        environment.start()
+        self.addCleanup(environment.stop)
+        self.addCleanup(self.server.stop)
+        for reset in (http_client.reset_session, reset_rate_limiter, reset_location_cache, reset_forecast_cache,
+                      reset_breakers):
+            reset()
+            self.addCleanup(reset)
+
+    def test_quota_stops_batch_before_losing_points(self):
+        # Каждая точка - три запроса: ключ локации, текущая погода и прогноз; квоты хватает на две точки
+        with self.assertRaises(QuotaExceeded):
+            batch.run_batch(self.source, self.output, workers=1, checkpoint_every=1)
+        with open(self.output, encoding='utf-8') as file:
+            results = [json.loads(line) for line in file]
+        self.assertEqual([result['index'] for result in results], [0, 1])
+        self.assertTrue(all(result['error'] is None for result in results))
+        self.assertTrue(os.path.exists(self.output + '.checkpoint'))
+
+        # На следующий день (новая квота) пакет продолжается с точки, на которой остановился
+        reset_rate_limiter()
+        with patch.dict(os.environ, {'WEATHER_DAILY_QUOTA': '100'}):
+            self.assertEqual(batch.run_batch(self.source, self.output, workers=1, checkpoint_every=1), 4)
+        with open(self.output, encoding='utf-8') as file:
+            results = [json.loads(line) for line in file]
+        self.assertEqual([result['index'] for result in results], [0, 1, 2, 3])
+        self.assertTrue(all(result['error'] is None and result['weather'] for result in results))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import time
+import unittest
+from unittest.mock import patch
+
+from markupsafe import escape
+
+from web import app as app_module
+from web.circuit_breaker import CircuitOpenError
+from web.response_cache import canonical_query
+
+
+def slow_location_key(address):
+    time.sleep(0.2)
+    return f"key-{address}"
+
+
+def slow_weather(location_key, day=0):
+    time.sleep(0.2)
+    return {
+        "min_temperature": 10.0,
+        "max_temperature": 20.0,
+        "wind_speed": 5.0,
+        "precipitation_probability": 10,
+        "weather_summary": f"Погода благоприятная ({location_key})",
+    }
+
+
+def weather_for_moscow_only(location_key, day=0):
+    if location_key != 'key-Москва':
+        raise CircuitOpenError("Сервис погоды временно недоступен. Пожалуйста, попробуйте позже.")
+    return slow_weather(location_key)
+
+
+def location_key_for_moscow_only(address):
+    if address != 'Москва':
+        raise CircuitOpenError("Сервис погоды временно недоступен. Пожалуйста, попробуйте позже.")
+    return f"key-{address}"
+
+
+class TestCheckWeatherHandler(unittest.TestCase):
+    def setUp(self):
+        self.client = app_module.app.test_client()
+
+    @patch('web.app.check_weather_by_location_key', side_effect=slow_weather)
+    @patch('web.app.get_location_key_by_name', side_effect=slow_location_key)
+    def test_points_are_processed_concurrently(self, mock_get_key, mock_check_weather):
+        started = time.monotonic()
+        response = self.client.post('/check-weather', data={'start_address': 'Москва', 'end_address': 'Тверь'})
+        elapsed = time.monotonic() - started
+
+        body = response.get_data(as_text=True)
+        self.assertIn('key-Москва', body)
+        self.assertIn('key-Тверь', body)
+        # Последовательная обработка заняла бы не меньше 0.8 секунды
+        self.assertLess(elapsed, 0.7)
+
+    @patch('web.app.check_weather_by_location_key', side_effect=slow_weather)
+    @patch('web.app.get_location_key_by_name', side_effect=slow_location_key)
+    def test_forecast_day(self, mock_get_key, mock_check_weather):
+        response = self.client.post('/check-weather', data={'start_address': 'Москва', 'end_address': 'Тверь',
+                                                            'day': '3'})
+        mock_check_weather.assert_any_call('key-Москва', 3)
+        # На странице результатов есть ссылки на прогноз для тех же точек на другие дни
+        body = response.get_data(as_text=True)
+        link = canonical_query(('Москва', None, None), ('Тверь', None, None), 1)
+        self.assertIn(str(escape(f"/check-weather?{link}")), body)
+
+        response = self.client.post('/check-weather', data={'start_address': 'Москва', 'day': '9'})
+        self.assertIn('Номер дня прогноза', response.get_data(as_text=True))
+
+    @patch('web.app.get_location_key_by_name', return_value=None)
+    def test_missing_location_key(self, mock_get_key):
+        response = self.client.post('/check-weather', data={'start_address': 'Москва', 'end_address': 'Нигде'})
+        self.assertIn('недостаточно данных', response.get_data(as_text=True))
+
+    @patch.dict('os.environ', {'WEATHER_REQUEST_DEADLINE': '0.05'})
+    @patch('web.app.check_weather_by_location_key', side_effect=slow_weather)
+    @patch('web.app.get_location_key_by_name', side_effect=slow_location_key)
+    def test_deadline_exceeded(self, mock_get_key, mock_check_weather):
+        response = self.client.post('/check-weather', data={'start_address': 'Москва', 'end_address': 'Тверь'})
+        self.assertIn('не ответил вовремя', response.get_data(as_text=True))
+
+    @patch('web.app.check_weather_by_location_key', side_effect=weather_for_moscow_only)
+    @patch('web.app.get_location_key_by_name', side_effect=slow_location_key)
+    def test_partial_result_when_upstream_unavailable(self, mock_get_key, mock_check_weather):
+        response = self.client.post('/check-weather', data={'start_address': 'Москва', 'end_address': 'Тверь'})
+        body = response.get_data(as_text=True)
+        self.assertIn('key-Москва', body)
+        self.assertIn(app_module.POINT_UNAVAILABLE, body)
+
+    @patch('web.app.check_weather_by_location_key', side_effect=slow_weather)
+    @patch('web.app.get_location_key_by_name', side_effect=location_key_for_moscow_only)
+    def test_partial_result_when_location_lookup_unavailable(self, mock_get_key, mock_check_weather):
+        for response in (
+                self.client.post('/check-weather', data={'start_address': 'Москва', 'end_address': 'Тверь'}),
+                self.client.get(f"/check-weather?{canonical_query(('Москва', None, None), ('Тверь', None, None))}")):
+            body = response.get_data(as_text=True)
+            self.assertIn('key-Москва', body)
+            self.assertIn(app_module.POINT_UNAVAILABLE, body)
+            self.assertNotIn('недостаточно данных', body)
+        self.assertTrue(response.cache_control.no_store)
+
+    @patch('web.app.check_weather_by_location_key', side_effect=CircuitOpenError("Сервис недоступен"))
+    @patch('web.app.get_location_key_by_name', side_effect=slow_location_key)
+    def test_upstream_unavailable_for_both_points(self, mock_get_key, mock_check_weather):
+        response = self.client.post('/check-weather', data={'start_address': 'Москва', 'end_address': 'Тверь'})
+        self.assertIn(app_module.SERVICE_UNAVAILABLE, response.get_data(as_text=True))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import os
+import unittest
+from unittest.mock import patch
+
+import requests
+
+from web import basic_requests, http_client
+from web.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, reset_breakers
+from web.location_cache import reset_location_cache
+from web.tests.helpers import FakeClock
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock(100.0)
+        self.breaker = CircuitBreaker('forecast', window=10, failure_rate=0.5, min_calls=4, open_timeout=30,
+                                      clock=self.clock)
+
+    def test_opens_on_failure_rate(self):
+        for _ in range(3):
+            self.breaker.record_success()
+        for _ in range(2):
+            self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.allow()
+
+    def test_needs_minimum_calls(self):
+        for _ in range(3):
+            self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CLOSED)
+
+    def test_half_open_probe(self):
+        for _ in range(4):
+            self.breaker.record_failure()
+        self.clock.now += 30
+
+        # Пропускается только один пробный запрос
+        self.breaker.allow()
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.allow()
+
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.breaker.allow()
+
+    def test_failed_probe_reopens(self):
+        for _ in range(4):
+            self.breaker.record_failure()
+        self.clock.now += 30
+        self.breaker.allow()
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.allow()
+
+
+# Повторы внутри get здесь не нужны: каждый вызов - один исход для предохранителя
+@patch.dict(os.environ, {'WEATHER_HTTP_MAX_RETRIES': '0'})
+class TestHttpClientBreaker(unittest.TestCase):
+    def setUp(self):
+        reset_breakers()
+
+    def tearDown(self):
+        reset_breakers()
+
+    @patch('requests.Session.get', side_effect=requests.exceptions.ConnectionError("Network Error"))
+    def test_fast_fail_while_open(self, mock_get):
+        for _ in range(5):
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                http_client.get('/forecasts/v1/daily/1day/294021')
+
+        # Разомкнутый предохранитель отклоняет запрос без обращения к сети
+        with self.assertRaises(CircuitOpenError):
+            http_client.get('/forecasts/v1/daily/1day/294021')
+        self.assertEqual(mock_get.call_count, 5)
+
+        # Другие методы API работают независимо
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            http_client.get('/currentconditions/v1/294021')
+
+    @patch('requests.Session.get', side_effect=requests.exceptions.ConnectionError("Network Error"))
+    def test_location_lookup_reports_open_breaker(self, mock_get):
+        reset_location_cache()
+        for _ in range(5):
+            self.assertIsNone(basic_requests.get_location_key_by_name('Москва'))
+
+        # Недоступность API не выдается за адрес, который не удалось найти
+        with self.assertRaises(CircuitOpenError):
+            basic_requests.get_location_key_by_name('Москва')
+
+if __name__ == '__main__':
+    unittest.main()
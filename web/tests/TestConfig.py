@@ -0,0 +1,57 @@
+import os
+import subprocess
+import sys
+import unittest
+from unittest.mock import patch
+
+from web import app as app_module
+from web.rate_limiter import require_api_keys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class TestConfig(unittest.TestCase):
+    def test_import_has_no_side_effects(self):
+        # Без ключа API модули импортируются, а .env при импорте не читается
+        environment = {name: value for name, value in os.environ.items()
+                       if name not in ('WEATHER_API_KEY', 'WEATHER_API_KEYS')}
+        environment['PYTHONPATH'] = ROOT
+        code = ("import os, threading, web.app, web.batch, web.basic_requests, web.route;"
+                "print('WEATHER_API_KEY' in os.environ, threading.active_count())")
+        output = subprocess.run([sys.executable, '-c', code], env=environment, cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout
+        self.assertEqual(output.split(), ['False', '1'])
+
+    def test_sync_requests_do_not_load_httpx(self):
+        code = ("import sys; from unittest.mock import patch; from web import http_client;"
+                "patch('requests.Session.get').start(); http_client.get('/currentconditions/v1/294021');"
+                "print('httpx' in sys.modules)")
+        output = subprocess.run([sys.executable, '-c', code], env=dict(os.environ, PYTHONPATH=ROOT), cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.split(), ['False'])
+
+    def test_single_point_requests_do_not_load_numpy(self):
+        code = ("import sys, web.app, web.basic_requests, web.route;"
+                "from web.records import DailyForecast; from web.rules import get_rule_engine;"
+                "get_rule_engine().report(DailyForecast('294021', 0.0, 1.0, 2.0, 3.0, 4));"
+                "print('numpy' in sys.modules)")
+        output = subprocess.run([sys.executable, '-c', code], env=dict(os.environ, PYTHONPATH=ROOT), cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.split(), ['False'])
+
+    @patch('web.rate_limiter.load_environment')
+    def test_factory_requires_api_key(self, mock_load):
+        with patch.dict(os.environ, {'WEATHER_API_KEY': '', 'WEATHER_API_KEYS': ''}):
+            with self.assertRaises(ValueError):
+                app_module.create_app()
+        with patch.dict(os.environ, {'WEATHER_API_KEYS': 'first, second'}):
+            self.assertEqual(require_api_keys(), ['first', 'second'])
+
+    def test_app_is_created_on_first_access(self):
+        self.assertIs(app_module.app, app_module.get_app())
+        self.assertIn('weather.check_weather_page', app_module.app.view_functions)
+        with self.assertRaises(AttributeError):
+            app_module.missing
+
+if __name__ == '__main__':
+    unittest.main()
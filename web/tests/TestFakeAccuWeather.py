@@ -0,0 +1,57 @@
+import os
+import statistics
+import time
+import unittest
+from unittest.mock import patch
+
+import requests
+
+from web import http_client
+from web.basic_requests import check_weather_by_location_key, get_location_key_by_name
+from web.benchmarks.fake_accuweather import FakeAccuWeatherServer, location_key_for
+from web.circuit_breaker import reset_breakers
+from web.forecast_cache import reset_forecast_cache
+from web.location_cache import reset_location_cache
+
+
+class TestFakeAccuWeather(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeAccuWeatherServer(seed=1)
+        environment = patch.dict(os.environ, {'WEATHER_API_BASE_URL': self.server.start(),
+                                              'WEATHER_HTTP_BACKOFF_FACTOR': '0'})
+        environment.start()
+        self.addCleanup(environment.stop)
+        self.addCleanup(self.server.stop)
+        self.addCleanup(http_client.reset_session)
+        reset_location_cache()
+        reset_forecast_cache()
+        reset_breakers()
+
+    def test_end_to_end_check(self):
+        location_key = get_location_key_by_name('Москва')
+        self.assertEqual(location_key, location_key_for('Москва'))
+
+        result = check_weather_by_location_key(location_key)
+        self.assertEqual(result['min_temperature'], 10.0)
+        self.assertEqual(result['max_temperature'], 25.0)
+        self.assertEqual(self.server.calls, {'autocomplete': 1, 'currentconditions': 1, 'forecast': 1})
+
+    def test_errors_are_retried(self):
+        self.server.error_rate = 1.0
+        self.assertIsNone(get_location_key_by_name('Москва'))
+        # Первая попытка и два повтора по умолчанию
+        self.assertEqual(self.server.calls['autocomplete'], 3)
+
+    def test_keep_alive_response_is_not_delayed(self):
+        # Задержка отложенного ACK (около 40 мс на ответ) исказила бы все замеры бенчмарков
+        session = requests.Session()
+        self.addCleanup(session.close)
+        timings = []
+        for _ in range(10):
+            started = time.perf_counter()
+            session.get(f"{self.server.base_url}/currentconditions/v1/294021").raise_for_status()
+            timings.append(time.perf_counter() - started)
+        self.assertLess(statistics.median(timings), 0.02)
+
+if __name__ == '__main__':
+    unittest.main()
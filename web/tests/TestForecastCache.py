@@ -0,0 +1,92 @@
+import asyncio
+import threading
+import unittest
+
+from web.forecast_cache import StaleWhileRevalidateCache
+from web.tests.helpers import FakeClock
+
+
+class TestForecastCache(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = StaleWhileRevalidateCache(stale_ttl=60, stale_if_error=600, clock=self.clock)
+        self.calls = []
+
+    def fetch(self, location_key):
+        self.calls.append(location_key)
+        return f"forecast-{location_key}-{len(self.calls)}"
+
+    def test_fresh_entry_is_served_from_cache(self):
+        first = self.cache.get_or_fetch(('forecast', '294021'), 300, self.fetch, '294021')
+        self.clock.now += 100
+        second = self.cache.get_or_fetch(('forecast', '294021'), 300, self.fetch, '294021')
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(self.cache.stats()['hits'], 1)
+
+    def test_separate_ttl_per_endpoint(self):
+        self.cache.get_or_fetch(('currentconditions', '294021'), 10, self.fetch, '294021')
+        self.cache.get_or_fetch(('forecast', '294021'), 300, self.fetch, '294021')
+        self.clock.now += 100
+        self.cache.get_or_fetch(('forecast', '294021'), 300, self.fetch, '294021')
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(self.cache.stats()['stale_hits'], 0)
+
+    def test_stale_entry_is_served_and_refreshed_in_background(self):
+        refreshed = threading.Event()
+
+        def fetch(location_key):
+            result = self.fetch(location_key)
+            if len(self.calls) == 2:
+                refreshed.set()
+            return result
+
+        self.cache.get_or_fetch(('forecast', '294021'), 300, fetch, '294021')
+        self.clock.now += 330
+        stale = self.cache.get_or_fetch(('forecast', '294021'), 300, fetch, '294021')
+        self.assertEqual(stale, 'forecast-294021-1')
+        self.assertTrue(refreshed.wait(1))
+
+        # Дожидаемся завершения фоновой задачи, которая сохраняет новое значение
+        self.cache._refresh_executor.submit(lambda: None).result()
+        self.assertEqual(self.cache.get_or_fetch(('forecast', '294021'), 300, fetch, '294021'), 'forecast-294021-2')
+
+    def test_async_refresh_outlives_request_loop(self):
+        refreshed = threading.Event()
+
+        async def fetch(location_key):
+            await asyncio.sleep(0.01)
+            result = self.fetch(location_key)
+            refreshed.set()
+            return result
+
+        asyncio.run(self.cache.get_or_fetch_async(('forecast', '294021'), 300, fetch, '294021'))
+        refreshed.clear()
+        self.clock.now += 330
+        # Цикл событий запроса закрывается сразу после ответа, как в асинхронных представлениях Flask
+        stale = asyncio.run(self.cache.get_or_fetch_async(('forecast', '294021'), 300, fetch, '294021'))
+        self.assertEqual(stale, 'forecast-294021-1')
+        self.assertTrue(refreshed.wait(1))
+        self.assertEqual(len(self.calls), 2)
+
+    def test_stale_entry_is_served_on_error(self):
+        self.cache.get_or_fetch(('forecast', '294021'), 300, self.fetch, '294021')
+        self.clock.now += 500
+
+        def failing(location_key):
+            raise RuntimeError("Ошибка сети")
+
+        self.assertEqual(self.cache.get_or_fetch(('forecast', '294021'), 300, failing, '294021'), 'forecast-294021-1')
+        self.assertEqual(self.cache.stats()['stale_errors'], 1)
+
+        # Слишком старые данные не отдаются, ошибка передается вызывающему коду
+        self.clock.now += 1000
+        with self.assertRaises(RuntimeError):
+            self.cache.get_or_fetch(('forecast', '294021'), 300, failing, '294021')
+
+    def test_missing_data_is_not_cached(self):
+        self.cache.get_or_fetch(('forecast', '294021'), 300, lambda key: None, '294021')
+        self.assertEqual(self.cache.stats()['size'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
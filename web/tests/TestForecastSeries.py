@@ -0,0 +1,75 @@
+import unittest
+from unittest.mock import Mock, patch
+
+from web.basic_requests import (FORECAST_DAYS, forecast_day, forecast_series_ttl, get_current_conditions_by_location_key,
+                                parse_forecast_series)
+from web.benchmarks import payloads
+from web.circuit_breaker import reset_breakers
+from web.forecast_cache import get_forecast_cache, reset_forecast_cache
+
+START_EPOCH = 1729224000
+
+
+def forecast_response():
+    data = payloads.daily_forecast('294021', days=FORECAST_DAYS, metric=True, start_epoch=START_EPOCH)
+    for index, forecast in enumerate(data['DailyForecasts']):
+        forecast['Temperature']['Maximum']['Value'] = 20.0 + index
+    response = Mock()
+    response.json.return_value = data
+    return response
+
+
+class TestForecastSeries(unittest.TestCase):
+    def setUp(self):
+        reset_forecast_cache()
+        reset_breakers()
+
+    def test_parse_series(self):
+        series = parse_forecast_series(forecast_response().json(), '294021')
+        self.assertEqual(len(series.days), FORECAST_DAYS)
+        self.assertEqual(series.days[2].date, '2024-10-20')
+        self.assertEqual(series.days[2].max_temperature, 22.0)
+        self.assertEqual(series.epochs[1], START_EPOCH + 86400)
+        self.assertIsNone(parse_forecast_series({'DailyForecasts': []}))
+
+    def test_series_shifts_when_day_rolls_over(self):
+        series = parse_forecast_series(forecast_response().json(), '294021')
+        series = series.__class__(series.location_key, START_EPOCH + 3600, series.days, series.epochs)
+        self.assertEqual(series.day(0, now=START_EPOCH + 7200).date, '2024-10-18')
+        # После начала следующего дня днем 0 становится завтрашний день из того же ряда
+        self.assertEqual(series.day(0, now=START_EPOCH + 86400).date, '2024-10-19')
+        self.assertEqual(series.day(3, now=START_EPOCH + 86400).date, '2024-10-22')
+        self.assertIsNone(series.day(4, now=START_EPOCH + 86400))
+        self.assertEqual(series.next_rollover(), START_EPOCH + 86400)
+        # Свежесть ограничена и настройкой WEATHER_FORECAST_TTL, и началом следующего дня
+        with patch.dict('os.environ', {'WEATHER_FORECAST_TTL': '1800'}):
+            self.assertEqual(forecast_series_ttl(series), 1800.0)
+        with patch.dict('os.environ', {'WEATHER_FORECAST_TTL': '172800'}):
+            self.assertEqual(forecast_series_ttl(series), 86400 - 3600)
+
+    def test_ttl_without_dates(self):
+        forecast = forecast_response().json()['DailyForecasts'][0]
+        del forecast['EpochDate']
+        series = parse_forecast_series({'DailyForecasts': [forecast]})
+        self.assertEqual(series.epochs, ())
+        with patch.dict('os.environ', {'WEATHER_FORECAST_TTL': '120'}):
+            self.assertEqual(forecast_series_ttl(series), 120.0)
+
+    @patch('requests.Session.get', return_value=forecast_response())
+    def test_all_days_from_one_request(self, mock_get):
+        days = [get_current_conditions_by_location_key('294021', day) for day in range(FORECAST_DAYS)]
+        self.assertEqual([day.max_temperature for day in days], [20.0, 21.0, 22.0, 23.0, 24.0])
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertIn(f'/forecasts/v1/daily/{FORECAST_DAYS}day/294021', mock_get.call_args.args[0])
+        self.assertEqual(get_forecast_cache().stats()['size'], 1)
+
+    def test_forecast_day(self):
+        self.assertEqual(forecast_day(None), 0)
+        self.assertEqual(forecast_day(''), 0)
+        self.assertEqual(forecast_day('4'), 4)
+        for value in ('5', '-1', 'завтра'):
+            with self.assertRaises(ValueError):
+                forecast_day(value)
+
+if __name__ == '__main__':
+    unittest.main()
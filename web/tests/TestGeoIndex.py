@@ -0,0 +1,88 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from web.basic_requests import get_location_key_by_coordinates
+from web.circuit_breaker import reset_breakers
+from web.geo_index import GeoIndex, GeoStore, get_geo_index, haversine_km, read_locations, reset_geo_index
+from web.location_cache import reset_location_cache
+
+
+class TestGeoIndex(unittest.TestCase):
+    def test_haversine(self):
+        # Москва - Санкт-Петербург, около 634 км
+        self.assertAlmostEqual(haversine_km(55.7558, 37.6176, 59.9386, 30.3141), 634, delta=5)
+
+    def test_nearest_within_radius(self):
+        index = GeoIndex(radius_km=3)
+        index.add(55.7558, 37.6176, '294021', 'Москва')
+        index.add(59.9386, 30.3141, '295212', 'Санкт-Петербург')
+
+        location_key, distance = index.nearest(55.7600, 37.6300)
+        self.assertEqual(location_key, '294021')
+        self.assertLess(distance, 3)
+        self.assertIsNone(index.nearest(55.9000, 37.6176))
+
+    def test_neighbour_cells(self):
+        index = GeoIndex(radius_km=3)
+        index.add(55.7558, 37.6176, '294021')
+        # Точка в соседней ячейке сетки, но в пределах радиуса
+        cell = index.cell_degrees
+        latitude = (int(55.7558 / cell) + 1) * cell + 0.0001
+        self.assertEqual(index.lookup(latitude, 37.6176), '294021')
+
+    def test_invalid_coordinates(self):
+        self.assertIsNone(GeoIndex().lookup('abc', None))
+
+    def test_persistence(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'geo.sqlite3')
+            store = GeoStore(path)
+            GeoIndex(store=store).add(55.7558, 37.6176, '294021', 'Москва')
+            store.close()
+
+            restored = GeoIndex(store=GeoStore(path))
+            self.assertEqual(len(restored), 1)
+            self.assertEqual(restored.lookup(55.7558, 37.6176), '294021')
+
+    def test_read_locations(self):
+        with tempfile.TemporaryDirectory() as directory:
+            csv_path = os.path.join(directory, 'cities.csv')
+            with open(csv_path, 'w', encoding='utf-8') as file:
+                file.write("key,latitude,longitude,name\n294021,55.7558,37.6176,Москва\n")
+            json_path = os.path.join(directory, 'cities.json')
+            with open(json_path, 'w', encoding='utf-8') as file:
+                json.dump([{'Key': '295212', 'LocalizedName': 'Санкт-Петербург',
+                            'GeoPosition': {'Latitude': 59.9386, 'Longitude': 30.3141}}], file)
+
+            index = GeoIndex()
+            index.add_many(read_locations(csv_path) + read_locations(json_path))
+        self.assertEqual(index.lookup(55.7558, 37.6176), '294021')
+        self.assertEqual(index.lookup(59.9386, 30.3141), '295212')
+
+
+class TestCoordinatesResolution(unittest.TestCase):
+    def setUp(self):
+        reset_location_cache()
+        reset_breakers()
+        reset_geo_index()
+
+    def tearDown(self):
+        reset_geo_index()
+
+    @patch('requests.Session.get')
+    def test_nearby_point_resolves_locally(self, mock_get):
+        mock_get.return_value.json.return_value = {
+            'Key': '294021', 'LocalizedName': 'Москва', 'GeoPosition': {'Latitude': 55.7558, 'Longitude': 37.6176},
+        }
+        self.assertEqual(get_location_key_by_coordinates(55.7558, 37.6176), '294021')
+        self.assertEqual(len(get_geo_index()), 1)
+
+        # Точка в нескольких сотнях метров попадает в другую ячейку кэша, но определяется без запроса к API
+        self.assertEqual(get_location_key_by_coordinates(55.7601, 37.6251), '294021')
+        self.assertEqual(mock_get.call_count, 1)
+
+if __name__ == '__main__':
+    unittest.main()
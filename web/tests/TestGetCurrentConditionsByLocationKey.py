@@ -2,11 +2,18 @@ import unittest
 from unittest.mock import patch
 import requests
 
-from web.basic_requests import get_current_conditions_by_location_key
+from web.basic_requests import current_conditions_params, forecast_params, get_current_conditions_by_location_key
+from web.circuit_breaker import reset_breakers
+from web.forecast_cache import reset_forecast_cache
 
 
 class TestGetCurrentConditionsByLocationKey(unittest.TestCase):
-    @patch('requests.get')
+    def setUp(self):
+        # Кэш результатов общий для процесса, поэтому сбрасываем его перед каждым тестом
+        reset_forecast_cache()
+        reset_breakers()
+
+    @patch('requests.Session.get')
     def test_successful_response(self, mock_get):
         # Настраиваем мок для успешного ответа API
         mock_response = unittest.mock.Mock()
@@ -27,9 +34,11 @@ class TestGetCurrentConditionsByLocationKey(unittest.TestCase):
 
         result = get_current_conditions_by_location_key("12345")
         # Проверяем, что функция возвращает правильные значения (конвертированные)
-        self.assertEqual(result, (10.0, 25.0, 16.1, 30))
+        self.assertEqual((result.min_temperature, result.max_temperature, result.wind_speed,
+                          result.precipitation_probability), (10.0, 25.0, 16.1, 30))
+        self.assertEqual(result.location_key, "12345")
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_api_error(self, mock_get):
         # Настраиваем мок для ошибки при запросе (например, неверный API ключ)
         mock_response = unittest.mock.Mock()
@@ -39,7 +48,7 @@ class TestGetCurrentConditionsByLocationKey(unittest.TestCase):
         result = get_current_conditions_by_location_key("12345")
         self.assertIsInstance(result, requests.exceptions.HTTPError)
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_empty_response(self, mock_get):
         # Настраиваем мок для пустого ответа API (пустой словарь)
         mock_response = unittest.mock.Mock()
@@ -50,7 +59,7 @@ class TestGetCurrentConditionsByLocationKey(unittest.TestCase):
         result = get_current_conditions_by_location_key("12345")
         self.assertIsInstance(result, KeyError)
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_unexpected_structure(self, mock_get):
         # Настраиваем мок для ответа с неожиданной структурой данных
         mock_response = unittest.mock.Mock()
@@ -63,7 +72,7 @@ class TestGetCurrentConditionsByLocationKey(unittest.TestCase):
         result = get_current_conditions_by_location_key("12345")
         self.assertIsInstance(result, KeyError)
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_network_error(self, mock_get):
         # Настраиваем мок для ошибки сети
         mock_get.side_effect = requests.exceptions.ConnectionError("Network Error")
@@ -71,5 +80,38 @@ class TestGetCurrentConditionsByLocationKey(unittest.TestCase):
         result = get_current_conditions_by_location_key("12345")
         self.assertIsInstance(result, requests.exceptions.ConnectionError)
 
+    @patch('requests.Session.get')
+    def test_metric_response(self, mock_get):
+        # В экономном режиме API возвращает метрические единицы, пересчет не нужен
+        mock_response = unittest.mock.Mock()
+        mock_response.raise_for_status = unittest.mock.Mock()
+        mock_response.json.return_value = {
+            'DailyForecasts': [{
+                'Temperature': {
+                    'Minimum': {'Value': 10.2, 'Unit': 'C'},
+                    'Maximum': {'Value': 24.9, 'Unit': 'C'}
+                },
+                'Day': {
+                    'Wind': {'Speed': {'Value': 16.7, 'Unit': 'km/h'}},
+                    'PrecipitationProbability': 30
+                }
+            }]
+        }
+        mock_get.return_value = mock_response
+
+        result = get_current_conditions_by_location_key("12345")
+        self.assertEqual((result.min_temperature, result.max_temperature, result.wind_speed,
+                          result.precipitation_probability), (10.2, 24.9, 16.7, 30))
+        self.assertEqual(mock_get.call_args.kwargs['params']['metric'], 'true')
+
+    @patch.dict('os.environ', {'WEATHER_LEAN_FETCH': '0'})
+    def test_lean_fetch_disabled(self):
+        self.assertNotIn('metric', forecast_params())
+        self.assertEqual(current_conditions_params()['details'], 'true')
+
+    def test_lean_fetch_params(self):
+        self.assertNotIn('details', current_conditions_params())
+        self.assertEqual(forecast_params()['details'], 'true')
+
 if __name__ == '__main__':
     unittest.main()
@@ -3,10 +3,17 @@ from unittest.mock import patch
 import requests
 
 from web.basic_requests import get_current_temperature_by_location_key
+from web.circuit_breaker import reset_breakers
+from web.forecast_cache import reset_forecast_cache
 
 
 class TestGetCurrentTemperatureByLocationKey(unittest.TestCase):
-    @patch('requests.get')
+    def setUp(self):
+        # Кэш результатов общий для процесса, поэтому сбрасываем его перед каждым тестом
+        reset_forecast_cache()
+        reset_breakers()
+
+    @patch('requests.Session.get')
     def test_successful_response(self, mock_get):
         # Настраиваем мок для успешного ответа API
         mock_response = unittest.mock.Mock()
@@ -18,9 +25,9 @@ class TestGetCurrentTemperatureByLocationKey(unittest.TestCase):
         mock_get.return_value = mock_response
 
         result = get_current_temperature_by_location_key("294021")
-        self.assertEqual(result, (20.5, 'Partly sunny'))
+        self.assertEqual((result.temperature, result.weather_text), (20.5, 'Partly sunny'))
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_api_error(self, mock_get):
         # Настраиваем мок для ошибки при запросе (например, неверный API ключ)
         mock_response = unittest.mock.Mock()
@@ -30,7 +37,7 @@ class TestGetCurrentTemperatureByLocationKey(unittest.TestCase):
         result = get_current_temperature_by_location_key("294021")
         self.assertIsInstance(result, requests.exceptions.HTTPError)
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_empty_response(self, mock_get):
         # Настраиваем мок для пустого ответа API (пустой список)
         mock_response = unittest.mock.Mock()
@@ -41,7 +48,7 @@ class TestGetCurrentTemperatureByLocationKey(unittest.TestCase):
         result = get_current_temperature_by_location_key("294021")
         self.assertIsInstance(result, IndexError)
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_unexpected_structure(self, mock_get):
         # Настраиваем мок для ответа с неожиданной структурой данных
         mock_response = unittest.mock.Mock()
@@ -52,7 +59,7 @@ class TestGetCurrentTemperatureByLocationKey(unittest.TestCase):
         result = get_current_temperature_by_location_key("294021")
         self.assertIsInstance(result, KeyError)
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_network_error(self, mock_get):
         # Настраиваем мок для ошибки сети
         mock_get.side_effect = requests.exceptions.ConnectionError("Network Error")
@@ -3,10 +3,19 @@ from unittest.mock import patch
 import requests
 
 from web.basic_requests import get_location_key_by_coordinates
+from web.circuit_breaker import reset_breakers
+from web.geo_index import reset_geo_index
+from web.location_cache import reset_location_cache
 
 
 class TestGetLocationKeyByCoordinates(unittest.TestCase):
-    @patch('requests.get')
+    def setUp(self):
+        # Кэш ключей локаций общий для процесса, поэтому сбрасываем его перед каждым тестом
+        reset_location_cache()
+        reset_breakers()
+        reset_geo_index()
+
+    @patch('requests.Session.get')
     def test_successful_response(self, mock_get):
         # Настраиваем мок для успешного ответа API
         mock_response = unittest.mock.Mock()
@@ -17,7 +26,7 @@ class TestGetLocationKeyByCoordinates(unittest.TestCase):
         result = get_location_key_by_coordinates(55.7558, 37.6176)
         self.assertEqual(result, '67890')
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_api_error(self, mock_get):
         # Настраиваем мок для ошибки HTTP
         mock_response = unittest.mock.Mock()
@@ -29,7 +38,7 @@ class TestGetLocationKeyByCoordinates(unittest.TestCase):
         result = get_location_key_by_coordinates(55.7558, 37.6176)
         self.assertIsNone(result)
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_empty_response(self, mock_get):
         # Настраиваем мок для пустого ответа API
         mock_response = unittest.mock.Mock()
@@ -40,7 +49,7 @@ class TestGetLocationKeyByCoordinates(unittest.TestCase):
         result = get_location_key_by_coordinates(55.7558, 37.6176)
         self.assertIsNone(result)
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_unexpected_structure(self, mock_get):
         # Настраиваем мок для ответа с неожиданной структурой данных
         mock_response = unittest.mock.Mock()
@@ -51,7 +60,7 @@ class TestGetLocationKeyByCoordinates(unittest.TestCase):
         result = get_location_key_by_coordinates(55.7558, 37.6176)
         self.assertIsNone(result)
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_network_error(self, mock_get):
         # Настраиваем мок для ошибки сети, например, временная недоступность сервиса
         mock_get.side_effect = requests.exceptions.ConnectionError("Network Error")
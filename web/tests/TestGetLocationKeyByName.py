@@ -4,10 +4,17 @@ from unittest.mock import patch
 import requests
 
 from web.basic_requests import get_location_key_by_name
+from web.circuit_breaker import reset_breakers
+from web.location_cache import reset_location_cache
 
 
 class TestGetLocationKeyByName(unittest.TestCase):
-    @patch('requests.get')
+    def setUp(self):
+        # Кэш ключей локаций общий для процесса, поэтому сбрасываем его перед каждым тестом
+        reset_location_cache()
+        reset_breakers()
+
+    @patch('requests.Session.get')
     def test_successful_response(self, mock_get):
         # Настраиваем мок для успешного ответа API
         mock_response = unittest.mock.Mock()
@@ -19,7 +26,7 @@ class TestGetLocationKeyByName(unittest.TestCase):
         result = get_location_key_by_name("Москва")
         self.assertEqual(result, '294021')
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_api_error(self, mock_get):
         # Настраиваем мок для ошибки при запросе (например, неверный API ключ)
         mock_response = unittest.mock.Mock()
@@ -31,7 +38,7 @@ class TestGetLocationKeyByName(unittest.TestCase):
         result = get_location_key_by_name("Москва")
         self.assertEqual(result, (None, None))
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_empty_response(self, mock_get):
         # Настраиваем мок для пустого ответа API
         mock_response = unittest.mock.Mock()
@@ -43,7 +50,7 @@ class TestGetLocationKeyByName(unittest.TestCase):
         result = get_location_key_by_name("Неведомый город")
         self.assertEqual(result, (None, None))
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_unexpected_structure(self, mock_get):
         # Настраиваем мок для ответа с неожиданной структурой данных
         mock_response = unittest.mock.Mock()
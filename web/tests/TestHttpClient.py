@@ -0,0 +1,92 @@
+import os
+import unittest
+from unittest.mock import ANY, patch
+
+import requests
+
+from web import http_client
+from web.circuit_breaker import reset_breakers
+
+
+class TestHttpClient(unittest.TestCase):
+    def tearDown(self):
+        http_client.reset_session()
+
+    def test_session_is_shared(self):
+        # Повторные обращения возвращают одну и ту же сессию с пулом соединений
+        self.assertIs(http_client.get_session(), http_client.get_session())
+
+    def test_adapter_configuration(self):
+        session = http_client.create_session(pool_connections=2, pool_maxsize=7)
+        adapter = session.get_adapter('http://dataservice.accuweather.com')
+        self.assertEqual(adapter._pool_maxsize, 7)
+        # Повторы выполняет get, чтобы каждая попытка получала разрешение ограничителя
+        self.assertEqual(adapter.max_retries.total, 0)
+
+    @patch.dict(os.environ, {'WEATHER_HTTP_CONNECT_TIMEOUT': '1.5', 'WEATHER_HTTP_READ_TIMEOUT': '4'})
+    def test_timeout_from_environment(self):
+        self.assertEqual(http_client.get_timeout(), (1.5, 4.0))
+
+    @patch.dict(os.environ, {'WEATHER_API_BASE_URL': 'http://127.0.0.1:8080/'})
+    @patch('requests.Session.get')
+    def test_get_uses_base_url_and_timeout(self, mock_get):
+        http_client.get('/locations/v1/cities/autocomplete', {'q': 'Москва'})
+        mock_get.assert_called_once_with('http://127.0.0.1:8080/locations/v1/cities/autocomplete',
+                                         params={'q': 'Москва', 'apikey': ANY}, timeout=http_client.get_timeout())
+
+
+def response(status_code, headers=None):
+    result = requests.Response()
+    result.status_code = status_code
+    result.headers.update(headers or {})
+    result._content = b'{}'
+    return result
+
+
+@patch.dict(os.environ, {'WEATHER_HTTP_MAX_RETRIES': '2', 'WEATHER_HTTP_BACKOFF_FACTOR': '0.5'})
+@patch('web.http_client.time.sleep')
+@patch('web.http_client.get_rate_limiter')
+class TestHttpClientRetries(unittest.TestCase):
+    def setUp(self):
+        reset_breakers()
+        self.addCleanup(reset_breakers)
+
+    @patch('requests.Session.get', return_value=response(503))
+    def test_each_attempt_acquires_limiter(self, mock_get, mock_limiter, mock_sleep):
+        mock_limiter.return_value.acquire.side_effect = ['first', 'second', 'third']
+        self.assertEqual(http_client.get('/currentconditions/v1/294021').status_code, 503)
+
+        # Первая попытка и два повтора: каждый запрос к API учтен ограничителем
+        self.assertEqual(mock_get.call_count, 3)
+        self.assertEqual(mock_limiter.return_value.acquire.call_count, 3)
+        self.assertEqual([call.kwargs['params']['apikey'] for call in mock_get.call_args_list],
+                         ['first', 'second', 'third'])
+        self.assertEqual([call.args[0] for call in mock_sleep.call_args_list], [0.5, 1.0])
+
+    @patch('requests.Session.get', side_effect=[response(429, {'Retry-After': '30'}), response(200)])
+    def test_throttled_key_is_reported_before_retry(self, mock_get, mock_limiter, mock_sleep):
+        limiter = mock_limiter.return_value
+        limiter.acquire.side_effect = ['first', 'second']
+        self.assertEqual(http_client.get('/currentconditions/v1/294021').status_code, 200)
+
+        # Ключ приостанавливается сразу, а повтор не ждет Retry-After в потоке: ждать или нет, решает ограничитель
+        limiter.report_throttled.assert_called_once_with('first', 30.0)
+        self.assertEqual(mock_get.call_args.kwargs['params']['apikey'], 'second')
+        mock_sleep.assert_called_once_with(0.0)
+
+    @patch.dict(os.environ, {'WEATHER_HTTP_BACKOFF_MAX': '5'})
+    @patch('requests.Session.get', return_value=response(503, {'Retry-After': '3600'}))
+    def test_long_retry_after_is_not_awaited(self, mock_get, mock_limiter, mock_sleep):
+        # Ожидание дольше предела заняло бы поток пула на час: ответ возвращается без повтора
+        self.assertEqual(http_client.get('/currentconditions/v1/294021').status_code, 503)
+        self.assertEqual(mock_get.call_count, 1)
+        mock_sleep.assert_not_called()
+
+    @patch.dict(os.environ, {'WEATHER_HTTP_MAX_RETRIES': '5', 'WEATHER_HTTP_BACKOFF_MAX': '1.5'})
+    @patch('requests.Session.get', return_value=response(503))
+    def test_backoff_is_capped(self, mock_get, mock_limiter, mock_sleep):
+        http_client.get('/currentconditions/v1/294021')
+        self.assertEqual([call.args[0] for call in mock_sleep.call_args_list], [0.5, 1.0, 1.5, 1.5, 1.5])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from web.basic_requests import get_location_key_by_name
+from web.cache import SQLiteStore, TTLCache
+from web.location_cache import coordinates_cache_key, name_cache_key, reset_location_cache
+from web.tests.helpers import FakeClock
+
+
+class TestLocationCache(unittest.TestCase):
+    def setUp(self):
+        reset_location_cache()
+
+    def test_address_normalization(self):
+        self.assertEqual(name_cache_key('  Москва '), name_cache_key('москва'))
+        self.assertEqual(name_cache_key('Нижний   Новгород'), name_cache_key('нижний новгород'))
+
+    def test_coordinates_bucketing(self):
+        self.assertEqual(coordinates_cache_key('55.7558', '37.6176', 2), coordinates_cache_key(55.7612, 37.6211, 2))
+        self.assertNotEqual(coordinates_cache_key(55.75, 37.61, 2), coordinates_cache_key(55.80, 37.61, 2))
+        self.assertEqual(coordinates_cache_key(-0.001, 0.0, 2), coordinates_cache_key(0.0, 0.0, 2))
+        self.assertIsNone(coordinates_cache_key('', None, 2))
+
+    def test_ttl_expiration(self):
+        clock = FakeClock()
+        cache = TTLCache(maxsize=10, ttl=60, clock=clock)
+        cache.set('a', '1')
+        self.assertEqual(cache.get('a'), '1')
+        clock.now += 61
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(cache.stats()['misses'], 1)
+
+    def test_lru_eviction(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set('a', '1')
+        cache.set('b', '2')
+        cache.get('a')
+        cache.set('c', '3')
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), '1')
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_persistent_tier_survives_restart(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cache.sqlite3')
+            store = SQLiteStore(path)
+            TTLCache(ttl=60, store=store).set('name:москва', '294021')
+            store.close()
+
+            store = SQLiteStore(path)
+            self.assertEqual(TTLCache(ttl=60, store=store).get('name:москва'), '294021')
+            store.close()
+
+    @patch('requests.Session.get')
+    def test_repeated_lookup_hits_cache(self, mock_get):
+        mock_response = unittest.mock.Mock()
+        mock_response.json.return_value = [{'Key': '294021'}]
+        mock_get.return_value = mock_response
+
+        self.assertEqual(get_location_key_by_name('Москва'), '294021')
+        self.assertEqual(get_location_key_by_name(' москва  '), '294021')
+        self.assertEqual(mock_get.call_count, 1)
+
+    @patch('requests.Session.get')
+    def test_failed_lookup_is_not_cached(self, mock_get):
+        mock_response = unittest.mock.Mock()
+        mock_response.json.return_value = []
+        mock_get.return_value = mock_response
+
+        self.assertIsNone(get_location_key_by_name('Неведомый город'))
+        self.assertIsNone(get_location_key_by_name('Неведомый город'))
+        self.assertEqual(mock_get.call_count, 2)
+
+if __name__ == '__main__':
+    unittest.main()
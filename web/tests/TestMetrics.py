@@ -0,0 +1,57 @@
+import unittest
+from unittest.mock import patch
+
+from web import http_client
+from web.app import app
+from web.metrics import UPSTREAM_LATENCY, UPSTREAM_RESPONSES, Counter, Histogram, Registry, endpoint_name
+
+
+class TestMetrics(unittest.TestCase):
+    def test_endpoint_name(self):
+        self.assertEqual(endpoint_name('/currentconditions/v1/294021'), 'currentconditions')
+        self.assertEqual(endpoint_name('/forecasts/v1/daily/1day/294021'), 'forecast')
+        self.assertEqual(endpoint_name('/locations/v1/cities/autocomplete'), 'autocomplete')
+        self.assertEqual(endpoint_name('/locations/v1/cities/geoposition/search'), 'geoposition')
+
+    def test_histogram_rendering(self):
+        registry = Registry()
+        histogram = registry.register(Histogram('test_duration_seconds', "Тест", ('stage',), buckets=(0.1, 1.0)))
+        histogram.observe(0.05, 'render')
+        histogram.observe(0.5, 'render')
+        histogram.observe(5, 'render')
+        text = registry.render()
+
+        self.assertIn('# TYPE test_duration_seconds histogram', text)
+        self.assertIn('test_duration_seconds_bucket{stage="render",le="0.1"} 1', text)
+        self.assertIn('test_duration_seconds_bucket{stage="render",le="1.0"} 2', text)
+        self.assertIn('test_duration_seconds_bucket{stage="render",le="+Inf"} 3', text)
+        self.assertIn('test_duration_seconds_count{stage="render"} 3', text)
+
+    def test_counter_and_collector(self):
+        registry = Registry()
+        counter = registry.register(Counter('test_total', "Тест", ('status',)))
+        counter.inc('200')
+        counter.inc('200')
+        registry.add_collector(lambda: [('test_entries', 'gauge', "Тест", {(): 7})])
+        text = registry.render()
+
+        self.assertIn('test_total{status="200"} 2', text)
+        self.assertIn('test_entries 7', text)
+
+    @patch('requests.Session.get')
+    def test_upstream_calls_are_recorded(self, mock_get):
+        mock_get.return_value.status_code = 200
+        before = UPSTREAM_LATENCY.count('forecast')
+        http_client.get('/forecasts/v1/daily/1day/294021')
+
+        self.assertEqual(UPSTREAM_LATENCY.count('forecast'), before + 1)
+        self.assertGreaterEqual(UPSTREAM_RESPONSES.value('forecast', '200'), 1)
+
+    def test_metrics_endpoint(self):
+        response = app.test_client().get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain'))
+        self.assertIn('weather_upstream_request_duration_seconds', response.get_data(as_text=True))
+
+if __name__ == '__main__':
+    unittest.main()
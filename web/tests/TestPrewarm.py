@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+
+from web.forecast_cache import StaleWhileRevalidateCache
+from web.prewarm import PopularityTracker, Prewarmer, read_seed_file
+from web.tests.helpers import FakeClock
+
+
+class TestPopularityTracker(unittest.TestCase):
+    def test_top_and_decay(self):
+        tracker = PopularityTracker(min_count=0.5)
+        for location_key, count in (('294021', 5), ('295212', 3), ('294459', 1)):
+            for _ in range(count):
+                tracker.record(location_key)
+        self.assertEqual(tracker.top(2), ['294021', '295212'])
+
+        # Редкая локация забывается после уменьшения счетчиков
+        tracker.decay(0.4)
+        self.assertEqual(tracker.top(5), ['294021', '295212'])
+
+
+class TestPrewarmer(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = StaleWhileRevalidateCache(clock=self.clock)
+        self.tracker = PopularityTracker()
+        self.calls = []
+
+    def fetch(self, location_key):
+        self.calls.append(location_key)
+        return f"forecast-{location_key}"
+
+    def prewarmer(self, **kwargs):
+        jobs = [('forecast', lambda: 300, self.fetch)]
+        return Prewarmer(jobs, self.tracker, cache=self.cache, interval=30, lead=60, **kwargs)
+
+    def test_refreshes_before_expiry(self):
+        self.tracker.record('294021')
+        prewarmer = self.prewarmer()
+
+        self.assertEqual(prewarmer.tick(), 1)
+        self.assertEqual(self.cache.get_or_fetch(('forecast', '294021'), 300, self.fetch, '294021'), 'forecast-294021')
+        self.assertEqual(self.calls, ['294021'])
+
+        # Запись еще долго будет свежей
+        self.clock.now += 200
+        self.assertEqual(prewarmer.tick(), 0)
+
+        # До истечения свежести осталось меньше lead секунд
+        self.clock.now += 50
+        self.assertEqual(prewarmer.tick(), 1)
+        self.assertEqual(self.cache.expires_in(('forecast', '294021')), 300)
+
+    def test_only_top_locations_within_budget(self):
+        for location_key, count in (('294021', 3), ('295212', 2), ('294459', 1)):
+            for _ in range(count):
+                self.tracker.record(location_key)
+        prewarmer = self.prewarmer(top_n=2, budget=2)
+
+        # Бюджет 2 запроса в минуту при интервале 30 секунд - один запрос за цикл, самая популярная локация первой
+        prewarmer.tick()
+        self.assertEqual(self.calls, ['294021'])
+        prewarmer.tick()
+        self.assertEqual(self.calls, ['294021', '295212'])
+        prewarmer.tick()
+        self.assertEqual(self.calls, ['294021', '295212'])
+
+    def test_seed(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'seed.txt')
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write("# Популярные города\nМосква\n\n295212\n")
+            seed = read_seed_file(path)
+        self.assertEqual(seed, ['Москва', '295212'])
+
+        prewarmer = self.prewarmer(seed=seed, resolve={'Москва': '294021'}.get)
+        prewarmer.tick()
+        self.assertEqual(sorted(self.calls), ['294021', '295212'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+
+from web.rate_limiter import (HIGH, LOW, QuotaExceeded, RateLimiter, RateLimitExceeded, SQLiteLimiterStore,
+                              background_priority, current_priority)
+from web.tests.helpers import FakeClock
+
+
+class TestRateLimiter(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock(1729242000.0)
+
+    def test_token_bucket(self):
+        limiter = RateLimiter(['key'], rate=2, burst=2, max_wait=0, clock=self.clock)
+        self.assertEqual(limiter.try_acquire()[0], 'key')
+        self.assertEqual(limiter.try_acquire()[0], 'key')
+        api_key, wait = limiter.try_acquire()
+        self.assertIsNone(api_key)
+        self.assertAlmostEqual(wait, 0.5)
+
+        self.clock.now += 0.5
+        self.assertEqual(limiter.try_acquire()[0], 'key')
+
+    def test_daily_quota_resets_next_day(self):
+        limiter = RateLimiter(['key'], rate=100, daily_quota=2, clock=self.clock)
+        limiter.acquire()
+        limiter.acquire()
+        with self.assertRaises(QuotaExceeded):
+            limiter.acquire()
+
+        self.clock.now += 86400
+        self.assertEqual(limiter.acquire(), 'key')
+
+    def test_keys_rotate_when_exhausted(self):
+        limiter = RateLimiter(['first', 'second'], rate=1, burst=1, max_wait=0, clock=self.clock)
+        keys = {limiter.acquire(), limiter.acquire()}
+        self.assertEqual(keys, {'first', 'second'})
+        with self.assertRaises(RateLimitExceeded):
+            limiter.acquire()
+
+    def test_low_priority_keeps_reserve(self):
+        limiter = RateLimiter(['key'], rate=1, burst=5, reserve=0.4, max_wait=0, clock=self.clock)
+        for _ in range(3):
+            limiter.acquire(LOW)
+        # Фоновым запросам недоступны последние 40% корзины, пользовательским доступны
+        with self.assertRaises(RateLimitExceeded):
+            limiter.acquire(LOW)
+        self.assertEqual(limiter.acquire(HIGH), 'key')
+
+    def test_background_priority_context(self):
+        self.assertEqual(current_priority(), HIGH)
+        with background_priority():
+            self.assertEqual(current_priority(), LOW)
+        self.assertEqual(current_priority(), HIGH)
+
+    def test_throttled_key_is_paused(self):
+        limiter = RateLimiter(['first', 'second'], rate=100, max_wait=0, clock=self.clock)
+        limiter.report_throttled('first', retry_after=10)
+        self.assertEqual({limiter.acquire() for _ in range(4)}, {'second'})
+        self.clock.now += 11
+        self.assertIn('first', {limiter.acquire() for _ in range(4)})
+
+    def test_shared_store_between_limiters(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'limits.sqlite3')
+            # Два ограничителя имитируют два процесса, использующих один файл
+            first = RateLimiter(['key'], rate=1, burst=2, max_wait=0, store=SQLiteLimiterStore(path), clock=self.clock)
+            second = RateLimiter(['key'], rate=1, burst=2, max_wait=0, store=SQLiteLimiterStore(path), clock=self.clock)
+            first.acquire()
+            second.acquire()
+            with self.assertRaises(RateLimitExceeded):
+                first.acquire()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,32 @@
+import dataclasses
+import unittest
+
+from web.basic_requests import FAVORABLE_SUMMARY, summarize_forecast
+from web.records import DailyForecast, WeatherReport
+
+
+class TestRecords(unittest.TestCase):
+    def setUp(self):
+        self.forecast = DailyForecast('294021', 1729242000.5, -2.5, 4.0, 16.1, 30)
+
+    def test_records_are_frozen_and_slotted(self):
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            self.forecast.wind_speed = 0
+        self.assertFalse(hasattr(self.forecast, '__dict__'))
+
+    def test_report_supports_item_access(self):
+        report = summarize_forecast(DailyForecast('294021', 0.0, 10.0, 25.0, 10.0, 20))
+        self.assertIsInstance(report, WeatherReport)
+        self.assertEqual(report['weather_summary'], FAVORABLE_SUMMARY)
+        self.assertEqual(report.to_dict()['max_temperature'], 25.0)
+        with self.assertRaises(KeyError):
+            report['unknown']
+
+    def test_report_summaries(self):
+        report = summarize_forecast(self.forecast)
+        self.assertEqual(report.temperature_summary, "Температура неблагоприятная")
+        self.assertIsNone(report.wind_summary)
+        self.assertEqual(report.location_key, '294021')
+
+if __name__ == '__main__':
+    unittest.main()
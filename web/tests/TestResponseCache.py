@@ -0,0 +1,151 @@
+import unittest
+from unittest.mock import patch
+
+from web.app import app
+from web.basic_requests import summarize_forecast
+from web.circuit_breaker import CircuitOpenError
+from web.metrics import STAGE_LATENCY
+from web.records import DailyForecast
+from web.response_cache import canonical_query, get_page_cache, reset_page_cache
+
+QUERY = 'start_address=%D0%9C%D0%BE%D1%81%D0%BA%D0%B2%D0%B0&end_address=%D0%A2%D0%B2%D0%B5%D1%80%D1%8C'
+
+
+def location_key(address):
+    return {'Москва': '294021', 'Тверь': '178087'}.get(address)
+
+
+def weather(key, day=0):
+    return summarize_forecast(DailyForecast(key, 1729242000.0 + day, 10.0, 20.0, 5.0, 10))
+
+
+@patch('web.app.forecast_freshness', return_value=600)
+@patch('web.app.check_weather_by_location_key', side_effect=weather)
+@patch('web.app.get_location_key_by_name', side_effect=location_key)
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+        reset_page_cache()
+
+    def test_canonical_query(self, mock_get_key, mock_check_weather, mock_freshness):
+        self.assertEqual(canonical_query(('  Москва ', None, None), ('Тверь', None, None)), QUERY)
+        self.assertEqual(canonical_query((None, '55.75', '37.6'), ('', '56', '35.9'), 2),
+                         'start_latitude=55.75&start_longitude=37.6&end_latitude=56.0&end_longitude=35.9&day=2')
+
+    def test_redirect_to_canonical_url(self, mock_get_key, mock_check_weather, mock_freshness):
+        response = self.client.get('/check-weather', query_string={
+            'start_input_type': 'address', 'start_address': ' Москва', 'start_latitude': '',
+            'end_address': 'Тверь', 'day': '0'})
+        self.assertEqual(response.status_code, 301)
+        self.assertTrue(response.location.endswith(f'/check-weather?{QUERY}'))
+        mock_get_key.assert_not_called()
+
+    def test_redirect_keeps_script_root(self, mock_get_key, mock_check_weather, mock_freshness):
+        response = self.client.get('/check-weather', query_string={'start_address': ' Москва', 'end_address': 'Тверь'},
+                                   environ_overrides={'SCRIPT_NAME': '/weather'})
+        self.assertEqual(response.status_code, 301)
+        self.assertTrue(response.location.endswith(f'/weather/check-weather?{QUERY}'))
+
+    def test_day_links_follow_request_addresses(self, mock_get_key, mock_check_weather, mock_freshness):
+        mock_get_key.side_effect = lambda address: location_key({'Moscow': 'Москва'}.get(address, address))
+        self.client.get(f'/check-weather?{QUERY}')
+        # Те же ключи локаций, но другие адреса: ссылки на другие дни не должны вести на адреса первого запроса
+        other = canonical_query(('Moscow', None, None), ('Тверь', None, None))
+        body = self.client.get(f'/check-weather?{other}').get_data(as_text=True)
+        link = canonical_query(('Moscow', None, None), ('Тверь', None, None), 1)
+        self.assertIn(f'/check-weather?{link}'.replace('&', '&amp;'), body)
+        self.assertNotIn(QUERY, body)
+
+    def test_stages_are_measured(self, mock_get_key, mock_check_weather, mock_freshness):
+        stages = ('check_weather_request', 'resolve_location', 'check_weather', 'render')
+        before = [STAGE_LATENCY.count(name) for name in stages]
+        self.client.get(f'/check-weather?{QUERY}')
+        self.client.get(f'/api/check-weather?{QUERY}')
+        # Этапы измеряются для каждой точки, как и при отправке формы методом POST
+        self.assertEqual([STAGE_LATENCY.count(name) - count for name, count in zip(stages, before)], [2, 4, 4, 1])
+
+    def test_etag_and_not_modified(self, mock_get_key, mock_check_weather, mock_freshness):
+        response = self.client.get(f'/check-weather?{QUERY}')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Погода благоприятная', response.get_data(as_text=True))
+        self.assertEqual(response.cache_control.max_age, 600)
+        self.assertTrue(response.cache_control.public)
+        etag = response.get_etag()[0]
+
+        response = self.client.get(f'/check-weather?{QUERY}', headers={'If-None-Match': f'"{etag}"'})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.get_data(), b'')
+        # Повторные запросы обслуживаются из кэша готовых ответов без проверки погоды
+        self.assertEqual(mock_check_weather.call_count, 2)
+        self.assertEqual(get_page_cache().stats()['hits'], 1)
+
+    def test_not_modified_without_page_cache(self, mock_get_key, mock_check_weather, mock_freshness):
+        etag = self.client.get(f'/check-weather?{QUERY}').get_etag()[0]
+        reset_page_cache()
+        with patch('web.app.render_result') as mock_render:
+            response = self.client.get(f'/check-weather?{QUERY}', headers={'If-None-Match': f'"{etag}"'})
+        self.assertEqual(response.status_code, 304)
+        mock_render.assert_not_called()
+
+    def test_etag_changes_with_forecast(self, mock_get_key, mock_check_weather, mock_freshness):
+        first = self.client.get(f'/check-weather?{QUERY}').get_etag()[0]
+        other_day = self.client.get(f'/check-weather?{QUERY}&day=1').get_etag()[0]
+        self.assertNotEqual(first, other_day)
+        reset_page_cache()
+        mock_check_weather.side_effect = lambda key, day=0: weather(key, day + 10)
+        self.assertNotEqual(self.client.get(f'/check-weather?{QUERY}').get_etag()[0], first)
+
+    def test_etag_changes_after_day_rollover(self, mock_get_key, mock_check_weather, mock_freshness):
+        mock_check_weather.side_effect = lambda key, day=0: summarize_forecast(
+            DailyForecast(key, 1729242000.0, 10.0, 20.0, 5.0, 10, date='2024-10-18'))
+        first = self.client.get(f'/check-weather?{QUERY}').get_etag()[0]
+        reset_page_cache()
+        # Кэшированный ряд перешел на следующий день: время получения прогноза то же, а данные другие
+        mock_check_weather.side_effect = lambda key, day=0: summarize_forecast(
+            DailyForecast(key, 1729242000.0, 12.0, 22.0, 5.0, 10, date='2024-10-19'))
+        response = self.client.get(f'/check-weather?{QUERY}', headers={'If-None-Match': f'"{first}"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('2024-10-19', response.get_data(as_text=True))
+
+    def test_json_variant(self, mock_get_key, mock_check_weather, mock_freshness):
+        response = self.client.get(f'/api/check-weather?{QUERY}&day=2')
+        data = response.get_json()
+        self.assertEqual(data['day'], 2)
+        self.assertEqual(data['start']['location_key'], '294021')
+        self.assertEqual(data['end']['weather_summary'], 'Погода благоприятная')
+        self.assertIsNotNone(response.get_etag()[0])
+        mock_check_weather.assert_any_call('178087', 2)
+        unknown = canonical_query(('Нигде', None, None), ('Тверь', None, None))
+        self.assertEqual(self.client.get(f'/api/check-weather?{unknown}').status_code, 400)
+
+    def test_partial_result_is_not_cached(self, mock_get_key, mock_check_weather, mock_freshness):
+        def weather_for_moscow_only(key, day=0):
+            if key != '294021':
+                raise CircuitOpenError("Сервис недоступен")
+            return weather(key, day)
+        mock_check_weather.side_effect = weather_for_moscow_only
+
+        response = self.client.get(f'/check-weather?{QUERY}')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.cache_control.no_store)
+        self.assertEqual(len(get_page_cache()), 0)
+
+    def test_static_assets_are_fingerprinted(self, mock_get_key, mock_check_weather, mock_freshness):
+        response = self.client.get('/')
+        self.assertEqual(response.cache_control.max_age, 3600)
+        self.assertEqual(self.client.get('/', headers={'If-None-Match': response.headers['ETag']}).status_code, 304)
+
+        body = response.get_data(as_text=True)
+        start = body.index('/static/styles.css?v=')
+        url = body[start:body.index('"', start)]
+        response = self.client.get(url)
+        self.assertTrue(response.cache_control.immutable)
+        self.assertEqual(response.cache_control.max_age, 365 * 24 * 3600)
+        response.close()
+
+        response = self.client.get('/static/styles.css?v=outdated')
+        self.assertFalse(response.cache_control.immutable)
+        response.close()
+
+if __name__ == '__main__':
+    unittest.main()
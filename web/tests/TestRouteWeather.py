@@ -0,0 +1,88 @@
+import unittest
+from unittest.mock import patch
+
+from web.app import app
+from web.basic_requests import FAVORABLE_SUMMARY, UNFAVORABLE_SUMMARY
+from web.circuit_breaker import CircuitOpenError
+from web.records import DailyForecast
+
+
+def location_key_by_name(address):
+    return {'москва': '294021', 'moscow': '294021', 'тверь': '178087'}.get(address.strip().casefold())
+
+
+def weather(location_key, day=0):
+    wind_speed = 60.0 if location_key == '178087' else 5.0
+    return DailyForecast(location_key, 0.0, 10.0, 20.0, wind_speed, 10)
+
+
+@patch('web.route.get_weather_by_location_key', side_effect=weather)
+@patch('web.route.get_location_key_by_coordinates', return_value='294021')
+@patch('web.route.get_location_key_by_name', side_effect=location_key_by_name)
+class TestRouteWeather(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+
+    def test_duplicate_points_are_resolved_once(self, mock_by_name, mock_by_coordinates, mock_check_weather):
+        waypoints = ['Москва', ' москва ', {'address': 'Moscow'},
+                     {'latitude': 55.7558, 'longitude': 37.6176}, {'latitude': 55.7561, 'longitude': 37.6179}]
+        response = self.client.post('/api/route-weather', json={'waypoints': waypoints})
+        data = response.get_json()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(data['points']), 5)
+        self.assertEqual(data['unique_locations'], 1)
+        self.assertTrue(data['favorable'])
+        # Одинаковые адреса и близкие координаты определяются одним запросом
+        self.assertEqual(mock_by_name.call_count, 2)
+        self.assertEqual(mock_by_coordinates.call_count, 1)
+        self.assertEqual(mock_check_weather.call_count, 1)
+
+    def test_route_verdict_and_point_errors(self, mock_by_name, mock_by_coordinates, mock_check_weather):
+        response = self.client.post('/api/route-weather', json={'waypoints': ['Москва', 'Тверь', 'Нигде']})
+        data = response.get_json()
+
+        self.assertFalse(data['favorable'])
+        self.assertEqual(data['verdict'], UNFAVORABLE_SUMMARY)
+        self.assertEqual(data['points'][1]['weather']['weather_summary'], UNFAVORABLE_SUMMARY)
+        self.assertEqual(data['points'][1]['weather']['reasons'], ["Сильный ветер"])
+        self.assertEqual(data['points'][0]['weather']['weather_summary'], FAVORABLE_SUMMARY)
+        self.assertIsNone(data['points'][2]['location_key'])
+        self.assertIsNotNone(data['points'][2]['error'])
+
+    def test_location_lookup_unavailable(self, mock_by_name, mock_by_coordinates, mock_check_weather):
+        mock_by_coordinates.side_effect = CircuitOpenError("Сервис погоды временно недоступен.")
+        response = self.client.post('/api/route-weather',
+                                    json={'waypoints': ['Москва', {'latitude': 56.86, 'longitude': 35.9}]})
+        data = response.get_json()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['points'][0]['weather']['weather_summary'], FAVORABLE_SUMMARY)
+        self.assertIsNone(data['points'][1]['location_key'])
+        self.assertEqual(data['points'][1]['error'], "Сервис погоды временно недоступен.")
+        self.assertFalse(data['favorable'])
+
+    def test_forecast_day(self, mock_by_name, mock_by_coordinates, mock_check_weather):
+        response = self.client.post('/api/route-weather', json={'waypoints': ['Москва'], 'day': 2})
+        self.assertEqual(response.get_json()['day'], 2)
+        mock_check_weather.assert_called_once_with('294021', 2)
+        self.assertEqual(self.client.post('/api/route-weather', json={'waypoints': ['Москва'], 'day': 7}).status_code,
+                         400)
+
+    def test_invalid_payload(self, mock_by_name, mock_by_coordinates, mock_check_weather):
+        self.assertEqual(self.client.post('/api/route-weather', json={}).status_code, 400)
+        self.assertEqual(self.client.post('/api/route-weather', json=['Москва', 'Тверь']).status_code, 400)
+        self.assertEqual(self.client.post('/api/route-weather', json={'waypoints': [{'latitude': 1}]}).status_code, 400)
+        self.assertEqual(self.client.post('/api/route-weather', json={'waypoints': ['Москва'] * 1000}).status_code, 400)
+
+    def test_invalid_waypoints_are_rejected_before_api(self, mock_by_name, mock_by_coordinates, mock_check_weather):
+        for waypoint in ({'address': 123}, '', '   ', {'address': ''}, {'latitude': 'север', 'longitude': 37.6},
+                         {'latitude': 91, 'longitude': 37.6}, {'latitude': 55.7, 'longitude': 'NaN'},
+                         {'latitude': True, 'longitude': 37.6}):
+            response = self.client.post('/api/route-weather', json={'waypoints': [waypoint]})
+            self.assertEqual(response.status_code, 400, waypoint)
+        mock_by_name.assert_not_called()
+        mock_by_coordinates.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from web.records import DailyForecast
+from web.rules import FAVORABLE_SUMMARY, UNFAVORABLE_SUMMARY, Rule, RuleEngine, load_rules
+
+
+class TestRuleEngine(unittest.TestCase):
+    def setUp(self):
+        self.engine = RuleEngine()
+
+    def test_all_reasons_are_reported(self):
+        # Прежняя цепочка elif останавливалась на температуре
+        report = self.engine.report(DailyForecast('294021', 0.0, -5.0, 10.0, 60.0, 80))
+        self.assertEqual(report.weather_summary, UNFAVORABLE_SUMMARY)
+        self.assertEqual(report.temperature_summary, "Температура неблагоприятная")
+        self.assertEqual(report.wind_summary, "Сильный ветер")
+        self.assertEqual(report.precipitation_summary, "Высокая вероятность осадков")
+        self.assertEqual(len(report.reasons), 3)
+
+    def test_favorable(self):
+        report = self.engine.report(DailyForecast('294021', 0.0, 0.0, 35.0, 50.0, 70))
+        self.assertEqual(report.weather_summary, FAVORABLE_SUMMARY)
+        self.assertEqual(report.reasons, ())
+
+    def test_vectorized_matches_scalar(self):
+        rng = np.random.default_rng(7)
+        forecasts = [DailyForecast(str(index), 0.0, float(low), float(low + spread), float(wind), int(rain))
+                     for index, (low, spread, wind, rain) in enumerate(zip(
+                         rng.uniform(-10, 30, 500), rng.uniform(0, 15, 500), rng.uniform(0, 80, 500),
+                         rng.integers(0, 101, 500)))]
+        self.assertEqual(self.engine.reports(forecasts), [self.engine.report(forecast) for forecast in forecasts])
+
+    def test_missing_values_do_not_trigger(self):
+        triggered = self.engine.evaluate_columns(np.array([[np.nan, np.nan, np.nan, np.nan], [-1.0, 0, 0, 0]]))
+        self.assertEqual(triggered.tolist(), [[False] * 4, [True, False, False, False]])
+
+    def test_user_defined_rules(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'rules.json')
+            with open(path, 'w', encoding='utf-8') as file:
+                json.dump([{'name': 'breeze', 'field': 'wind_speed', 'op': '>=', 'threshold': 20,
+                            'message': "Ветер мешает погрузке"}], file)
+            engine = RuleEngine(load_rules(path))
+
+        reports = engine.reports([DailyForecast('1', 0.0, 0.0, 10.0, 25.0, 0),
+                                  DailyForecast('2', 0.0, 0.0, 10.0, 5.0, 0)])
+        self.assertEqual(reports[0].reasons, ("Ветер мешает погрузке",))
+        self.assertIsNone(reports[0].wind_summary)
+        self.assertEqual(reports[1].weather_summary, FAVORABLE_SUMMARY)
+
+    def test_invalid_rule(self):
+        with self.assertRaises(ValueError):
+            Rule('bad', 'humidity', '>', 1, "Влажно")
+        with self.assertRaises(ValueError):
+            Rule('bad', 'wind_speed', '!=', 1, "Ветер")
+
+if __name__ == '__main__':
+    unittest.main()
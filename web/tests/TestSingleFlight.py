@@ -0,0 +1,106 @@
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from web.basic_requests import get_current_temperature_by_location_key
+from web.forecast_cache import reset_forecast_cache
+from web.rate_limiter import HIGH, RateLimitExceeded, background_priority, current_priority
+from web.singleflight import AsyncSingleFlight, SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_concurrent_calls_share_result(self):
+        flights = SingleFlight()
+        calls = []
+        release = threading.Event()
+
+        def fetch(key):
+            calls.append(key)
+            release.wait(1)
+            return f"result-{key}"
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            futures = [pool.submit(flights.do, ('forecast', '294021'), fetch, '294021') for _ in range(8)]
+            time.sleep(0.1)
+            release.set()
+            results = [future.result() for future in futures]
+
+        self.assertEqual(results, ['result-294021'] * 8)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flights.shared, 7)
+
+    def test_exception_is_shared_and_key_released(self):
+        flights = SingleFlight()
+
+        def failing():
+            raise RuntimeError("API Error")
+
+        with self.assertRaises(RuntimeError):
+            flights.do('key', failing)
+        # После завершения вызова ключ освобождается и следующий вызов выполняется заново
+        self.assertEqual(flights.do('key', lambda: 42), 42)
+
+    def test_async_calls_share_result(self):
+        flights = AsyncSingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return 'ok'
+
+        async def main():
+            return await asyncio.gather(*(flights.do('key', fetch) for _ in range(5)))
+
+        self.assertEqual(asyncio.run(main()), ['ok'] * 5)
+        self.assertEqual(len(calls), 1)
+
+    @patch('requests.Session.get')
+    def test_identical_upstream_requests_are_coalesced(self, mock_get):
+        reset_forecast_cache()
+
+        def slow_response(*args, **kwargs):
+            time.sleep(0.1)
+            response = unittest.mock.Mock()
+            response.json.return_value = [{'Temperature': {'Metric': {'Value': 20.5}}, 'WeatherText': 'Солнечно'}]
+            return response
+
+        mock_get.side_effect = slow_response
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(get_current_temperature_by_location_key, ['294021'] * 4))
+
+        self.assertEqual([(result.temperature, result.weather_text) for result in results], [(20.5, 'Солнечно')] * 4)
+        # Все потоки получают одну и ту же запись
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(mock_get.call_count, 1)
+
+    @patch('web.http_client.get')
+    def test_user_miss_does_not_share_background_refusal(self, mock_get):
+        reset_forecast_cache()
+
+        def response(*args, **kwargs):
+            # Фоновому запросу ограничитель отказывает из-за резерва для пользователей
+            if current_priority() != HIGH:
+                time.sleep(0.1)
+                raise RateLimitExceeded("Резерв лимита оставлен для пользователей")
+            result = unittest.mock.Mock()
+            result.json.return_value = [{'Temperature': {'Metric': {'Value': 20.5}}, 'WeatherText': 'Солнечно'}]
+            return result
+
+        def background():
+            with background_priority():
+                return get_current_temperature_by_location_key('294021')
+
+        mock_get.side_effect = response
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            refresh = pool.submit(background)
+            time.sleep(0.03)
+            self.assertEqual(get_current_temperature_by_location_key('294021').temperature, 20.5)
+            with self.assertRaises(RateLimitExceeded):
+                refresh.result()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,10 @@
+class FakeClock:
+    """
+    Управляемые часы для тестов: возвращают значение now, которое тест сдвигает вручную.
+    """
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now